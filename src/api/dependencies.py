@@ -13,7 +13,7 @@ import asyncio
 # Attempt to import components; fall back to None
 try:
     from detection.yolo_detector import YOLODetector
-    yolo_detector = YOLODetector()
+    yolo_detector = YOLODetector.from_config()
 except Exception:
     yolo_detector = None
 
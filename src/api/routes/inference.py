@@ -2,9 +2,11 @@
 inference.py
 
 /inference endpoint: accepts image file upload and returns detection + pose + ocr.
+/inference/batch endpoint: accepts several images and returns detections for each.
 """
 
-from fastapi import APIRouter, File, UploadFile, Depends, HTTPException
+from fastapi import APIRouter, File, UploadFile, Depends, HTTPException, Query
+from typing import List
 import cv2
 import numpy as np
 import tempfile
@@ -30,3 +32,21 @@ async def inference_endpoint(file: UploadFile = File(...),
     return {"detections": detections,
             "pose": keypoints,
             "ocr": ocr_res}
+
+@router.post("/inference/batch")
+async def inference_batch_endpoint(files: List[UploadFile] = File(...),
+                                   chunk_size: int = Query(8, ge=1),
+                                   detector = Depends(get_detector)):
+    if detector is None:
+        raise HTTPException(status_code=503, detail="Detector not loaded")
+    imgs = []
+    for f in files:
+        img = cv2.imdecode(np.frombuffer(await f.read(), dtype=np.uint8), cv2.IMREAD_COLOR)
+        if img is None:
+            raise HTTPException(status_code=400, detail=f"Invalid image: {f.filename}")
+        imgs.append(img)
+
+    detections = []
+    for off in range(0, len(imgs), chunk_size):
+        detections.extend(detector.predict_batch(imgs[off:off + chunk_size]))
+    return {"detections": detections}
@@ -0,0 +1,369 @@
+"""
+benchmark.py
+
+Micro-benchmarks for pipeline components.
+
+Example:
+    python -m cli.benchmark detector --video tests/data/sample.mp4 --batch-sizes 1 2 4 8 16
+    python -m cli.benchmark nms --sizes 100 1000 10000
+    python -m cli.benchmark quantization --video tests/data/sample.mp4
+    python -m cli.benchmark scheduler --video data/raw/game.mp4 --intervals 2 4 8
+    python -m cli.benchmark ocr --regions 4 --calls 50
+    python -m cli.benchmark aggregate --frames 5000 --detections 12
+    python -m cli.benchmark decode --video data/raw/game.mp4 --sizes 640 960
+"""
+
+from __future__ import annotations
+import argparse, sys, time
+from typing import Callable, List
+import cv2
+import numpy as np
+
+def _read_frames(video: str, limit: int) -> List[np.ndarray]:
+    cap = cv2.VideoCapture(video)
+    if not cap.isOpened():
+        print("Cannot open video:", video)
+        sys.exit(1)
+    frames = []
+    while len(frames) < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+def _best_of(fn: Callable[[], object], repeat: int) -> float:
+    """Best wall time in seconds over *repeat* runs (after one warm-up)."""
+    fn()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+# ---------------- detector batch size ----------------
+def bench_detector(args):
+    from detection.yolo_detector import YOLODetector
+    detector = YOLODetector.from_config(model_path=args.model, providers=["CPUExecutionProvider"])
+    frames = _read_frames(args.video, args.frames)
+    if not frames:
+        print("No frames decoded from", args.video)
+        sys.exit(1)
+    if detector.max_batch:
+        print(f"⚠️  model has a fixed batch dimension of {detector.max_batch}; larger batches are chunked")
+    print(f"{'batch':>6} {'frames/s':>10} {'ms/frame':>10}")
+    for bs in args.batch_sizes:
+        def run():
+            for off in range(0, len(frames), bs):
+                detector.predict_batch(frames[off:off + bs])
+        elapsed = _best_of(run, args.repeat)
+        print(f"{bs:>6} {len(frames) / elapsed:>10.1f} {elapsed * 1000 / len(frames):>10.2f}")
+
+# ---------------- NMS ----------------
+def _legacy_nms(boxes, scores, iou_threshold):
+    """The previous per-box while-loop NMS, kept as the benchmark baseline."""
+    idxs = scores.argsort()[::-1]
+    keep = []
+    while idxs.size > 0:
+        i = idxs[0]
+        keep.append(i)
+        xx1 = np.maximum(boxes[i, 0], boxes[idxs[1:], 0])
+        yy1 = np.maximum(boxes[i, 1], boxes[idxs[1:], 1])
+        xx2 = np.minimum(boxes[i, 2], boxes[idxs[1:], 2])
+        yy2 = np.minimum(boxes[i, 3], boxes[idxs[1:], 3])
+        inter = np.maximum(0, xx2 - xx1) * np.maximum(0, yy2 - yy1)
+        iou = inter / ((boxes[i, 2] - boxes[i, 0]) * (boxes[i, 3] - boxes[i, 1]) +
+                       (boxes[idxs[1:], 2] - boxes[idxs[1:], 0]) * (boxes[idxs[1:], 3] - boxes[idxs[1:], 1]) - inter + 1e-6)
+        idxs = idxs[1:][iou < iou_threshold]
+    return keep
+
+def _synthetic_candidates(n: int, rng: np.random.Generator, objects: int = 40):
+    """Detector-like candidates: jittered clusters around a few objects."""
+    centers = rng.uniform(0, 1920, (objects, 2))
+    sizes = rng.uniform(10, 200, (objects, 2))
+    owner = rng.integers(0, objects, n)
+    c = centers[owner] + rng.normal(0, 8, (n, 2))
+    wh = sizes[owner] * rng.uniform(0.8, 1.2, (n, 2))
+    boxes = np.hstack([c - wh / 2, c + wh / 2]).astype(np.float32)
+    scores = rng.uniform(0.25, 1.0, n).astype(np.float32)
+    classes = owner % 3
+    return boxes, scores, classes
+
+def bench_nms(args):
+    from detection.nms import nms, batched_nms
+    rng = np.random.default_rng(0)
+    print(f"{'boxes':>7} {'legacy ms':>10} {'nms ms':>8} {'top-k ms':>9} {'class ms':>9} {'soft ms':>8} {'same':>5}")
+    for n in args.sizes:
+        boxes, scores, classes = _synthetic_candidates(n, rng)
+        legacy = _best_of(lambda: _legacy_nms(boxes, scores, args.iou), args.repeat)
+        vec = _best_of(lambda: nms(boxes, scores, args.iou), args.repeat)
+        topk = _best_of(lambda: nms(boxes, scores, args.iou, top_k=args.top_k), args.repeat)
+        cls = _best_of(lambda: batched_nms(boxes, scores, classes, args.iou, top_k=args.top_k), args.repeat)
+        soft = _best_of(lambda: batched_nms(boxes, scores, classes, args.iou, top_k=args.top_k,
+                                            method="gaussian"), args.repeat)
+        same = sorted(_legacy_nms(boxes, scores, args.iou)) == sorted(nms(boxes, scores, args.iou).tolist())
+        print(f"{n:>7} {legacy * 1e3:>10.2f} {vec * 1e3:>8.2f} {topk * 1e3:>9.2f} "
+              f"{cls * 1e3:>9.2f} {soft * 1e3:>8.2f} {str(same):>5}")
+
+# ---------------- FP32 vs INT8 detector ----------------
+def _match_detections(ref, test, iou_thres: float = 0.5):
+    """Greedy same-class matching; returns (matched, matched IoUs, |Δconf|)."""
+    from detection.nms import box_iou
+    if not ref or not test:
+        return 0, [], []
+    iou = box_iou([d["bbox"] for d in ref], [d["bbox"] for d in test])
+    same_cls = np.equal.outer([d["class_id"] for d in ref], [d["class_id"] for d in test])
+    iou = np.where(same_cls, iou, 0.0)
+    ious, dconf = [], []
+    for i in np.argsort([-d["confidence"] for d in ref]):
+        j = int(iou[i].argmax())
+        if iou[i, j] >= iou_thres:
+            ious.append(float(iou[i, j]))
+            dconf.append(abs(ref[i]["confidence"] - test[j]["confidence"]))
+            iou[:, j] = 0.0
+    return len(ious), ious, dconf
+
+def bench_quantization(args):
+    from detection.yolo_detector import YOLODetector
+    frames = _read_frames(args.video, args.frames)
+    if not frames:
+        print("No frames decoded from", args.video)
+        sys.exit(1)
+    fp32 = YOLODetector.from_config(model_path=args.model, providers=["CPUExecutionProvider"])
+    int8 = YOLODetector.from_config(model_path=args.model, providers=["CPUExecutionProvider"], quantized=True)
+
+    results = {}
+    for name, det in (("fp32", fp32), ("int8", int8)):
+        elapsed = _best_of(lambda: [det.predict(f) for f in frames], args.repeat)
+        results[name] = ([det.predict(f) for f in frames], len(frames) / elapsed)
+
+    n_ref = n_test = n_match = 0
+    all_ious, all_dconf = [], []
+    for ref, test in zip(results["fp32"][0], results["int8"][0]):
+        m, ious, dconf = _match_detections(ref, test)
+        n_ref += len(ref); n_test += len(test); n_match += m
+        all_ious += ious; all_dconf += dconf
+
+    print(f"video: {args.video} ({len(frames)} frames)")
+    print(f"{'model':>6} {'frames/s':>10} {'detections':>11}")
+    print(f"{'fp32':>6} {results['fp32'][1]:>10.1f} {n_ref:>11}")
+    print(f"{'int8':>6} {results['int8'][1]:>10.1f} {n_test:>11}")
+    print(f"speed-up            : {results['int8'][1] / results['fp32'][1]:.2f}x")
+    print(f"recall vs fp32      : {n_match / max(n_ref, 1):.3f}")
+    print(f"precision vs fp32   : {n_match / max(n_test, 1):.3f}")
+    print(f"mean matched IoU    : {np.mean(all_ious) if all_ious else float('nan'):.3f}")
+    print(f"mean |Δconfidence|  : {np.mean(all_dconf) if all_dconf else float('nan'):.4f}")
+
+# ---------------- detect-every-N scheduler ----------------
+def bench_scheduler(args):
+    from detection.yolo_detector import YOLODetector
+    from detection.scheduler import DetectionScheduler
+    frames = _read_frames(args.video, args.frames)
+    if not frames:
+        print("No frames decoded from", args.video)
+        sys.exit(1)
+    detector = YOLODetector.from_config(model_path=args.model)
+
+    start = time.perf_counter()
+    reference = [detector.predict(f) for f in frames]
+    full_fps = len(frames) / (time.perf_counter() - start)
+
+    print(f"{'N':>4} {'adaptive':>8} {'det calls':>9} {'frames/s':>9} {'speed-up':>8} "
+          f"{'recall':>7} {'precision':>9} {'mean IoU':>8}")
+    print(f"{'full':>4} {'-':>8} {len(frames):>9} {full_fps:>9.1f} {1.0:>8.2f} "
+          f"{1.0:>7.3f} {1.0:>9.3f} {1.0:>8.3f}")
+    for n in args.intervals:
+        for adaptive in (False, True):
+            sched = DetectionScheduler(detector, interval=n, adaptive=adaptive,
+                                       max_interval=max(16, n))
+            start = time.perf_counter()
+            outputs = [sched.step(f) for f in frames]
+            fps = len(frames) / (time.perf_counter() - start)
+            n_ref = n_out = n_match = 0
+            ious = []
+            for ref, out in zip(reference, outputs):
+                m, iou, _ = _match_detections(ref, out)
+                n_ref += len(ref); n_out += len(out); n_match += m; ious += iou
+            print(f"{n:>4} {str(adaptive):>8} {sched.detector_calls:>9} {fps:>9.1f} {fps / full_fps:>8.2f} "
+                  f"{n_match / max(n_ref, 1):>7.3f} {n_match / max(n_out, 1):>9.3f} "
+                  f"{np.mean(ious) if ious else float('nan'):>8.3f}")
+
+# ---------------- OCR backends ----------------
+def _synthetic_regions(n: int) -> List[np.ndarray]:
+    """Binarized overlay-like text lines (scoreboard, speed, count ...)."""
+    texts = ["TPE 3 JPN 1", "152 km/h", "B 2 S 1 O 2", "TOP 7", "H 8 E 0"]
+    rois = []
+    for i in range(n):
+        img = np.full((40, 220), 255, dtype=np.uint8)
+        cv2.putText(img, texts[i % len(texts)], (6, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.9, 0, 2)
+        rois.append(img)
+    return rois
+
+def bench_ocr(args):
+    from ocr.ocr_service import PytesseractBackend, TesserocrBackend
+    rois = _synthetic_regions(args.regions)
+    variants = [
+        ("pytesseract per region", lambda: PytesseractBackend(batch=False)),
+        ("pytesseract batched", lambda: PytesseractBackend(batch=True)),
+        ("tesserocr persistent", TesserocrBackend),
+    ]
+    print(f"{'backend':<24} {'regions/s':>10} {'ms/frame':>9}  sample")
+    for label, make in variants:
+        try:
+            backend = make()
+            sample = backend.recognize_batch(rois, psm=7)
+        except Exception as e:  # missing module or tesseract binary
+            print(f"{label:<24} {'n/a':>10} {'n/a':>9}  ({type(e).__name__}: {e})")
+            continue
+        def run():
+            for _ in range(args.calls):
+                backend.recognize_batch(rois, psm=7)
+        elapsed = _best_of(run, args.repeat)
+        print(f"{label:<24} {args.calls * len(rois) / elapsed:>10.1f} {elapsed * 1000 / args.calls:>9.2f}  {sample[:2]}")
+        backend.close()
+
+def _synthetic_frame_inputs(n: int, dets: int, seed: int = 0):
+    from pose.keypoints import unpack_keypoints
+    rng = np.random.default_rng(seed)
+    pose = rng.random((33, 4)).astype(np.float32)
+    frames = []
+    for i in range(n):
+        xy = rng.uniform(0, 1800, (dets, 2))
+        wh = rng.uniform(4, 120, (dets, 2))
+        frames.append((i, [{"bbox": np.concatenate([xy[k], xy[k] + wh[k]]).tolist(),
+                            "confidence": float(rng.random()), "class_id": int(k % 3), "track_id": k}
+                           for k in range(dets)], pose, {"score": "3-2", "inning": "7"}))
+    return frames, unpack_keypoints(pose)
+
+def bench_aggregate(args):
+    from datetime import datetime
+    from integration.aggregator import StreamAggregator
+    from integration.schema import FrameData, trusted_frame
+    inputs, keypoints = _synthetic_frame_inputs(args.frames, args.detections)
+    ts = datetime.utcnow()
+    ref = StreamAggregator()
+    for i, dets, pose, ocr in inputs:
+        ref.add_frame(i, dets, pose, ocr, ts)
+    records = list(ref.store.records())  # the per-frame dicts read_jsonl validates
+
+    def pydantic_models():  # per-frame validated models (the pre-FrameStore path)
+        return [FrameData(**rec) for rec in records]
+
+    def trusted_models():  # same models, pydantic validation skipped
+        return [trusted_frame(i, ts, dets, keypoints, ocr) for i, dets, _, ocr in inputs]
+
+    def store(sanitize):
+        def run():
+            agg = StreamAggregator()
+            for i, dets, pose, ocr in inputs:
+                agg.add_frame(i, dets, pose, ocr, ts, sanitize=sanitize)
+        return run
+
+    variants = [("FrameData(**rec)", pydantic_models),
+                ("trusted_frame()", trusted_models),
+                ("add_frame", store(False)),
+                ("add_frame sanitize=True", store(True))]
+    print(f"{'path':<26} {'frames/s':>10} {'us/frame':>9}")
+    for label, fn in variants:
+        elapsed = _best_of(fn, args.repeat)
+        print(f"{label:<26} {args.frames / elapsed:>10.0f} {elapsed * 1e6 / args.frames:>9.1f}")
+
+# ---------------- reduced-resolution decode ----------------
+def bench_decode(args):
+    from ingest.scaled_reader import ScaledReader
+
+    def full():
+        cap = cv2.VideoCapture(args.video)
+        n = nbytes = 0
+        while n < args.frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            n, nbytes = n + 1, nbytes + frame.nbytes
+        cap.release()
+        return n, nbytes
+
+    def scaled(size, backend):
+        def run():
+            n = nbytes = 0
+            with ScaledReader(args.video, max_side=size, backend=backend) as reader:
+                for n, frame in reader:
+                    nbytes += frame.nbytes
+                    if n + 1 >= args.frames:
+                        break
+            return n + 1, nbytes
+        return run
+
+    variants = [("full resolution", full)]
+    for size in args.sizes:
+        variants += [(f"{b} {size}px", scaled(size, b)) for b in args.backends]
+    print(f"{'decode':<18} {'frames/s':>10} {'MB/frame':>9}")
+    for label, fn in variants:
+        try:
+            n, nbytes = fn()
+        except OSError as e:  # e.g. no ffmpeg binary
+            print(f"{label:<18} unavailable ({e})")
+            continue
+        elapsed = _best_of(fn, args.repeat)
+        print(f"{label:<18} {n / elapsed:>10.1f} {nbytes / max(n, 1) / 2**20:>9.2f}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("detector", help="frames/s vs. batch size on CPUExecutionProvider")
+    p.add_argument("--video", default="tests/data/sample.mp4")
+    p.add_argument("--model", default=None, help="ONNX weights (default: $YOLO_MODEL_PATH)")
+    p.add_argument("--frames", type=int, default=64)
+    p.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(func=bench_detector)
+
+    p = sub.add_parser("nms", help="vectorized NMS vs. the previous while-loop")
+    p.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    p.add_argument("--iou", type=float, default=0.45)
+    p.add_argument("--top-k", type=int, default=1000)
+    p.add_argument("--repeat", type=int, default=5)
+    p.set_defaults(func=bench_nms)
+
+    p = sub.add_parser("quantization", help="INT8 vs FP32 detections and frames/s")
+    p.add_argument("--video", default="tests/data/sample.mp4")
+    p.add_argument("--model", default=None, help="FP32 ONNX weights; <stem>.int8.onnx must exist")
+    p.add_argument("--frames", type=int, default=200)
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(func=bench_quantization)
+
+    p = sub.add_parser("scheduler", help="detect-every-N + tracking vs. full-rate detection")
+    p.add_argument("--video", default="tests/data/sample.mp4")
+    p.add_argument("--model", default=None)
+    p.add_argument("--frames", type=int, default=600)
+    p.add_argument("--intervals", type=int, nargs="+", default=[2, 4, 8])
+    p.set_defaults(func=bench_scheduler)
+
+    p = sub.add_parser("ocr", help="OCR calls/s: pytesseract per region vs. batched vs. tesserocr")
+    p.add_argument("--regions", type=int, default=4, help="Regions per frame")
+    p.add_argument("--calls", type=int, default=20, help="Frames per timing run")
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(func=bench_ocr)
+
+    p = sub.add_parser("aggregate", help="Frame construction throughput: pydantic models vs. columnar add_frame")
+    p.add_argument("--frames", type=int, default=2000)
+    p.add_argument("--detections", type=int, default=12, help="Detections per frame")
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(func=bench_aggregate)
+
+    p = sub.add_parser("decode", help="frames/s and bytes/frame: full-resolution vs. analysis-size decode")
+    p.add_argument("--video", default="tests/data/sample.mp4")
+    p.add_argument("--frames", type=int, default=300)
+    p.add_argument("--sizes", type=int, nargs="+", default=[640])
+    p.add_argument("--backends", nargs="+", choices=["ffmpeg", "opencv"], default=["ffmpeg", "opencv"])
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(func=bench_decode)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -2,34 +2,34 @@
 calibrate_frames.py
 
 Check and adjust frame timestamps to ensure correct FPS alignment.
+
+Timestamps come from the video's cached frame index (``ingest.frame_index``),
+so only the first run on a file has to read it.
 """
 
 from __future__ import annotations
-import argparse, cv2, sys
-from statistics import mean, stdev
+import argparse, os, sys
+import numpy as np
+from ingest.frame_index import FrameIndex
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--video", required=True)
+    parser.add_argument("--reindex", action="store_true", help="Rebuild the cached frame index")
     args = parser.parse_args()
 
-    cap = cv2.VideoCapture(args.video)
-    if not cap.isOpened():
+    if not os.path.exists(args.video):
         print("Cannot open video")
         sys.exit(1)
+    index = FrameIndex.load_or_build(args.video, rebuild=args.reindex)
 
-    timestamps=[]
-    while True:
-        ret, _ = cap.read()
-        if not ret:
-            break
-        timestamps.append(cap.get(cv2.CAP_PROP_POS_MSEC))
-    cap.release()
-
-    diffs=[j-i for i,j in zip(timestamps[:-1],timestamps[1:])]
-    avg=mean(diffs)
-    sd=stdev(diffs) if len(diffs)>1 else 0
-    target=1000/cap.get(cv2.CAP_PROP_FPS)
+    diffs=np.diff(index.timestamps)
+    if diffs.size == 0:
+        print("Not enough frames to check timing")
+        sys.exit(1)
+    avg=float(diffs.mean())
+    sd=float(diffs.std(ddof=1)) if diffs.size>1 else 0
+    target=1000/index.fps
 
     print(f"Average frame interval: {avg:.2f} ms (target {target:.2f} ms)")
     print(f"Std dev: {sd:.2f} ms")
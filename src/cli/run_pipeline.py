@@ -1,32 +1,223 @@
 """
 run_pipeline.py
 
-Execute full pipeline: ingest video -> detection, pose, ocr -> aggregate -> export JSON.
+Execute full pipeline: ingest video -> detection, pose, ocr -> aggregate -> export JSON Lines.
+
+Decode, detection and pose run as separate pipelined stages (worker
+threads joined by bounded queues) so the heavy native libraries overlap
+instead of running back-to-back.  Frames reach the aggregator in order.
+OCR runs beside the pipeline at a fixed rate (``ocr.worker.OCRWorker``);
+each frame carries the latest reading.  Frames are streamed to
+``<stem>_frames.jsonl[.gz|.zst]`` as they are aggregated.  With
+``--window`` only recent frames stay in memory; older ones are spilled to
+``<out>/<stem>_segments`` so live sessions run with flat memory.
+
+With ``--workers N`` a file is instead split into keyframe-aligned segments
+decoded and analysed by N processes (``ingest.segmented_reader``); each
+segment warms trackers and pose up on ``--overlap`` frames before its range,
+track ids are stitched across segments, and frames are aggregated in
+global order.
+
+With ``--analysis-size N`` detection and pose run on frames whose longer
+side is N px, decoded at that size by ffmpeg (``ingest.scaled_reader``);
+boxes and keypoints are mapped back to source coordinates before they are
+aggregated, and OCR fetches full-resolution frames only for its samples.
 
 Example:
-    python -m cli.run_pipeline --video input.mp4 --out data/outputs
+    python -m cli.run_pipeline --video input.mp4 --out data/outputs --detect-workers 2
+    python -m cli.run_pipeline --video game.mp4 --out data/outputs --workers 8 --detect-every 4
+    python -m cli.run_pipeline --video game_4k.mp4 --out data/outputs --analysis-size 640
 """
 from __future__ import annotations
-import argparse, os, cv2, sys, json
+import argparse, copy, functools, os, cv2, sys, json
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
 from datetime import datetime
+from typing import Any, Dict, List, Optional
+import numpy as np
 from tqdm import tqdm
 
 # Lazy imports to avoid heavy deps if modules missing
 try:
     from detection.yolo_detector import YOLODetector
+    from detection.scheduler import DetectionScheduler
+    from detection.tracker import SORTTracker, TrackStitcher
     from pose.pose_estimator import PoseEstimator
-    from ocr.ocr_service import recognize_regions
+    from pose.swing_analysis import SwingAnalyzer, select_batter
+    from ocr.worker import OCRWorker
+    from ocr.layout import LayoutRegistry
+    from ocr.parsers import parse_inning
     from integration.aggregator import StreamAggregator
-    from integration.exporter import export_json
+    from integration.exporter import JSONLinesWriter, ParquetExporter, export_json_stores
+    from common.pipeline import PipelineEngine, Stage
+    from ingest.segmented_reader import Segment, SegmentedReader
+    from ingest.scaled_reader import FrameScale, ScaledReader, fit_size
 except ImportError as e:
     print("❌ Required modules missing:", e)
     sys.exit(1)
 
+@dataclass
+class FrameTask:
+    """Per-frame work item passed between pipeline stages."""
+    frame_id: int
+    frame: np.ndarray
+    timestamp: datetime
+    detections: List[Dict[str, Any]] = field(default_factory=list)
+    keypoints: Optional[np.ndarray] = None  # packed (33, 4) pose, see pose.keypoints
+    ocr: Dict[str, str] = field(default_factory=dict)
+
+def _decode(cap: cv2.VideoCapture):
+    frame_id = 0
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        yield FrameTask(frame_id, frame, datetime.utcnow())
+        frame_id += 1
+
+def _decode_scaled(reader: ScaledReader):
+    for frame_id, frame in reader:
+        yield FrameTask(frame_id, frame, datetime.utcnow())
+
+def _to_source(task: FrameTask, scale: FrameScale) -> FrameTask:
+    """Map detections and keypoints computed on analysis-size frames to source pixels."""
+    scale.boxes_to_source(task.detections)
+    task.keypoints = scale.keypoints_to_source(task.keypoints)
+    return task
+
+def build_stages(args) -> List[Stage]:
+    detector = YOLODetector.from_config()  # ONNX Runtime sessions are safe to share between threads
+
+    def detect_factory():
+        if args.detect_every > 1:
+            scheduler = DetectionScheduler(detector, SORTTracker(), interval=args.detect_every,
+                                           max_interval=max(16, args.detect_every))
+            def detect_scheduled(task: FrameTask) -> FrameTask:
+                task.detections = scheduler.step(task.frame)
+                return task
+            return detect_scheduled
+
+        def detect(task: FrameTask) -> FrameTask:
+            task.detections = detector.predict(task.frame)
+            return task
+
+        def detect_batch(tasks: List[FrameTask]) -> List[FrameTask]:
+            for task, dets in zip(tasks, detector.predict_batch([t.frame for t in tasks])):
+                task.detections = dets
+            return tasks
+        return detect_batch if args.detect_batch > 1 else detect
+
+    def pose_factory():
+        # MediaPipe graphs are not thread-safe: one estimator per worker.  With
+        # several workers frames interleave, so cross-frame tracking is disabled.
+        pose_est = PoseEstimator(static_image_mode=args.pose_workers > 1)
+        def pose(task: FrameTask) -> FrameTask:
+            task.keypoints = pose_est.infer_array(task.frame)
+            return task
+
+        # crops mode: pose per detected player; the batter's pose is aggregated
+        batter_id: List[Optional[int]] = [None]
+        def pose_crops(task: FrameTask) -> FrameTask:
+            persons = pose_est.infer_crops(task.frame, task.detections)
+            batter = select_batter(persons, task.detections, batter_id[0])
+            if batter is not None:
+                batter_id[0] = batter.track_id
+                task.keypoints = batter.keypoints
+            return task
+        return pose_crops if args.pose_mode == "crops" else pose
+
+    return [
+        # the detect-every-N scheduler carries tracker state and must see frames in order
+        Stage("detect", detect_factory,
+              workers=1 if args.detect_every > 1 else args.detect_workers,
+              batch_size=1 if args.detect_every > 1 else args.detect_batch),
+        Stage("pose", pose_factory, workers=args.pose_workers),
+    ]
+
+class SegmentProcessor:
+    """Detection → pose → OCR on one segment, sequentially, inside a segment worker process."""
+
+    def __init__(self, args, segment: Segment):
+        args = copy.copy(args)
+        args.detect_workers = args.pose_workers = 1  # one frame at a time: keep pose tracking on
+        self._steps = [(stage.factory(), stage.batch_size > 1) for stage in build_stages(args)]
+        regions = LayoutRegistry.from_config().provider(args.layout)
+        self._ocr = OCRWorker(regions, rate_hz=args.ocr_rate, fps=args.fps, workers=args.ocr_workers).start()
+        self._analysis_size = args.analysis_size
+        self._scale: Optional[FrameScale] = None
+
+    def __call__(self, frame_id: int, frame: np.ndarray) -> FrameTask:
+        if self._analysis_size and self._scale is None:
+            h, w = frame.shape[:2]
+            self._scale = FrameScale((w, h), fit_size(w, h, self._analysis_size))
+        # segments decode with OpenCV: downscale here, OCR still sees the full frame
+        task = FrameTask(frame_id, self._scale.resize(frame) if self._scale else frame, datetime.utcnow())
+        for fn, batched in self._steps:
+            task = fn([task])[0] if batched else fn(task)
+        if self._scale is not None:
+            _to_source(task, self._scale)
+        self._ocr.submit(frame_id, frame)
+        task.ocr = self._ocr.latest()
+        task.frame = None  # only results go back to the parent process
+        return task
+
+    def close(self):
+        self._ocr.stop()
+
+def run_segmented(args, consume) -> None:
+    """Process the file in parallel segments; *consume* gets the frames in global order."""
+    reader = SegmentedReader(args.video, workers=args.workers, overlap=args.overlap)
+    stitcher = TrackStitcher()
+    previous = None
+    for seg in reader.map_segments(functools.partial(SegmentProcessor, args)):
+        stitcher.start_segment(previous, seg.handoff.detections if seg.handoff is not None else None)
+        for _, task in seg.results:
+            stitcher.remap(task.detections)
+            consume(task)
+            previous = task.detections
+
+def _positive_int(value: str) -> int:
+    n = int(value)
+    if n < 1:
+        raise argparse.ArgumentTypeError(f"must be >= 1, got {n}")
+    return n
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--video", required=True, help="Path to input video")
     parser.add_argument("--out", required=True, help="Output directory")
+    parser.add_argument("--detect-workers", type=_positive_int, default=1, help="Detector worker threads")
+    parser.add_argument("--detect-batch", type=_positive_int, default=1, help="Max frames per detector session.run")
+    parser.add_argument("--detect-every", type=int, default=1,
+                        help="Run the detector every N frames (adaptive) and propagate tracks in between")
+    parser.add_argument("--pose-workers", type=_positive_int, default=1, help="Pose worker threads")
+    parser.add_argument("--pose-mode", choices=["frame", "crops"], default="frame",
+                        help="Pose on the full frame, or per detected player crop")
+    parser.add_argument("--ocr-workers", type=_positive_int, default=1, help="OCR worker threads")
+    parser.add_argument("--ocr-rate", type=float, default=2.0,
+                        help="OCR samples per second of video (plus one per scene change)")
+    parser.add_argument("--layout", default=None,
+                        help="OCR overlay layout from configs/ocr_layouts.yaml, or 'auto' to localize")
+    parser.add_argument("--compression", choices=["none", "gzip", "zstd"], default="gzip",
+                        help="Compression of the streamed <stem>_frames.jsonl output")
+    parser.add_argument("--parquet", default=None, metavar="DIR",
+                        help="Also write detection / pose / OCR tables to Parquet under DIR (game=<stem>/"
+                             "inning=<n>, n read from the OCR'd scoreboard; 0 until one is read). "
+                             "A previous export of the same game is replaced")
+    parser.add_argument("--export-json", action="store_true",
+                        help="Also write the whole game as one <stem>_frames.json array at the end")
+    parser.add_argument("--window", type=int, default=0,
+                        help="Frames kept in memory; older frames are spilled to <out>/<stem>_segments (0 = keep all)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Decode and analyse the file in N parallel segments (processes)")
+    parser.add_argument("--overlap", type=int, default=30,
+                        help="Warm-up frames before each segment to seed tracker / pose state (--workers)")
+    parser.add_argument("--analysis-size", type=int, default=0, metavar="N",
+                        help="Run detection and pose on frames decoded with their longer side at N px; "
+                             "OCR fetches full-resolution frames on demand (0 = full resolution)")
+    parser.add_argument("--decoder", choices=["auto", "ffmpeg", "opencv"], default="auto",
+                        help="Decoder for --analysis-size: ffmpeg scales during decode, opencv resizes after")
+    parser.add_argument("--queue-size", type=int, default=32, help="Bounded queue size between stages")
     args = parser.parse_args()
 
     Path(args.out).mkdir(parents=True, exist_ok=True)
@@ -36,27 +227,78 @@ def main():
         print("Cannot open video:", args.video)
         sys.exit(1)
 
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    detector = YOLODetector()
-    pose_est = PoseEstimator()
-    aggregator = StreamAggregator()
+    fps = args.fps = cap.get(cv2.CAP_PROP_FPS)
+    stem = Path(args.video).stem
+    aggregator = StreamAggregator(window=args.window or None,
+                                  spill=os.path.join(args.out, f"{stem}_segments") if args.window else None)
+    swings = SwingAnalyzer(fps=int(round(fps)) or 30)  # streaming, independent of the aggregator window
+    swing_events = []
+    parquet_every = min(1000, args.window // 2) if args.window else 1000
 
-    frame_id = 0
-    with tqdm(total=int(cap.get(cv2.CAP_PROP_FRAME_COUNT))) as pbar:
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            detections = detector.predict(frame)
-            keypoints = [kp.__dict__ for kp in pose_est.infer(frame)]
-            ocr_res = recognize_regions(frame, {})  # empty regions (placeholder)
-            aggregator.add_frame(frame_id, detections, keypoints, ocr_res, datetime.utcnow())
-            frame_id += 1
+    suffix = {"none": "", "gzip": ".gz", "zstd": ".zst"}[args.compression]
+    outfile = os.path.join(args.out, f"{stem}_frames.jsonl{suffix}")
+    writer = JSONLinesWriter(outfile, compression=None if args.compression == "none" else args.compression)
+    parquet = ParquetExporter(args.parquet, game_id=stem) if args.parquet else None
+    inning = [0]  # from the OCR'd scoreboard; Parquet rows are partitioned by it (0 = not read yet)
+
+    with writer, tqdm(total=int(cap.get(cv2.CAP_PROP_FRAME_COUNT))) as pbar:
+        def consume(task: FrameTask):
+            read = parse_inning(task.ocr.get("inning") or task.ocr.get("scoreboard") or "")
+            if read is not None and read != inning[0]:
+                if parquet is not None:
+                    parquet.append(aggregator.store, inning=inning[0])  # close out the previous inning
+                inning[0] = read
+            aggregator.add_frame(task.frame_id, task.detections, task.keypoints, task.ocr, task.timestamp,
+                                 sanitize=True)
+            writer.write(aggregator.store.record(len(aggregator.store) - 1))
+            if parquet is not None and parquet.pending(aggregator.store) >= parquet_every:
+                parquet.append(aggregator.store, inning=inning[0])  # one row group per 1000 frames, before they are spilled
+            event = swings.update(task.keypoints, task.frame_id)  # emitted as soon as the swing ends
+            if event is not None:
+                swing_events.append(event)
             pbar.update(1)
 
-    cap.release()
-    outfile = os.path.join(args.out, f"{Path(args.video).stem}_frames.json")
-    export_json(aggregator.frames, outfile)
+        def sink(task: FrameTask):
+            ocr_worker.submit(task.frame_id, task.frame)
+            task.ocr = ocr_worker.latest()
+            task.frame = None  # release the decoded image as soon as it is aggregated
+            if reader is not None:
+                _to_source(task, reader.scale)
+            consume(task)
+
+        ocr_worker = reader = None
+        try:
+            if args.workers > 1:
+                cap.release()
+                run_segmented(args, consume)
+            else:
+                if args.analysis_size:
+                    cap.release()
+                    reader = ScaledReader(args.video, max_side=args.analysis_size, backend=args.decoder)
+                    print(f"Decoding at {reader.size[0]}x{reader.size[1]} ({reader.backend})")
+                regions = LayoutRegistry.from_config().provider(args.layout)
+                ocr_worker = OCRWorker(regions, rate_hz=args.ocr_rate, fps=fps, workers=args.ocr_workers,
+                                       frame_source=reader.full_frame if reader is not None else None).start()
+                source = _decode_scaled(reader) if reader is not None else _decode(cap)
+                PipelineEngine(source, build_stages(args), sink, queue_size=args.queue_size).run()
+        finally:
+            cap.release()
+            if ocr_worker is not None:
+                ocr_worker.stop()
+            if reader is not None:
+                reader.close()
+            if parquet is not None:
+                parquet.append(aggregator.store, inning=inning[0])
+                parquet.close()
+    swing_events += swings.flush()
+    if ocr_worker is not None:
+        print("OCR:", ocr_worker.stats())
+
+    if args.export_json:
+        # streamed segment by segment, so --window keeps its memory bound here too
+        export_json_stores(aggregator.history_stores(), os.path.join(args.out, f"{stem}_frames.json"))
+    with open(os.path.join(args.out, f"{stem}_swings.json"), "w", encoding="utf-8") as f:
+        json.dump([asdict(e) for e in swing_events], f, indent=2)
     print("✅ Pipeline finished, results saved to", outfile)
 
 if __name__ == "__main__":
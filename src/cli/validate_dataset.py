@@ -2,10 +2,16 @@
 validate_dataset.py
 
 Validate dataset: HDR format, fps range, annotation consistency.
+
+With ``--index`` every video's frame index (``ingest.frame_index``) is
+built or refreshed, so later frame lookups seek instead of decoding from
+frame 0, and non-monotonic timestamps are reported.
 """
 
 from __future__ import annotations
 import argparse, cv2, json, os, sys
+import numpy as np
+from ingest.frame_index import FrameIndex
 
 def is_hdr(frame):
     return frame.dtype== "uint16" or frame.max()>255
@@ -14,6 +20,7 @@ def main():
     parser=argparse.ArgumentParser()
     parser.add_argument("--videos_dir", required=True)
     parser.add_argument("--annotations", help="JSON annotations to validate")
+    parser.add_argument("--index", action="store_true", help="Build / refresh the frame index of every video")
     args=parser.parse_args()
 
     issues=[]
@@ -31,6 +38,10 @@ def main():
         if hdr:
             issues.append(f"{fn}: HDR detected")
         cap.release()
+        if args.index:
+            index=FrameIndex.load_or_build(path)
+            if np.any(np.diff(index.timestamps)<=0):
+                issues.append(f"{fn}: non-monotonic frame timestamps")
 
     if args.annotations and os.path.exists(args.annotations):
         with open(args.annotations) as f:
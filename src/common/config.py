@@ -0,0 +1,26 @@
+"""
+Configuration helpers: load YAML files from the ``configs/`` directory.
+"""
+
+from __future__ import annotations
+import os
+from pathlib import Path
+from typing import Any, Dict, Union
+
+import yaml
+
+CONFIG_DIR = Path(os.getenv("CONFIG_DIR", Path(__file__).resolve().parents[2] / "configs"))
+
+def load_config(name: Union[str, Path]) -> Dict[str, Any]:
+    """
+    Load a YAML config by short name (``"yolo"`` → ``configs/yolo.yaml``) or path.
+
+    Missing files yield an empty dict so callers can fall back to defaults.
+    """
+    path = Path(name)
+    if path.suffix not in (".yaml", ".yml"):
+        path = CONFIG_DIR / f"{name}.yaml"
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
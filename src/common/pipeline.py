@@ -0,0 +1,200 @@
+"""
+Multi-stage pipelined execution: worker threads joined by bounded queues.
+
+Each stage owns one or more worker threads that pull items from the
+previous stage's queue, process them and push them downstream.  Items are
+tagged with a sequence number at the source and re-ordered in front of the
+sink, so the sink always observes them in source order regardless of how
+many workers a stage uses.
+
+Example
+-------
+>>> engine = PipelineEngine(range(100),
+...                         [Stage("square", lambda: lambda x: x * x, workers=4)],
+...                         sink=print)
+>>> engine.run()
+"""
+
+from __future__ import annotations
+import heapq
+import logging
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_SENTINEL = object()
+
+
+@dataclass
+class Stage:
+    """One pipeline stage.
+
+    Parameters
+    ----------
+    name : stage name used for thread names and logging
+    factory : called once per worker thread; returns the callable that
+              processes a single item.  Building per-worker callables lets
+              stateful or non thread-safe models (e.g. MediaPipe) get one
+              instance per thread.
+    workers : number of worker threads for this stage
+    batch_size : when > 1 the worker callable receives a list of up to
+                 *batch_size* items (whatever is already queued, never
+                 waiting for a full batch) and must return a list of the
+                 same length
+    """
+    name: str
+    factory: Callable[[], Callable[[Any], Any]]
+    workers: int = 1
+    batch_size: int = 1
+
+    def __post_init__(self):
+        # with no worker the feeder would block on the stage's full queue forever
+        if self.workers < 1:
+            raise ValueError(f"stage {self.name!r}: workers must be >= 1, got {self.workers}")
+        if self.batch_size < 1:
+            raise ValueError(f"stage {self.name!r}: batch_size must be >= 1, got {self.batch_size}")
+
+
+class PipelineEngine:
+    """Run *source* items through *stages* and hand results to *sink* in order."""
+
+    def __init__(self,
+                 source: Iterable[Any],
+                 stages: List[Stage],
+                 sink: Callable[[Any], None],
+                 queue_size: int = 32):
+        if not stages:
+            raise ValueError("at least one stage is required")
+        self.source = source
+        self.stages = stages
+        self.sink = sink
+        self.queue_size = queue_size
+
+        self._queues = [queue.Queue(maxsize=queue_size) for _ in range(len(stages) + 1)]
+        self._stopped = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._lock = threading.Lock()
+        self._remaining = [s.workers for s in stages]
+
+    # ---------------- Private helpers -----------------
+    def _put(self, q: queue.Queue, item) -> bool:
+        """Bounded put that gives up once the pipeline is stopped."""
+        while not self._stopped.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue):
+        while not self._stopped.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _SENTINEL
+
+    def _fail(self, exc: BaseException):
+        with self._lock:
+            if self._error is None:
+                self._error = exc
+        self._stopped.set()
+
+    def _feed(self):
+        try:
+            for seq, item in enumerate(self.source):
+                if not self._put(self._queues[0], (seq, item)):
+                    return
+        except BaseException as e:  # propagate decode errors to run()
+            logger.exception("Pipeline source failed")
+            self._fail(e)
+            return
+        for _ in range(self.stages[0].workers):
+            self._put(self._queues[0], _SENTINEL)
+
+    def _work(self, idx: int):
+        stage = self.stages[idx]
+        in_q, out_q = self._queues[idx], self._queues[idx + 1]
+        try:
+            fn = stage.factory()
+            done = False
+            while not done:
+                packet = self._get(in_q)
+                if packet is _SENTINEL:
+                    break
+                if stage.batch_size <= 1:
+                    seq, item = packet
+                    if not self._put(out_q, (seq, fn(item))):
+                        break
+                    continue
+                packets = [packet]
+                while len(packets) < stage.batch_size:
+                    try:
+                        packet = in_q.get_nowait()
+                    except queue.Empty:
+                        break
+                    if packet is _SENTINEL:
+                        done = True
+                        break
+                    packets.append(packet)
+                results = fn([item for _, item in packets])
+                for (seq, _), res in zip(packets, results):
+                    if not self._put(out_q, (seq, res)):
+                        done = True
+                        break
+        except BaseException as e:
+            logger.exception("Pipeline stage %s failed", stage.name)
+            self._fail(e)
+            return
+        # last worker of this stage closes the next queue
+        with self._lock:
+            self._remaining[idx] -= 1
+            last = self._remaining[idx] == 0
+        if last:
+            n_next = self.stages[idx + 1].workers if idx + 1 < len(self.stages) else 1
+            for _ in range(n_next):
+                self._put(out_q, _SENTINEL)
+
+    def _drain(self) -> int:
+        """Re-order stage output by sequence number and call the sink."""
+        pending: list = []
+        next_seq = 0
+        out_q = self._queues[-1]
+        while True:
+            packet = self._get(out_q)
+            if packet is _SENTINEL:
+                break
+            heapq.heappush(pending, packet)
+            while pending and pending[0][0] == next_seq:
+                _, item = heapq.heappop(pending)
+                self.sink(item)
+                next_seq += 1
+        return next_seq
+
+    # ---------------- Public API -----------------
+    def run(self) -> int:
+        """Execute the pipeline to completion and return the number of items sunk."""
+        threads = [threading.Thread(target=self._feed, name="pipeline-source", daemon=True)]
+        for idx, stage in enumerate(self.stages):
+            for w in range(stage.workers):
+                threads.append(threading.Thread(target=self._work, args=(idx,),
+                                                name=f"pipeline-{stage.name}-{w}", daemon=True))
+        for t in threads:
+            t.start()
+        try:
+            count = self._drain()
+        except BaseException as e:
+            self._fail(e)
+            count = -1
+        finally:
+            self._stopped.set()
+            for t in threads:
+                t.join(timeout=5)
+        if self._error is not None:
+            raise self._error
+        logger.info("Pipeline processed %d items", count)
+        return count
@@ -0,0 +1,66 @@
+"""
+pairs.py
+
+Batched geometry over detection columns: same-frame pairing of detections
+and element-wise IoU, with no per-frame Python loop.  Used by per-frame
+helpers in ``detection.postprocess`` and by the whole-game rules in
+``integration.events``.
+
+Example
+-------
+>>> balls, bats, iou = contact_pairs(store.det_frame_index, store.det_class_id, store.det_bbox)
+"""
+
+from __future__ import annotations
+from typing import Tuple
+
+import numpy as np
+
+BALL, BAT, PLAYER = 0, 1, 2
+
+# ---------------- batched geometry ----------------
+def same_frame_pairs(frame_index: np.ndarray,
+                     rows_a: np.ndarray,
+                     rows_b: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """All (a, b) row pairs of detections that share a frame.
+
+    *rows_a* / *rows_b* index detections whose ``frame_index`` is
+    non-decreasing (store order).  Pairs are expanded with ``searchsorted`` /
+    ``repeat`` instead of a per-frame loop.
+    """
+    fa, fb = frame_index[rows_a], frame_index[rows_b]
+    start = np.searchsorted(fb, fa, side="left")
+    counts = np.searchsorted(fb, fa, side="right") - start
+    total = int(counts.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    first = np.repeat(np.cumsum(counts) - counts, counts)
+    b_pos = np.arange(total) - first + np.repeat(start, counts)
+    return np.repeat(rows_a, counts), rows_b[b_pos]
+
+def paired_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Element-wise IoU of box pairs (K, 4) × (K, 4) → (K,)."""
+    lt = np.maximum(a[:, :2], b[:, :2])
+    rb = np.minimum(a[:, 2:], b[:, 2:])
+    wh = np.clip(rb - lt, 0, None)
+    inter = wh[:, 0] * wh[:, 1]
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / (area_a + area_b - inter + 1e-6)
+
+def box_centers(boxes: np.ndarray) -> np.ndarray:
+    return np.stack([(boxes[:, 0] + boxes[:, 2]) / 2, (boxes[:, 1] + boxes[:, 3]) / 2], axis=1)
+
+def contact_pairs(frame_index: np.ndarray,
+                  class_id: np.ndarray,
+                  bbox: np.ndarray,
+                  iou_threshold: float = 0.2,
+                  ball_class: int = BALL,
+                  bat_class: int = BAT) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(ball rows, bat rows, iou) of same-frame ball–bat pairs with IoU > *iou_threshold*."""
+    balls = np.flatnonzero(class_id == ball_class)
+    bats = np.flatnonzero(class_id == bat_class)
+    a, b = same_frame_pairs(frame_index, balls, bats)
+    iou = paired_iou(bbox[a], bbox[b])
+    ok = iou > iou_threshold
+    return a[ok], b[ok], iou[ok]
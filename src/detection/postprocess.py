@@ -9,29 +9,27 @@ Extra postprocessing utilities:
 from __future__ import annotations
 import numpy as np
 from typing import List, Dict, Any
+from .nms import batched_nms
+from .pairs import contact_pairs
 
 # ------------- NMS helper --------------
 def nms_boxes(dets: List[Dict[str, Any]],
-              iou_threshold: float = 0.5) -> List[Dict[str, Any]]:
+              iou_threshold: float = 0.5,
+              agnostic: bool = False,
+              method: str = "hard",
+              top_k: int | None = None) -> List[Dict[str, Any]]:
+    """NMS over detection dicts; boxes only suppress boxes of the same class
+    unless *agnostic*.  Soft-NMS methods return copies with decayed confidence."""
     if not dets:
         return []
-    boxes = np.array([d["bbox"] for d in dets])
-    scores = np.array([d["confidence"] for d in dets])
-    idxs = scores.argsort()[::-1]
-    keep_idx = []
-    while idxs.size > 0:
-        i = idxs[0]
-        keep_idx.append(i)
-        xx1 = np.maximum(boxes[i, 0], boxes[idxs[1:], 0])
-        yy1 = np.maximum(boxes[i, 1], boxes[idxs[1:], 1])
-        xx2 = np.minimum(boxes[i, 2], boxes[idxs[1:], 2])
-        yy2 = np.minimum(boxes[i, 3], boxes[idxs[1:], 3])
-        inter = np.maximum(0, xx2 - xx1) * np.maximum(0, yy2 - yy1)
-        iou = inter / ((boxes[i, 2]-boxes[i, 0]) * (boxes[i, 3]-boxes[i, 1]) +
-                       (boxes[idxs[1:], 2]-boxes[idxs[1:], 0]) * (boxes[idxs[1:], 3]-boxes[idxs[1:], 1]) -
-                       inter + 1e-6)
-        idxs = idxs[1:][iou < iou_threshold]
-    return [dets[i] for i in keep_idx]
+    boxes = np.array([d["bbox"] for d in dets], dtype=np.float32)
+    scores = np.array([d["confidence"] for d in dets], dtype=np.float32)
+    classes = np.array([d.get("class_id", 0) for d in dets])
+    keep, kept_scores = batched_nms(boxes, scores, classes, iou_threshold,
+                                    top_k=top_k, agnostic=agnostic, method=method)
+    if method == "hard":
+        return [dets[i] for i in keep]
+    return [{**dets[i], "confidence": float(s)} for i, s in zip(keep, kept_scores)]
 
 # --------- Event tagging example -------
 def tag_events(dets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -42,27 +40,14 @@ def tag_events(dets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     class_id 1: bat
     class_id 2: player
     If ball and bat overlap IoU > 0.2 → 'contact'
+
+    Single-frame helper; whole-game extraction with merged multi-frame
+    events is ``integration.events.EventEngine``.
     """
-    # find indices of ball & bat
-    balls = [d for d in dets if d.get("class_id") == 0]
-    bats = [d for d in dets if d.get("class_id") == 1]
-    events = []
-    for ball in balls:
-        bx1, by1, bx2, by2 = ball["bbox"]
-        for bat in bats:
-            x1 = max(bx1, bat["bbox"][0])
-            y1 = max(by1, bat["bbox"][1])
-            x2 = min(bx2, bat["bbox"][2])
-            y2 = min(by2, bat["bbox"][3])
-            inter = max(0, x2 - x1) * max(0, y2 - y1)
-            area_ball = (bx2 - bx1) * (by2 - by1)
-            area_bat = (bat["bbox"][2] - bat["bbox"][0]) * (bat["bbox"][3] - bat["bbox"][1])
-            iou = inter / (area_ball + area_bat - inter + 1e-6)
-            if iou > 0.2:
-                events.append({
-                    "type": "contact",
-                    "ball": ball,
-                    "bat": bat,
-                    "iou": iou
-                })
-    return events
+    if not dets:
+        return []
+    boxes = np.array([d["bbox"] for d in dets], dtype=np.float32).reshape(-1, 4)
+    classes = np.array([d.get("class_id", -1) for d in dets])
+    balls, bats, ious = contact_pairs(np.zeros(len(dets), dtype=np.int64), classes, boxes, 0.2)
+    return [{"type": "contact", "ball": dets[a], "bat": dets[b], "iou": float(iou)}
+            for a, b, iou in zip(balls, bats, ious)]
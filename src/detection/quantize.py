@@ -0,0 +1,168 @@
+"""
+quantize.py
+
+Static INT8 quantization of the YOLOv8 ONNX detector.
+
+Calibration frames are sampled evenly from our own footage (``data/raw`` by
+default) and letterboxed exactly like :class:`YOLODetector` does at
+inference time, so activation ranges match what the deployed model sees.
+The result is written next to the FP32 weights as ``<stem>.int8.onnx`` and
+loaded with ``YOLODetector(..., quantized=True)``.
+
+Example:
+    python -m detection.quantize --model data/models/yolo/yolov8.onnx --videos data/raw --frames 256
+
+Requirements
+------------
+onnxruntime >= 1.16 (``onnxruntime.quantization``)
+"""
+
+from __future__ import annotations
+import argparse
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import cv2
+import numpy as np
+import onnx
+import onnxruntime as ort
+from onnxruntime.quantization import (CalibrationDataReader, CalibrationMethod, QuantFormat,
+                                      QuantType, quantize_static)
+
+from .yolo_detector import letterbox_into, quantized_path
+
+logger = logging.getLogger(__name__)
+
+VIDEO_EXTS = (".mp4", ".mov", ".mkv", ".avi")
+
+_CALIBRATION_METHODS = {
+    "minmax": CalibrationMethod.MinMax,
+    "entropy": CalibrationMethod.Entropy,
+    "percentile": CalibrationMethod.Percentile,
+}
+
+# ---------------- calibration data ----------------
+def sample_calibration_frames(video_dir: str = "data/raw",
+                              num_frames: int = 200,
+                              videos: Optional[Sequence[str]] = None) -> Iterator[np.ndarray]:
+    """Yield about *num_frames* BGR frames spread evenly over every video.
+
+    Frames are spread across the whole length of each file (not just the
+    opening seconds) so the calibration set covers innings, replays and
+    close-ups alike.
+    """
+    if videos is None:
+        videos = sorted(str(p) for p in Path(video_dir).iterdir() if p.suffix.lower() in VIDEO_EXTS)
+    if not videos:
+        raise FileNotFoundError(f"No calibration videos found in {video_dir}")
+    per_video = max(1, num_frames // len(videos))
+    for path in videos:
+        cap = cv2.VideoCapture(path)
+        if not cap.isOpened():
+            logger.warning("Skipping unreadable calibration video %s", path)
+            continue
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        targets = np.unique(np.linspace(0, max(total - 1, 0), per_video).astype(int))
+        for idx in targets:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, int(idx))
+            ret, frame = cap.read()
+            if ret:
+                yield frame
+        cap.release()
+
+class VideoCalibrationReader(CalibrationDataReader):
+    """Feeds letterboxed calibration frames to the ORT calibrator, one per batch."""
+
+    def __init__(self, frames: Sequence[np.ndarray], input_name: str, input_size: int = 640):
+        self.input_name = input_name
+        self.input_size = input_size
+        self._frames = list(frames)
+        self._iter = iter(self._frames)
+
+    def get_next(self) -> Optional[Dict[str, np.ndarray]]:
+        frame = next(self._iter, None)
+        if frame is None:
+            return None
+        img_in = np.empty((1, 3, self.input_size, self.input_size), dtype=np.float32)
+        letterbox_into(frame, img_in[0], self.input_size)
+        return {self.input_name: img_in}
+
+    def rewind(self):
+        self._iter = iter(self._frames)
+
+# ---------------- quantization ----------------
+def output_node_names(model_path: str) -> List[str]:
+    """Names of the nodes that produce graph outputs.
+
+    YOLOv8 concatenates pixel-space box coordinates and 0–1 class scores into
+    one output tensor; a single 8-bit scale over both ranges would flatten the
+    scores, so these nodes stay in FP32 by default.
+    """
+    model = onnx.load(model_path, load_external_data=False)
+    outputs = {o.name for o in model.graph.output}
+    return [n.name for n in model.graph.node if outputs.intersection(n.output) and n.name]
+
+def quantize_detector(model_path: str,
+                      output_path: Optional[str] = None,
+                      video_dir: str = "data/raw",
+                      num_frames: int = 200,
+                      input_size: int = 640,
+                      method: str = "minmax",
+                      per_channel: bool = True,
+                      nodes_to_exclude: Optional[List[str]] = None,
+                      keep_output_fp32: bool = True) -> str:
+    """Quantize *model_path* to static INT8 (QDQ format) and return the output path.
+
+    Parameters
+    ----------
+    method : calibration method, 'minmax' | 'entropy' | 'percentile'
+    per_channel : per-output-channel weight scales (better accuracy for conv nets)
+    nodes_to_exclude : extra node names kept in FP32, e.g. the box-decoding tail of the head
+    keep_output_fp32 : keep the nodes producing graph outputs in FP32 (see :func:`output_node_names`)
+    """
+    exclude = list(nodes_to_exclude or [])
+    if keep_output_fp32:
+        exclude += output_node_names(model_path)
+    output_path = output_path or quantized_path(model_path)
+    input_name = ort.InferenceSession(model_path, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+    frames = list(sample_calibration_frames(video_dir, num_frames))
+    if not frames:
+        raise RuntimeError(f"Could not decode any calibration frames from {video_dir}")
+    logger.info("Calibrating %s on %d frames from %s", model_path, len(frames), video_dir)
+
+    quantize_static(model_path,
+                    output_path,
+                    VideoCalibrationReader(frames, input_name, input_size),
+                    quant_format=QuantFormat.QDQ,
+                    activation_type=QuantType.QUInt8,
+                    weight_type=QuantType.QInt8,
+                    per_channel=per_channel,
+                    calibrate_method=_CALIBRATION_METHODS[method],
+                    nodes_to_exclude=exclude)
+    logger.info("Wrote INT8 detector to %s (%.1f MB → %.1f MB)", output_path,
+                os.path.getsize(model_path) / 2**20, os.path.getsize(output_path) / 2**20)
+    return output_path
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=os.getenv("YOLO_MODEL_PATH", "yolov8.onnx"), help="FP32 .onnx weights")
+    parser.add_argument("--out", default=None, help="Output path (default: <stem>.int8.onnx)")
+    parser.add_argument("--videos", default="data/raw", help="Directory of calibration videos")
+    parser.add_argument("--frames", type=int, default=200, help="Number of calibration frames")
+    parser.add_argument("--img-size", type=int, default=640)
+    parser.add_argument("--method", choices=sorted(_CALIBRATION_METHODS), default="minmax")
+    parser.add_argument("--per-tensor", action="store_true", help="Per-tensor instead of per-channel weights")
+    parser.add_argument("--exclude", nargs="*", default=None, help="Node names to keep in FP32")
+    parser.add_argument("--quantize-output", action="store_true",
+                        help="Also quantize the nodes producing graph outputs")
+    args = parser.parse_args()
+
+    out = quantize_detector(args.model, args.out, args.videos, args.frames, args.img_size,
+                            args.method, not args.per_tensor, args.exclude, not args.quantize_output)
+    print("✅ Quantized detector saved to", out)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(levelname)s %(name)s: %(message)s")
+    main()
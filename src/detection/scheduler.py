@@ -0,0 +1,113 @@
+"""
+scheduler.py
+
+Detect-every-N scheduling: run the full detector only on some frames and
+propagate boxes through :class:`SORTTracker` motion prediction in between.
+
+The detector is run when
+1. N frames have passed since the last detection,
+2. the frame changed abruptly (camera cut / pan), measured as the mean
+   absolute difference of a small grayscale thumbnail, or
+3. the mean propagated confidence of tracked objects decayed below a threshold.
+
+N adapts to track reliability: when predicted boxes agree with fresh
+detections (high IoU, most tracks matched) N grows by one, otherwise it is
+halved (additive increase / multiplicative decrease).
+"""
+
+from __future__ import annotations
+import cv2
+import numpy as np
+from typing import Any, Dict, List, Optional
+from .tracker import SORTTracker
+
+class DetectionScheduler:
+    def __init__(self,
+                 detector,
+                 tracker: Optional[SORTTracker] = None,
+                 interval: int = 4,
+                 min_interval: int = 1,
+                 max_interval: int = 16,
+                 adaptive: bool = True,
+                 conf_threshold: float = 0.3,
+                 conf_decay: float = 0.95,
+                 motion_threshold: float = 12.0,
+                 reliable_iou: float = 0.7,
+                 unreliable_iou: float = 0.45,
+                 thumb_size: tuple = (64, 36)):
+        """
+        Parameters
+        ----------
+        detector : object with ``predict(frame) -> List[dict]`` (e.g. YOLODetector)
+        interval : initial N (1 = detect every frame)
+        conf_decay : per-propagated-frame multiplier applied to track confidence
+        motion_threshold : mean abs gray-level change (0–255) that forces detection
+        reliable_iou / unreliable_iou : agreement levels that grow / shrink N
+        """
+        self.detector = detector
+        self.tracker = tracker or SORTTracker()
+        self.interval = max(interval, 1)
+        self.min_interval = max(min_interval, 1)
+        self.max_interval = max(max_interval, self.min_interval)
+        self.adaptive = adaptive
+        self.conf_threshold = conf_threshold
+        self.conf_decay = conf_decay
+        self.motion_threshold = motion_threshold
+        self.reliable_iou = reliable_iou
+        self.unreliable_iou = unreliable_iou
+        self.thumb_size = thumb_size
+
+        self._since_detect = 0
+        self._prev_thumb: Optional[np.ndarray] = None
+        self._last: List[Dict[str, Any]] = []
+        self.frames = 0
+        self.detector_calls = 0
+
+    # ---------------- Private helpers -----------------
+    def _motion(self, frame: np.ndarray) -> float:
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        thumb = cv2.resize(gray, self.thumb_size, interpolation=cv2.INTER_AREA).astype(np.int16)
+        prev, self._prev_thumb = self._prev_thumb, thumb
+        if prev is None:
+            return float("inf")
+        return float(np.abs(thumb - prev).mean())
+
+    def _should_detect(self, motion: float) -> bool:
+        if self._since_detect >= self.interval or motion > self.motion_threshold or not self._last:
+            return True
+        return float(np.mean([d["confidence"] for d in self._last])) < self.conf_threshold
+
+    def _adapt(self):
+        trk = self.tracker
+        if trk.last_mean_iou >= self.reliable_iou and trk.last_match_ratio >= 0.8:
+            self.interval = min(self.interval + 1, self.max_interval)
+        elif trk.last_mean_iou < self.unreliable_iou or trk.last_match_ratio < 0.5:
+            self.interval = max(self.interval // 2, self.min_interval)
+
+    # ---------------- Public API -----------------
+    @property
+    def detection_ratio(self) -> float:
+        """Fraction of frames on which the detector actually ran."""
+        return self.detector_calls / max(self.frames, 1)
+
+    def step(self, frame: np.ndarray) -> List[Dict[str, Any]]:
+        """Return detections (with ``track_id``) for the next frame of the stream."""
+        self.frames += 1
+        motion = self._motion(frame)
+        if self._should_detect(motion):
+            had_tracks = len(self.tracker) > 0
+            self.tracker.update(self.detector.predict(frame))
+            self.detector_calls += 1
+            self._since_detect = 1
+            if self.adaptive and had_tracks:
+                self._adapt()
+            # report only objects seen on this frame
+            out = [dict(t, propagated=False) for t in self.tracker.confirmed()]
+        else:
+            self._since_detect += 1
+            out = []
+            for t in self.tracker.propagate():
+                t["confidence"] = t["confidence"] * self.conf_decay ** (self._since_detect - 1)
+                out.append(dict(t, propagated=True))
+        self._last = out
+        return out
@@ -3,24 +3,32 @@ tracker.py
 
 Simple multi‑object tracking using Kalman Filter‑based SORT algorithm.
 
+Tracks carry a constant-velocity Kalman filter so boxes can be propagated
+through frames on which the detector is not run.  All per-track state is
+kept in stacked numpy arrays: prediction for every track is one batched
+matrix product, association is a single IoU cost matrix solved optimally
+(Hungarian algorithm), and the Kalman update runs on all matched tracks at
+once.
+
 Dependencies
 ------------
-filterpy (optional, falls back to simple centroid tracker if not installed)
+scipy (optional, for optimal assignment; falls back to greedy best-IoU matching)
 """
 
 from __future__ import annotations
 import numpy as np
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 import itertools
 import logging
+from .nms import box_iou
 
 logger = logging.getLogger(__name__)
 
 try:
-    from filterpy.kalman import KalmanFilter
+    from scipy.optimize import linear_sum_assignment
 except ImportError:
-    KalmanFilter = None
-    logger.warning("filterpy not found, falling back to centroid tracker")
+    linear_sum_assignment = None
+    logger.warning("scipy not found, falling back to greedy IoU assignment")
 
 # ---------------- SORT implementation ----------------
 def iou(bb_test, bb_gt):
@@ -35,60 +43,220 @@ def iou(bb_test, bb_gt):
               (bb_gt[2]-bb_gt[0])*(bb_gt[3]-bb_gt[1]) - wh + 1e-6)
     return o
 
-class Track:
-    _count = itertools.count()
-    def __init__(self, bbox):
-        self.id = next(self._count)
-        self.hits = 0
-        self.no_losses = 0
-        self.bbox = bbox  # last bbox
-    def update(self, bbox):
-        self.bbox = bbox
-        self.hits += 1
-        self.no_losses = 0
+def _bbox_to_z(bboxes: np.ndarray) -> np.ndarray:
+    """(N, 4) [x1, y1, x2, y2] → (N, 4) measurements [cx, cy, area, aspect]."""
+    w = np.maximum(bboxes[:, 2] - bboxes[:, 0], 1e-3)
+    h = np.maximum(bboxes[:, 3] - bboxes[:, 1], 1e-3)
+    return np.stack([bboxes[:, 0] + w / 2, bboxes[:, 1] + h / 2, w * h, w / h], axis=1)
+
+def _x_to_bbox(x: np.ndarray) -> np.ndarray:
+    """(N, 7) Kalman states → (N, 4) [x1, y1, x2, y2]."""
+    area = np.maximum(x[:, 2], 1e-6)
+    w = np.sqrt(area * np.maximum(x[:, 3], 1e-6))
+    h = area / w
+    return np.stack([x[:, 0] - w / 2, x[:, 1] - h / 2, x[:, 0] + w / 2, x[:, 1] + h / 2], axis=1)
+
+# Constant-velocity model on [cx, cy, area, aspect, vcx, vcy, varea]; the
+# aspect ratio is assumed constant.  Noise settings follow the original SORT.
+_F = np.eye(7)
+_F[0, 4] = _F[1, 5] = _F[2, 6] = 1.0
+_H = np.eye(4, 7)
+_Q = np.eye(7)
+_Q[-1, -1] *= 0.01
+_Q[4:, 4:] *= 0.01
+_R = np.eye(4)
+_R[2:, 2:] *= 10.0
+_P0 = np.eye(7) * 10.0
+_P0[4:, 4:] *= 1000.0  # high uncertainty for the unobserved velocities
+
+def _assign(iou_mat: np.ndarray, threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Optimal (max total IoU) track↔detection assignment above *threshold*."""
+    if iou_mat.size == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    if linear_sum_assignment is not None:
+        rows, cols = linear_sum_assignment(-iou_mat)
+    else:
+        # greedy on globally sorted pairs: deterministic, independent of track order
+        cand = np.argwhere(iou_mat > threshold)
+        cand = cand[np.argsort(-iou_mat[cand[:, 0], cand[:, 1]], kind="stable")]
+        used_r, used_c, rows, cols = set(), set(), [], []
+        for r, c in cand:
+            if r not in used_r and c not in used_c:
+                used_r.add(r); used_c.add(c); rows.append(r); cols.append(c)
+        rows, cols = np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64)
+    ok = iou_mat[rows, cols] > threshold
+    return rows[ok], cols[ok]
 
 class SORTTracker:
-    """Basic IoU-based tracker (not full Kalman)."""
+    """IoU-association tracker with batched Kalman motion prediction.
+
+    ``update`` associates a new set of detections; ``propagate`` advances the
+    tracks one frame on their motion model alone, for frames where the
+    detector is skipped (see ``detection.scheduler``).  Detections of
+    different classes are never associated with each other.
+    """
+    _ids = itertools.count()
+
     def __init__(self, max_age=10, iou_threshold=0.3):
-        self.tracks: List[Track] = []
         self.max_age = max_age
         self.iou_threshold = iou_threshold
+        self.last_mean_iou = 0.0     # mean IoU of matched prediction/detection pairs
+        self.last_match_ratio = 0.0  # matched / max(#tracks, #detections)
+
+        # stacked per-track state, one row per live track
+        self._x = np.zeros((0, 7))
+        self._p = np.zeros((0, 7, 7))
+        self._bbox = np.zeros((0, 4))
+        self._ids_arr = np.zeros(0, dtype=np.int64)
+        self._hits = np.zeros(0, dtype=np.int64)
+        self._losses = np.zeros(0, dtype=np.int64)
+        self._cls = np.zeros(0, dtype=np.int64)
+        self._conf = np.zeros(0)
+
+    def __len__(self) -> int:
+        return len(self._ids_arr)
+
+    # ---------------- Private helpers -----------------
+    def _predict(self):
+        """Advance every track by one frame in a single batched step."""
+        if not len(self):
+            return
+        shrink = self._x[:, 6] + self._x[:, 2] <= 0
+        self._x[shrink, 6] = 0.0  # keep the predicted area positive
+        self._x = self._x @ _F.T
+        self._p = _F @ self._p @ _F.T + _Q
+        self._bbox = _x_to_bbox(self._x)
+
+    def _correct(self, rows: np.ndarray, boxes: np.ndarray):
+        """Batched Kalman update of tracks *rows* with measured *boxes*."""
+        x, p = self._x[rows], self._p[rows]
+        y = _bbox_to_z(boxes) - x[:, :4]                      # innovation (m, 4)
+        s = p[:, :4, :4] + _R                                  # H P Hᵀ + R  (m, 4, 4)
+        k = np.linalg.solve(s, p[:, :4, :]).transpose(0, 2, 1)  # P Hᵀ S⁻¹   (m, 7, 4)
+        self._x[rows] = x + np.einsum("mij,mj->mi", k, y)
+        self._p[rows] = p - k @ p[:, :4, :]                    # (I − K H) P
+        self._bbox[rows] = boxes
+
+    def _append(self, boxes: np.ndarray, cls: np.ndarray, conf: np.ndarray):
+        n = len(boxes)
+        x = np.zeros((n, 7))
+        x[:, :4] = _bbox_to_z(boxes)
+        self._x = np.concatenate([self._x, x])
+        self._p = np.concatenate([self._p, np.broadcast_to(_P0, (n, 7, 7))])
+        self._bbox = np.concatenate([self._bbox, boxes])
+        self._ids_arr = np.concatenate([self._ids_arr, [next(self._ids) for _ in range(n)]]).astype(np.int64)
+        self._hits = np.concatenate([self._hits, np.zeros(n, dtype=np.int64)])
+        self._losses = np.concatenate([self._losses, np.zeros(n, dtype=np.int64)])
+        self._cls = np.concatenate([self._cls, cls])
+        self._conf = np.concatenate([self._conf, conf])
+
+    def _keep(self, mask: np.ndarray):
+        for name in ("_x", "_p", "_bbox", "_ids_arr", "_hits", "_losses", "_cls", "_conf"):
+            setattr(self, name, getattr(self, name)[mask])
+
+    def _dicts(self, mask: np.ndarray | None = None) -> List[Dict[str, Any]]:
+        idx = np.arange(len(self)) if mask is None else np.flatnonzero(mask)
+        return [{
+            "track_id": int(self._ids_arr[i]),
+            "bbox": self._bbox[i].tolist(),
+            "age": int(self._hits[i]),
+            "class_id": int(self._cls[i]),
+            "confidence": float(self._conf[i]),
+        } for i in idx]
 
+    # ---------------- Public API -----------------
     def update(self, detections: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        det_bboxes = [d["bbox"] for d in detections]
-        matched_det_idx = set()
-        tracks_out = []
-
-        # match existing tracks
-        for trk in self.tracks:
-            best_iou = 0
-            best_idx = -1
-            for idx, bbox in enumerate(det_bboxes):
-                if idx in matched_det_idx:
-                    continue
-                iou_val = iou(bbox, trk.bbox)
-                if iou_val > best_iou:
-                    best_iou = iou_val
-                    best_idx = idx
-            if best_iou > self.iou_threshold:
-                trk.update(det_bboxes[best_idx])
-                matched_det_idx.add(best_idx)
-            else:
-                trk.no_losses += 1
+        n_dets = len(detections)
+        boxes = np.array([d["bbox"] for d in detections], dtype=np.float64).reshape(-1, 4)
+        cls = np.array([d.get("class_id", -1) for d in detections], dtype=np.int64)
+        conf = np.array([d.get("confidence", 1.0) for d in detections], dtype=np.float64)
+        n_tracks = len(self)
+
+        # associate motion-predicted boxes with detections
+        self._predict()
+        iou_mat = box_iou(self._bbox, boxes).astype(np.float64)
+        gate = (self._cls[:, None] >= 0) & (cls[None, :] >= 0) & (self._cls[:, None] != cls[None, :])
+        iou_mat[gate] = 0.0
+        rows, cols = _assign(iou_mat, self.iou_threshold)
+
+        if rows.size:
+            self._correct(rows, boxes[cols])
+            self._cls[rows] = cls[cols]
+            self._conf[rows] = conf[cols]
+            self._hits[rows] += 1
+        lost = np.ones(n_tracks, dtype=bool)
+        lost[rows] = False
+        self._losses[rows] = 0
+        self._losses[lost] += 1
 
         # create new tracks for unmatched detections
-        for idx, bbox in enumerate(det_bboxes):
-            if idx not in matched_det_idx:
-                self.tracks.append(Track(bbox))
+        new = np.ones(n_dets, dtype=bool)
+        new[cols] = False
+        if new.any():
+            self._append(boxes[new], cls[new], conf[new])
 
         # remove dead tracks
-        self.tracks = [t for t in self.tracks if t.no_losses <= self.max_age]
-
-        # output
-        for trk in self.tracks:
-            tracks_out.append({
-                "track_id": trk.id,
-                "bbox": trk.bbox,
-                "age": trk.hits
-            })
-        return tracks_out
+        self._keep(self._losses <= self.max_age)
+
+        self.last_mean_iou = float(iou_mat[rows, cols].mean()) if rows.size else 0.0
+        self.last_match_ratio = rows.size / max(n_tracks, n_dets, 1)
+        return self._dicts()
+
+    def propagate(self) -> List[Dict[str, Any]]:
+        """Advance tracks one frame without detections.
+
+        Only tracks confirmed by the most recent ``update`` are returned; loss
+        counters are untouched because the object was not looked for.
+        """
+        self._predict()
+        return self.confirmed()
+
+    def confirmed(self) -> List[Dict[str, Any]]:
+        """Tracks matched (or created) by the most recent ``update``."""
+        return self._dicts(self._losses == 0)
+
+class TrackStitcher:
+    """Map per-segment track ids onto global ids across segment boundaries.
+
+    Segments decoded independently (``ingest.segmented_reader``) number
+    their tracks independently.  Each segment re-tracks a few warm-up frames
+    before its range; its tracks on the last warm-up frame are matched by
+    class and IoU to the previous segment's (already global) tracks on that
+    same frame, and inherit their ids.  Unmatched tracks get fresh ids.
+    """
+
+    def __init__(self, iou_threshold: float = 0.5):
+        self.iou_threshold = iou_threshold
+        self._next = 0
+        self._map: Dict[int, int] = {}
+
+    def start_segment(self,
+                      previous: Optional[List[Dict[str, Any]]] = None,
+                      handoff: Optional[List[Dict[str, Any]]] = None):
+        """*previous*: last frame of the previous segment (global ids); *handoff*: the same frame re-tracked by the new segment."""
+        self._map = {}
+        prev = [d for d in previous or [] if d.get("track_id") is not None]
+        new = [d for d in handoff or [] if d.get("track_id") is not None]
+        if not prev or not new:
+            return
+        iou_mat = box_iou(np.array([d["bbox"] for d in prev], dtype=np.float64).reshape(-1, 4),
+                          np.array([d["bbox"] for d in new], dtype=np.float64).reshape(-1, 4)).astype(np.float64)
+        cls_p = np.array([d.get("class_id", -1) for d in prev])
+        cls_n = np.array([d.get("class_id", -1) for d in new])
+        iou_mat[cls_p[:, None] != cls_n[None, :]] = 0.0
+        rows, cols = _assign(iou_mat, self.iou_threshold)
+        for r, c in zip(rows, cols):
+            self._map[new[c]["track_id"]] = prev[r]["track_id"]
+
+    def remap(self, detections: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Rewrite ``track_id`` of one frame's detections (in place) to global ids."""
+        for d in detections:
+            tid = d.get("track_id")
+            if tid is None:
+                continue
+            if tid not in self._map:
+                self._map[tid] = self._next
+                self._next += 1
+            d["track_id"] = self._map[tid]
+            self._next = max(self._next, d["track_id"] + 1)
+        return detections
@@ -11,15 +11,144 @@ ultralytics      (for preprocessing helpers; optional)
 Environment variable
 --------------------
 YOLO_MODEL_PATH : path to .onnx weights
+
+Session tuning (thread counts, execution mode, graph optimization level,
+memory arena) is read from the ``session`` block of ``configs/yolo.yaml`` by
+:meth:`YOLODetector.from_config`.  The optimized graph is serialized to an
+on-disk cache keyed by the model's SHA-256, so later process starts load the
+pre-optimized graph instead of re-running the optimizer.
+
+``quantized=True`` (``quantized: true`` in yolo.yaml) loads the static INT8
+model ``<stem>.int8.onnx`` produced by ``python -m detection.quantize``.
 """
 
 from __future__ import annotations
 import os
 import time
+import hashlib
+import logging
+import platform
+import threading
+from pathlib import Path
 import cv2
 import numpy as np
 import onnxruntime as ort
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Sequence
+from .nms import batched_nms
+from common.config import load_config
+
+logger = logging.getLogger(__name__)
+
+_OPT_LEVELS = {
+    "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
+_EXEC_MODES = {
+    "sequential": ort.ExecutionMode.ORT_SEQUENTIAL,
+    "parallel": ort.ExecutionMode.ORT_PARALLEL,
+}
+
+# -------------- session construction -------------
+def build_session_options(cfg: Dict[str, Any] | None = None) -> ort.SessionOptions:
+    """Translate the ``session`` block of yolo.yaml into ``ort.SessionOptions``."""
+    cfg = cfg or {}
+    opts = ort.SessionOptions()
+    opts.intra_op_num_threads = int(cfg.get("intra_op_num_threads") or 0)
+    opts.inter_op_num_threads = int(cfg.get("inter_op_num_threads") or 0)
+    opts.execution_mode = _EXEC_MODES[cfg.get("execution_mode", "sequential")]
+    opts.graph_optimization_level = _OPT_LEVELS[cfg.get("graph_optimization_level", "all")]
+    opts.enable_cpu_mem_arena = bool(cfg.get("enable_cpu_mem_arena", True))
+    opts.enable_mem_pattern = bool(cfg.get("enable_mem_pattern", True))
+    return opts
+
+def _provider_list(providers: list[str], cfg: Dict[str, Any], device_id: int = 0) -> list:
+    """Attach CUDA arena options to the CUDA provider entry."""
+    out = []
+    for p in providers:
+        if p == "CUDAExecutionProvider":
+            cuda_opts = {"device_id": device_id,
+                         "arena_extend_strategy": cfg.get("arena_extend_strategy", "kNextPowerOfTwo")}
+            if cfg.get("gpu_mem_limit"):
+                cuda_opts["gpu_mem_limit"] = int(cfg["gpu_mem_limit"])
+            out.append((p, cuda_opts))
+        else:
+            out.append(p)
+    return out
+
+def _model_digest(path: str, chunk: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def _cache_dir(model_path: str, setting: Any) -> Path | None:
+    if setting in (None, False, "false", "off"):
+        return None
+    if setting in (True, "auto"):
+        return Path(model_path).resolve().parent / "ort_cache"
+    return Path(setting)
+
+def create_session(model_path: str,
+                   providers: list[str],
+                   session_cfg: Dict[str, Any] | None = None,
+                   device_id: int = 0) -> ort.InferenceSession:
+    """Build an InferenceSession, reusing a cached optimized graph when possible.
+
+    The cache key covers the model bytes, optimization level, provider list,
+    ONNX Runtime version and CPU architecture, because an ``all``-level
+    optimized graph can contain provider- and hardware-specific kernels.
+    """
+    cfg = session_cfg or {}
+    opts = build_session_options(cfg)
+    provider_list = _provider_list(providers, cfg, device_id)
+    level = cfg.get("graph_optimization_level", "all")
+    cache_dir = _cache_dir(model_path, cfg.get("optimized_model_cache"))
+    if cache_dir is None or level == "disable":
+        return ort.InferenceSession(model_path, sess_options=opts, providers=provider_list)
+
+    env = ",".join(providers) + f"|{ort.__version__}|{platform.machine()}"
+    prov_tag = hashlib.sha1(env.encode()).hexdigest()[:8]
+    cached = cache_dir / f"{Path(model_path).stem}-{_model_digest(model_path)[:16]}-{level}-{prov_tag}.onnx"
+    if cached.exists():
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+        logger.info("Loading pre-optimized detector graph %s", cached)
+        return ort.InferenceSession(str(cached), sess_options=opts, providers=provider_list)
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    # write to a private file and rename, so concurrently starting workers
+    # never load a half-written graph
+    tmp = cached.with_suffix(f".{os.getpid()}.tmp")
+    opts.optimized_model_filepath = str(tmp)
+    session = ort.InferenceSession(model_path, sess_options=opts, providers=provider_list)
+    if tmp.exists():
+        os.replace(tmp, cached)
+        logger.info("Cached optimized detector graph at %s", cached)
+    return session
+
+# -------------- shared preprocessing -------------
+def letterbox_into(img: np.ndarray, out: np.ndarray, input_size: int):
+    """Letterbox *img* into the preallocated CHW float32 slot *out*.
+
+    Returns
+    -------
+    (scale, (new_w, new_h)) needed to map boxes back to *img* coordinates
+    """
+    h, w = img.shape[:2]
+    scale = input_size / max(h, w)
+    nh, nw = int(h * scale), int(w * scale)
+    resized = cv2.resize(img, (nw, nh))
+    out.fill(0.0)
+    # BGR → RGB, HWC → CHW, uint8 → [0, 1] written straight into the slot
+    np.multiply(resized[:, :, ::-1].transpose(2, 0, 1), 1.0 / 255.0, out=out[:, :nh, :nw])
+    return scale, (nw, nh)
+
+def quantized_path(model_path: str) -> str:
+    """Location of the INT8 model produced by ``detection.quantize`` for *model_path*."""
+    p = Path(model_path)
+    return str(p.with_name(f"{p.stem}.int8{p.suffix}"))
 
 class YOLODetector:
     """Lightweight ONNX Runtime wrapper for YOLOv8."""
@@ -29,63 +158,87 @@ class YOLODetector:
                  conf_thres: float = 0.25,
                  iou_thres: float = 0.45,
                  input_size: int = 640,
-                 providers: list[str] | None = None):
+                 providers: list[str] | None = None,
+                 max_det: int = 300,
+                 max_nms: int = 3000,
+                 agnostic_nms: bool = False,
+                 nms_method: str = "hard",
+                 session_config: Dict[str, Any] | None = None,
+                 device_id: int = 0,
+                 quantized: bool = False):
         self.model_path = model_path or os.getenv("YOLO_MODEL_PATH", "yolov8.onnx")
+        if quantized:
+            fp32_path, self.model_path = self.model_path, quantized_path(self.model_path)
+            if not os.path.exists(self.model_path):
+                raise FileNotFoundError(f"Quantized YOLO model not found: {self.model_path} "
+                                        f"(create it with: python -m detection.quantize --model {fp32_path})")
+        self.quantized = quantized
         if not os.path.exists(self.model_path):
             raise FileNotFoundError(f"YOLO model not found: {self.model_path}")
-        self.session = ort.InferenceSession(self.model_path,
-                                            providers=providers or ["CUDAExecutionProvider", "CPUExecutionProvider"])
+        self.session = create_session(self.model_path,
+                                      providers or ["CUDAExecutionProvider", "CPUExecutionProvider"],
+                                      session_config, device_id)
         self.conf_thres = conf_thres
         self.iou_thres = iou_thres
         self.input_size = input_size
+        self.max_det = max_det
+        self.max_nms = max_nms            # top-k candidates entering NMS
+        self.agnostic_nms = agnostic_nms
+        self.nms_method = nms_method      # 'hard' | 'gaussian' | 'linear' (soft-NMS)
         self._input_name = self.session.get_inputs()[0].name
+        # a symbolic batch dim (e.g. 'batch') accepts any N; a fixed int caps it
+        batch_dim = self.session.get_inputs()[0].shape[0]
+        self.max_batch = batch_dim if isinstance(batch_dim, int) and batch_dim > 0 else None
+        self._local = threading.local()  # per-thread batch buffers
+
+    @classmethod
+    def from_config(cls, config: str | Dict[str, Any] = "yolo", **overrides) -> "YOLODetector":
+        """Build a detector from ``configs/yolo.yaml`` (or a dict); non-None kwargs override."""
+        cfg = config if isinstance(config, dict) else load_config(config)
+        device = str(cfg.get("device", "cuda:0"))
+        kwargs: Dict[str, Any] = dict(
+            model_path=os.getenv("YOLO_MODEL_PATH") or cfg.get("model"),
+            conf_thres=cfg.get("confidence_threshold", 0.25),
+            iou_thres=cfg.get("iou_threshold", 0.45),
+            input_size=cfg.get("img_size", 640),
+            providers=(["CPUExecutionProvider"] if device == "cpu"
+                       else ["CUDAExecutionProvider", "CPUExecutionProvider"]),
+            max_det=cfg.get("max_det", 300),
+            agnostic_nms=bool(cfg.get("agnostic_nms", False)),
+            session_config=cfg.get("session"),
+            device_id=int(device.split(":")[1]) if device.startswith("cuda:") else 0,
+            quantized=bool(cfg.get("quantized", False)),
+        )
+        kwargs.update({k: v for k, v in overrides.items() if v is not None})
+        return cls(**kwargs)
 
     # -------------- preprocess -------------------
+    def _letterbox_into(self, img: np.ndarray, out: np.ndarray):
+        return letterbox_into(img, out, self.input_size)
+
     def _preprocess(self, img: np.ndarray) -> np.ndarray:
-        h, w = img.shape[:2]
-        scale = self.input_size / max(h, w)
-        nh, nw = int(h * scale), int(w * scale)
-        resized = cv2.resize(img, (nw, nh))
-        padded = np.zeros((self.input_size, self.input_size, 3), dtype=np.uint8)
-        padded[:nh, :nw] = resized
-        img_in = padded[:, :, ::-1].transpose(2, 0, 1)  # BGR → RGB, HWC → CHW
-        img_in = img_in.astype(np.float32) / 255.0
-        img_in = np.expand_dims(img_in, 0)
+        img_in = np.empty((1, 3, self.input_size, self.input_size), dtype=np.float32)
+        scale, (nw, nh) = self._letterbox_into(img, img_in[0])
         return img_in, scale, (nw, nh)
 
-    # -------------- postprocess ------------------
-    def _nms(self, boxes, scores, iou_threshold):
-        # Pure python NMS
-        idxs = scores.argsort()[::-1]
-        keep = []
-        while idxs.size > 0:
-            i = idxs[0]
-            keep.append(i)
-            xx1 = np.maximum(boxes[i, 0], boxes[idxs[1:], 0])
-            yy1 = np.maximum(boxes[i, 1], boxes[idxs[1:], 1])
-            xx2 = np.minimum(boxes[i, 2], boxes[idxs[1:], 2])
-            yy2 = np.minimum(boxes[i, 3], boxes[idxs[1:], 3])
-            inter = np.maximum(0, xx2 - xx1) * np.maximum(0, yy2 - yy1)
-            iou = inter / ( (boxes[i, 2] - boxes[i, 0]) * (boxes[i, 3] - boxes[i, 1]) + 
-                            (boxes[idxs[1:], 2] - boxes[idxs[1:], 0]) * (boxes[idxs[1:], 3] - boxes[idxs[1:], 1]) - inter + 1e-6 )
-            idxs = idxs[1:][iou < iou_threshold]
-        return keep
-
-    # -------------- public predict ---------------
-    def predict(self, img: np.ndarray) -> List[Dict[str, Any]]:
-        img_in, scale, (nw, nh) = self._preprocess(img)
-        start = time.time()
-        outputs = self.session.run(None, {self._input_name: img_in})[0]  # (batch, boxes, 85)
-        infer_ms = (time.time() - start) * 1000
+    def _batch_buffer(self, n: int) -> np.ndarray:
+        """Reusable (n, 3, S, S) input tensor; grows on demand."""
+        buf = getattr(self._local, "batch_buf", None)
+        if buf is None or buf.shape[0] < n:
+            buf = np.empty((n, 3, self.input_size, self.input_size), dtype=np.float32)
+            self._local.batch_buf = buf
+        return buf[:n]
 
-        outputs = np.squeeze(outputs, 0)
+    # -------------- postprocess ------------------
+    def _postprocess(self, outputs: np.ndarray, scale: float) -> List[Dict[str, Any]]:
+        """Decode one image's (boxes, 85) output into detection dicts."""
         scores = outputs[:, 4] * outputs[:, 5:].max(axis=1)
         mask = scores >= self.conf_thres
         outputs = outputs[mask]
         scores = scores[mask]
         if outputs.size == 0:
             return []
-        boxes = outputs[:, :4]
+        boxes = outputs[:, :4].copy()
         # xywh → xyxy in resized space
         boxes[:, :2] -= boxes[:, 2:] / 2
         boxes[:, 2:] += boxes[:, :2]
@@ -93,13 +246,45 @@ class YOLODetector:
         boxes /= scale
         classes = outputs[:, 5:].argmax(axis=1)
 
-        keep = self._nms(boxes, scores, self.iou_thres)
+        keep, kept_scores = batched_nms(boxes, scores, classes, self.iou_thres,
+                                        top_k=self.max_nms, max_det=self.max_det,
+                                        agnostic=self.agnostic_nms, method=self.nms_method)
         results = []
-        for i in keep:
+        for i, score in zip(keep, kept_scores):
             x1, y1, x2, y2 = boxes[i]
             results.append({
                 "bbox": [float(x1), float(y1), float(x2), float(y2)],
-                "confidence": float(scores[i]),
+                "confidence": float(score),
                 "class_id": int(classes[i])
             })
         return results
+
+    # -------------- public predict ---------------
+    def predict(self, img: np.ndarray) -> List[Dict[str, Any]]:
+        img_in, scale, (nw, nh) = self._preprocess(img)
+        start = time.time()
+        outputs = self.session.run(None, {self._input_name: img_in})[0]  # (batch, boxes, 85)
+        infer_ms = (time.time() - start) * 1000
+        return self._postprocess(outputs[0], scale)
+
+    def predict_batch(self, frames: Sequence[np.ndarray]) -> List[List[Dict[str, Any]]]:
+        """Run detection on several frames with a single ``session.run``.
+
+        Frames are letterboxed into one preallocated NCHW tensor.  Models
+        exported with a fixed batch dimension are fed in chunks of that size.
+
+        Returns
+        -------
+        list with one detection list per input frame, in input order
+        """
+        if not frames:
+            return []
+        chunk = self.max_batch or len(frames)
+        results: List[List[Dict[str, Any]]] = []
+        for off in range(0, len(frames), chunk):
+            part = frames[off:off + chunk]
+            batch = self._batch_buffer(len(part))
+            scales = [self._letterbox_into(img, batch[i])[0] for i, img in enumerate(part)]
+            outputs = self.session.run(None, {self._input_name: batch})[0]  # (batch, boxes, 85)
+            results.extend(self._postprocess(outputs[i], scales[i]) for i in range(len(part)))
+        return results
@@ -6,6 +6,16 @@ Unified video capture interface for:
 2. Capture card / webcam devices
 3. Network streams (RTSP / RTMP / HTTP MJPEG)
 
+With ``shared_memory=True`` frames are decoded straight into a
+:class:`ingest.shm_ring.SharedFrameRing` instead of being copied into a
+queue; ``read()`` then returns zero-copy views and other processes attach
+to ``service.ring.name``.
+
+When consumers fall behind, the overflow ``policy`` decides what gives:
+blocking (files), dropping the oldest frame, keeping only the latest, or
+adaptively skipping decodes to stay within a latency budget.  Queue depth,
+drops and capture-to-consume latency are in ``service.stats()``.
+
 Dependencies
 ------------
 opencv-python-headless
@@ -13,21 +23,70 @@ opencv-python-headless
 
 from __future__ import annotations
 import cv2
+import numpy as np
+import os
 import threading
 import queue
 import time
 import logging
-from typing import Optional, Generator, Union
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional, Generator, Union
+from .shm_ring import RingReader, SharedFrameRing
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(levelname)s %(name)s: %(message)s")
 
+POLICIES = ("block", "drop_oldest", "latest", "adaptive")
+
 class StreamError(RuntimeError):
     """Raised when stream cannot be opened or read."""
 
+def _is_live(source: Union[str, int]) -> bool:
+    return isinstance(source, int) or "://" in source or not os.path.exists(source)
+
+@dataclass
+class CapturedFrame:
+    frame_id: int
+    timestamp: float  # time.time() at capture
+    frame: np.ndarray
+
+@dataclass
+class CaptureMetrics:
+    """Counters shared by the capture thread and the consumer (see ``VideoCaptureService.stats``)."""
+    captured: int = 0        # frames decoded and handed to the queue / ring
+    consumed: int = 0        # frames returned by read()
+    dropped: int = 0         # frames discarded by the overflow policy
+    skipped: int = 0         # frames grabbed without decoding (adaptive stride)
+    depth: int = 0           # frames waiting at the last read()
+    stride: int = 1          # adaptive: deliver one frame in every *stride*
+    latency: float = 0.0     # capture → consume, seconds, exponential moving average
+    max_latency: float = 0.0
+
+    def observe(self, captured_at: float, depth: int):
+        lat = time.time() - captured_at
+        self.consumed += 1
+        self.depth = depth
+        self.latency = lat if self.consumed == 1 else 0.9 * self.latency + 0.1 * lat
+        self.max_latency = max(self.max_latency, lat)
+
 class VideoCaptureService:
     """Threaded non‑blocking video capture.
 
+    Overflow policies (what the capture thread does when consumers lag)
+    ----------------------------------------------------------------
+    block        wait for space; no frame is lost (files)
+    drop_oldest  discard the oldest queued frame (bounded latency, keeps order)
+    latest       keep only the newest frame; consumers always get the live one
+    adaptive     decode only every *stride*-th frame (the rest are grabbed
+                 without decoding); the stride doubles while the queue is
+                 over ¾ full or latency exceeds ``latency_budget`` and
+                 relaxes once both recover; overflow drops the oldest
+    auto         ``block`` for local files, ``drop_oldest`` for devices,
+                 streams and shared-memory mode
+
+    In shared-memory mode the writer never waits for other processes;
+    ``block`` only waits for this service's own ``read()`` cursor.
+
     Examples
     --------
     >>> cap = VideoCaptureService(source="/path/to/file.mp4").start()
@@ -36,21 +95,49 @@ class VideoCaptureService:
     ...     if cap.frame_id > 1000:
     ...         break
     >>> cap.stop()
+
+    Live stream within a latency budget:
+
+    >>> cap = VideoCaptureService("rtsp://...", policy="adaptive", latency_budget=0.3).start()
+    >>> cap.stats()   # {'captured': ..., 'dropped': ..., 'latency': ..., 'stride': ...}
+
+    Shared-memory mode (one decode, many consumer processes):
+
+    >>> cap = VideoCaptureService(source="rtsp://...", shared_memory=True, queue_size=32).start()
+    >>> ring = SharedFrameRing.attach(cap.ring.name)   # in each consumer process
     """
 
     def __init__(self,
                  source: Union[str, int],
                  queue_size: int = 256,
-                 reconnect: bool = True):
+                 reconnect: bool = True,
+                 shared_memory: bool = False,
+                 ring_name: Optional[str] = None,
+                 policy: str = "auto",
+                 latency_budget: float = 0.5,
+                 max_stride: int = 8):
+        if policy == "auto":
+            policy = "drop_oldest" if shared_memory or _is_live(source) else "block"
+        if policy not in POLICIES:
+            raise ValueError(f"unknown overflow policy {policy!r}, expected one of {POLICIES}")
         self.source = source
-        self.queue_size = queue_size
+        self.queue_size = queue_size  # ring slots in shared-memory mode
         self.reconnect = reconnect
+        self.shared_memory = shared_memory
+        self.ring_name = ring_name
+        self.policy = policy
+        self.latency_budget = latency_budget
+        self.max_stride = max_stride
+        self.metrics = CaptureMetrics()
+        self.ring: Optional[SharedFrameRing] = None
+        self._ring_reader: Optional[RingReader] = None
 
         self._cap: Optional[cv2.VideoCapture] = None
         self._q: queue.Queue = queue.Queue(maxsize=queue_size)
         self._thread: Optional[threading.Thread] = None
         self._stopped = threading.Event()
         self._paused = threading.Event()
+        self._next_adapt = 0.0
         self.frame_id = 0
 
     # ---------------- Private helpers -----------------
@@ -60,13 +147,103 @@ class VideoCaptureService:
             raise StreamError(f"Cannot open source: {self.source}")
         return cap
 
+    def _decode(self):
+        """Decode the next frame into the queue, or in place into the next ring slot."""
+        if self.ring is None:
+            return self._cap.read()
+        slot = self.ring.claim()
+        ret, frame = self._cap.read(slot)
+        if ret and frame is not None and not np.shares_memory(frame, slot):
+            # OpenCV allocated its own buffer (e.g. the stream changed resolution)
+            if frame.shape != slot.shape:
+                frame = cv2.resize(frame, (slot.shape[1], slot.shape[0]))
+            slot[...] = frame.reshape(slot.shape)
+        return ret, slot
+
+    def _open_ring(self):
+        ret, first = self._cap.read()
+        if not ret:
+            raise StreamError(f"Cannot read a first frame from {self.source}")
+        self.ring = SharedFrameRing.create(first.shape, slots=self.queue_size, dtype=first.dtype,
+                                           name=self.ring_name)
+        self._ring_reader = self.ring.reader(start="oldest")
+        self.ring.write(first, self.frame_id)
+        self.metrics.captured += 1
+        self.frame_id += 1
+
+    def _depth(self) -> int:
+        return self._ring_reader.backlog if self.ring is not None else self._q.qsize()
+
+    def _adapt(self):
+        """Adaptive policy: re-evaluate the decode stride at most every 0.25 s."""
+        now = time.monotonic()
+        if now < self._next_adapt:
+            return
+        self._next_adapt = now + 0.25
+        m, depth = self.metrics, self._depth()
+        if depth > 0.75 * self.queue_size or m.latency > self.latency_budget:
+            stride = min(m.stride * 2, self.max_stride)
+        elif depth < 0.25 * self.queue_size and m.latency < 0.5 * self.latency_budget:
+            stride = max(m.stride - 1, 1)
+        else:
+            return
+        if stride != m.stride:
+            logger.info("Adaptive capture stride %d → %d (depth %d, latency %.0f ms)",
+                        m.stride, stride, depth, m.latency * 1000)
+            m.stride = stride
+
+    def _wait_for_space(self) -> bool:
+        """Block policy in shared-memory mode: don't lap this service's reader."""
+        while self._ring_reader.backlog >= self.ring.slots - 1:
+            if self._stopped.is_set():
+                return False
+            time.sleep(0.002)
+        return True
+
+    def _enqueue(self, item: CapturedFrame):
+        if self.policy == "block":
+            while not self._stopped.is_set():
+                try:
+                    self._q.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+            return
+        if self.policy == "latest":
+            while True:
+                try:
+                    self._q.get_nowait()
+                    self.metrics.dropped += 1
+                except queue.Empty:
+                    break
+        while True:  # drop_oldest / adaptive / latest
+            try:
+                self._q.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self._q.get_nowait()
+                    self.metrics.dropped += 1
+                except queue.Empty:
+                    pass
+
     def _reader(self):
-        logger.info("📺 Capture thread started for %s", self.source)
+        logger.info("📺 Capture thread started for %s (overflow policy: %s)", self.source, self.policy)
         while not self._stopped.is_set():
             if self._paused.is_set():
                 time.sleep(0.05)
                 continue
-            ret, frame = self._cap.read()
+            if self.policy == "adaptive":
+                self._adapt()
+                if self.frame_id % self.metrics.stride:
+                    ret = self._cap.grab()  # advance the stream without decoding
+                    if ret:
+                        self.metrics.skipped += 1
+                        self.frame_id += 1
+                        continue
+            if self.ring is not None and self.policy == "block" and not self._wait_for_space():
+                break
+            ret, frame = self._decode()
             if not ret:
                 logger.warning("End of stream or read failure on %s", self.source)
                 if self.reconnect and isinstance(self.source, str) and self.source.startswith("rtsp"):
@@ -80,11 +257,14 @@ class VideoCaptureService:
                         break
                 else:
                     break
-            try:
-                self._q.put(frame, timeout=1)
-                self.frame_id += 1
-            except queue.Full:
-                logger.debug("Frame queue full; dropping frame %s", self.frame_id)
+            if self.ring is not None:
+                self.ring.publish(self.frame_id)
+            else:
+                self._enqueue(CapturedFrame(self.frame_id, time.time(), frame))
+            self.metrics.captured += 1
+            self.frame_id += 1
+        if self.ring is not None:
+            self.ring.close_stream()
         self._cap.release()
         logger.info("📺 Capture thread stopped for %s", self.source)
 
@@ -93,6 +273,8 @@ class VideoCaptureService:
         if self._thread and self._thread.is_alive():
             return self
         self._cap = self._open()
+        if self.shared_memory and self.ring is None:
+            self._open_ring()
         self._stopped.clear()
         self._paused.clear()
         self._thread = threading.Thread(target=self._reader, daemon=True)
@@ -105,25 +287,63 @@ class VideoCaptureService:
     def resume(self):
         self._paused.clear()
 
-    def stop(self):
+    def stop(self, timeout: float = 2.0):
         self._stopped.set()
         if self._thread:
-            self._thread.join(timeout=2)
-        logger.info("Stopped capture service for %s", self.source)
+            self._thread.join(timeout=timeout)
+        if self.ring is not None:
+            if self._thread is not None and self._thread.is_alive():
+                # still inside cap.read(slot) (e.g. a stalled stream): unmapping would
+                # let it write into freed memory, so the ring stays allocated
+                logger.warning("Capture thread for %s did not exit; leaving frame ring %s mapped",
+                               self.source, self.ring.name)
+            else:
+                self.ring.close()
+                self.ring = self._ring_reader = None
+        logger.info("Stopped capture service for %s: %s", self.source, self.stats())
+
+    def read_item(self, timeout: float = 1.0) -> Optional[CapturedFrame]:
+        """Blocking read of the next frame with its frame id and capture time.
+
+        In shared-memory mode the frame is a view of the ring slot, valid
+        until the capture thread wraps around to it (``queue_size`` frames
+        later).
+        """
+        if self._ring_reader is not None:
+            if self.policy == "latest":
+                self._ring_reader.skip_to_latest()
+            view = self._ring_reader.next(timeout=timeout)
+            if view is None:
+                return None
+            self.metrics.dropped = self._ring_reader.dropped
+            item = CapturedFrame(view.frame_id, view.timestamp, view.frame)
+        else:
+            try:
+                item = self._q.get(timeout=timeout)
+            except queue.Empty:
+                return None
+        self.metrics.observe(item.timestamp, self._depth())
+        return item
 
     def read(self, timeout: float = 1.0):
         """Blocking read of next frame."""
-        try:
-            return self._q.get(timeout=timeout)
-        except queue.Empty:
-            return None
+        item = self.read_item(timeout)
+        return item.frame if item is not None else None
 
     def frames(self) -> Generator:
         """Generator that yields frames as they become available."""
         while not self._stopped.is_set():
             frame = self.read(timeout=0.5)
             if frame is None:
-                if not self._thread.is_alive():
+                if not self._thread.is_alive() and self._depth() == 0:
                     break
                 continue
             yield frame
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, drops, skips and capture → consume latency."""
+        out = asdict(self.metrics)
+        if self.ring is not None or not self.shared_memory:
+            out["depth"] = self._depth()
+        out["policy"] = self.policy
+        return out
@@ -0,0 +1,294 @@
+"""
+frame_index.py
+
+Persistent per-video frame index and random-access frame retrieval.
+
+The index maps every ``frame_id`` (presentation order) to its timestamp,
+keyframe flag and byte offset in the file.  It is built once — from
+``ffprobe`` packet metadata when available (no decoding), else by one
+``grab()`` pass with OpenCV (timestamps only; keyframes unknown) — and
+cached as ``data/processed/index/<stem>.<hash>.npz``.  The cache is keyed
+by the video's absolute path and invalidated when its size or mtime
+changes.
+
+:class:`FrameReader` keeps one capture open and, for each request, either
+reads forward (target in the current GOP) or seeks to the nearest keyframe
+at or before the target and grabs only the gap.
+
+Example
+-------
+>>> frame = get_frame("data/raw/game.mp4", 81234)
+>>> for frame_id, frame in get_range("data/raw/game.mp4", 81200, 81260):
+...     ...
+"""
+
+from __future__ import annotations
+import atexit
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from data import paths
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+
+def _default_cache_dir() -> Path:
+    return paths.processed("index")
+
+def _file_stamp(video: str) -> Tuple[int, int]:
+    st = os.stat(video)
+    return st.st_size, st.st_mtime_ns
+
+@dataclass
+class FrameIndex:
+    """Per-frame ``timestamps`` (ms), ``keyframe`` flags and byte ``offsets`` (-1 unknown)."""
+    video: str
+    fps: float
+    timestamps: np.ndarray
+    keyframe: np.ndarray
+    offsets: np.ndarray
+    keyframes_known: bool
+    size: int = 0
+    mtime_ns: int = 0
+
+    def __post_init__(self):
+        self._keys = np.flatnonzero(self.keyframe)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    # ---------------- building -----------------
+    @classmethod
+    def build(cls, video: str, use_ffprobe: bool = True) -> "FrameIndex":
+        cap = cv2.VideoCapture(video)
+        if not cap.isOpened():
+            raise IOError(f"Cannot open {video}")
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        probed = _probe_packets(video) if use_ffprobe else None
+        if probed is not None:
+            ts, key, pos = probed
+            index = cls(video, fps, ts, key, pos, True)
+        else:
+            # one pass without colour conversion; OpenCV does not expose keyframe flags
+            ts = []
+            while cap.grab():
+                ts.append(cap.get(cv2.CAP_PROP_POS_MSEC))
+            n = len(ts)
+            key = np.zeros(n, dtype=bool)
+            key[:1] = True
+            index = cls(video, fps, np.asarray(ts, dtype=np.float64), key, np.full(n, -1, np.int64), False)
+        cap.release()
+        index.size, index.mtime_ns = _file_stamp(video)
+        logger.info("Indexed %s: %d frames, %s keyframes", video, len(index),
+                    int(index.keyframe.sum()) if index.keyframes_known else "unknown")
+        return index
+
+    @classmethod
+    def cache_path(cls, video: str, cache_dir: Optional[Union[str, Path]] = None) -> Path:
+        digest = hashlib.sha1(os.path.abspath(video).encode()).hexdigest()[:10]
+        return Path(cache_dir or _default_cache_dir()) / f"{Path(video).stem}.{digest}.npz"
+
+    @classmethod
+    def load_cached(cls, video: str, cache_dir: Optional[Union[str, Path]] = None) -> Optional["FrameIndex"]:
+        """Cached index of *video* if one exists and the file has not changed since; else None."""
+        path = cls.cache_path(video, cache_dir)
+        if not path.exists():
+            return None
+        try:
+            index = cls.load(path)
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning("Ignoring unreadable frame index %s (%s)", path, e)
+            return None
+        if (index.size, index.mtime_ns) != _file_stamp(video):
+            logger.info("%s changed since it was indexed", video)
+            return None
+        index.video = video
+        return index
+
+    @classmethod
+    def load_or_build(cls, video: str, cache_dir: Optional[Union[str, Path]] = None,
+                      use_ffprobe: bool = True, rebuild: bool = False) -> "FrameIndex":
+        """Cached index of *video*, rebuilt when the file changed since indexing (or on *rebuild*)."""
+        index = None if rebuild else cls.load_cached(video, cache_dir)
+        if index is None:
+            index = cls.build(video, use_ffprobe)
+            index.save(cls.cache_path(video, cache_dir))
+        return index
+
+    # ---------------- persistence -----------------
+    def save(self, path: Union[str, Path]) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = np.array([INDEX_VERSION, self.size, self.mtime_ns, int(self.keyframes_known)], dtype=np.int64)
+        tmp = path.with_suffix(".tmp.npz")
+        np.savez_compressed(tmp, meta=meta, fps=np.float64(self.fps), timestamps=self.timestamps,
+                            keyframe=self.keyframe, offsets=self.offsets)
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "FrameIndex":
+        with np.load(path) as z:
+            version, size, mtime_ns, known = z["meta"].tolist()
+            if version != INDEX_VERSION:
+                raise ValueError(f"index version {version}, expected {INDEX_VERSION}")
+            return cls("", float(z["fps"]), z["timestamps"], z["keyframe"], z["offsets"],
+                       bool(known), size, mtime_ns)
+
+    # ---------------- lookups -----------------
+    def keyframe_ids(self) -> Optional[np.ndarray]:
+        """Frame ids of all keyframes; None when keyframes are unknown."""
+        return self._keys if self.keyframes_known else None
+
+    def keyframe_before(self, frame_id: int) -> Optional[int]:
+        """Nearest keyframe at or before *frame_id*; None when keyframes are unknown."""
+        if not self.keyframes_known:
+            return None
+        i = int(np.searchsorted(self._keys, frame_id, side="right")) - 1
+        return int(self._keys[i]) if i >= 0 else 0
+
+    def frame_at(self, time_ms: float) -> int:
+        """Frame shown at *time_ms* (last frame whose timestamp is ≤ it)."""
+        return max(int(np.searchsorted(self.timestamps, time_ms, side="right")) - 1, 0)
+
+def _probe_packets(video: str) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """(timestamps ms, keyframe, byte offset) in presentation order, from packet metadata."""
+    if shutil.which("ffprobe") is None:
+        return None
+    cmd = ["ffprobe", "-v", "error", "-select_streams", "v:0",
+           "-show_entries", "packet=pts_time,pos,flags", "-of", "csv=p=0", video]
+    try:
+        out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+    except (subprocess.CalledProcessError, OSError) as e:
+        logger.warning("ffprobe failed on %s (%s); indexing by decoding", video, e)
+        return None
+    rows = []
+    for line in out.splitlines():
+        fields = line.split(",")
+        if len(fields) < 3 or fields[0] in ("", "N/A"):
+            continue
+        rows.append((float(fields[0]) * 1000.0, "K" in fields[2],
+                     int(fields[1]) if fields[1] not in ("", "N/A") else -1))
+    if not rows:
+        return None
+    rows.sort(key=lambda r: r[0])  # packets come in decode order; frame ids follow presentation order
+    ts, key, pos = zip(*rows)
+    return np.asarray(ts, np.float64), np.asarray(key, bool), np.asarray(pos, np.int64)
+
+class FrameReader:
+    """Random access to the frames of one video through its :class:`FrameIndex`."""
+
+    def __init__(self, video: str, index: Optional[FrameIndex] = None):
+        self.video = video
+        self.index = index or FrameIndex.load_or_build(video)
+        self._cap = cv2.VideoCapture(video)
+        if not self._cap.isOpened():
+            raise IOError(f"Cannot open {video}")
+        self._pos = 0  # frame id the next read() returns
+        self.frames_decoded = 0
+
+    def _seek(self, frame_id: int):
+        """Position the capture so the next read returns *frame_id*, decoding as little as possible."""
+        if frame_id == self._pos:
+            return
+        key = self.index.keyframe_before(frame_id)
+        if key is None:  # keyframes unknown: let the backend seek (it decodes from its own keyframe)
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, frame_id)
+            self._pos = frame_id
+            return
+        if not (key <= self._pos < frame_id):  # not already inside the target's GOP: jump to its keyframe
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, key)
+            self._pos = key
+        while self._pos < frame_id:
+            self._cap.grab()
+            self._pos += 1
+            self.frames_decoded += 1
+
+    def get(self, frame_id: int) -> Optional[np.ndarray]:
+        if not 0 <= frame_id < len(self.index):
+            raise IndexError(f"frame {frame_id} out of range for {self.video} ({len(self.index)} frames)")
+        self._seek(frame_id)
+        ret, frame = self._cap.read()
+        self._pos += 1
+        self.frames_decoded += 1
+        return frame if ret else None
+
+    def range(self, start: int, stop: int, step: int = 1) -> Iterator[Tuple[int, np.ndarray]]:
+        """Frames ``start:stop:step``; one seek, then forward reads."""
+        stop = min(stop, len(self.index))
+        for frame_id in range(max(start, 0), stop, step):
+            frame = self.get(frame_id)
+            if frame is None:
+                return
+            yield frame_id, frame
+
+    def close(self):
+        self._cap.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# ---------------- shared readers -----------------
+# One open reader per (path, size, mtime): a rewritten file gets a fresh index
+# and capture, and the reader of the old version is closed.  Each reader has
+# its own lock, since a capture must not be driven by two threads at once.
+_MAX_READERS = 8
+_readers: "OrderedDict[Tuple[str, int, int], Tuple[FrameReader, threading.Lock]]" = OrderedDict()
+_readers_lock = threading.Lock()
+
+def _close_entry(entry: Tuple[FrameReader, threading.Lock]):
+    reader, lock = entry
+    with lock:
+        reader.close()
+
+def _reader(video: str) -> Tuple[FrameReader, threading.Lock]:
+    key = (video, *_file_stamp(video))
+    with _readers_lock:
+        entry = _readers.pop(key, None)
+        if entry is None:
+            for stale in [k for k in _readers if k[0] == video]:
+                _close_entry(_readers.pop(stale))
+            entry = (FrameReader(video), threading.Lock())
+        _readers[key] = entry  # most recently used last
+        while len(_readers) > _MAX_READERS:
+            _close_entry(_readers.popitem(last=False)[1])
+    return entry
+
+def close_readers():
+    """Close every reader opened by :func:`get_frame` / :func:`get_range`."""
+    with _readers_lock:
+        while _readers:
+            _close_entry(_readers.popitem()[1])
+
+atexit.register(close_readers)
+
+def get_frame(video: str, frame_id: int) -> Optional[np.ndarray]:
+    """Decode one frame of *video* via its cached index (keeps a reader open per video; thread-safe)."""
+    reader, lock = _reader(os.path.abspath(video))
+    with lock:
+        return reader.get(frame_id)
+
+def get_range(video: str, start: int, stop: int, step: int = 1) -> Iterator[Tuple[int, np.ndarray]]:
+    """Frames ``start:stop:step``; the reader is locked per frame, not for the whole iteration."""
+    reader, lock = _reader(os.path.abspath(video))
+    for frame_id in range(max(start, 0), min(stop, len(reader.index)), step):
+        with lock:
+            frame = reader.get(frame_id)
+        if frame is None:
+            return
+        yield frame_id, frame
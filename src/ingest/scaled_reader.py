@@ -0,0 +1,232 @@
+"""
+scaled_reader.py
+
+Decoding at analysis resolution, with full-resolution frames on demand.
+
+Detection letterboxes every frame to 640 px and MediaPipe pose downsamples
+to its own small input, yet decoding 1080p / 4K to full-size BGR costs a
+6–25 MB colour conversion and copy per frame that no stage uses.
+:class:`ScaledReader` has ``ffmpeg`` scale and convert each frame
+(``scale=W:H,format=bgr24``) and reads the raw frames from a pipe, so
+frames arrive already at analysis size.  Without an ``ffmpeg`` binary it
+falls back to OpenCV decode + ``cv2.resize`` (same frames, no savings).
+
+:class:`FrameScale` maps detection boxes and keypoints computed on those
+frames back to source pixel coordinates.  Stages that need source detail
+(OCR of small overlay text) fetch full-resolution frames by id with
+:meth:`ScaledReader.full_frame`, through the cached frame index
+(``ingest.frame_index``), only for the frames they sample.
+
+Example
+-------
+>>> with ScaledReader("data/raw/game.mp4", max_side=640) as reader:
+...     for frame_id, frame in reader:                       # 640×360 BGR
+...         dets = reader.scale.boxes_to_source(detector.predict(frame))
+...     full = reader.full_frame(81234)                      # 1920×1080, on demand
+
+Dependencies
+------------
+opencv-python-headless, ffmpeg (optional, for scaling during decode)
+"""
+
+from __future__ import annotations
+import logging
+import shutil
+import subprocess
+import tempfile
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from .frame_index import FrameIndex, FrameReader
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("auto", "ffmpeg", "opencv")
+
+def fit_size(width: int, height: int, max_side: int) -> Tuple[int, int]:
+    """(w, h) with the longer side at most *max_side*, aspect kept, both even; never upscales."""
+    s = min(1.0, max_side / max(width, height))
+    if s == 1.0:
+        return width, height
+    return max(2, int(round(width * s / 2)) * 2), max(2, int(round(height * s / 2)) * 2)
+
+@dataclass(frozen=True)
+class FrameScale:
+    """Source and analysis frame sizes, as (width, height)."""
+    source: Tuple[int, int]
+    size: Tuple[int, int]
+
+    @property
+    def sx(self) -> float:
+        return self.source[0] / self.size[0]
+
+    @property
+    def sy(self) -> float:
+        return self.source[1] / self.size[1]
+
+    @property
+    def identity(self) -> bool:
+        return self.source == self.size
+
+    def resize(self, frame: np.ndarray) -> np.ndarray:
+        """Source-size *frame* → analysis size (area interpolation)."""
+        if self.identity:
+            return frame
+        return cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+
+    def boxes_to_source(self, detections: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Scale every detection's ``bbox`` to source coordinates, in place."""
+        if not self.identity:
+            sx, sy = self.sx, self.sy
+            for det in detections:
+                x1, y1, x2, y2 = det["bbox"]
+                det["bbox"] = [x1 * sx, y1 * sy, x2 * sx, y2 * sy]
+        return detections
+
+    def keypoints_to_source(self, keypoints: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        """Packed ``(33, 4)`` pose in source coordinates (depth scales with width, as in ``pose``)."""
+        if keypoints is None or self.identity:
+            return keypoints
+        return keypoints * np.array([self.sx, self.sy, self.sx, 1.0], dtype=keypoints.dtype)
+
+class ScaledReader:
+    """Decode *video* at analysis resolution (longer side ≤ *max_side*).
+
+    Parameters
+    ----------
+    max_side  : longer side of the analysis frames; 0 keeps the source size
+    backend   : 'ffmpeg' (scale during decode), 'opencv' (decode, then
+                resize) or 'auto' (ffmpeg when the binary is on PATH)
+    index     : frame index for :meth:`full_frame` (default: the cached
+                index of *video*, built on first use)
+    """
+
+    def __init__(self,
+                 video: str,
+                 max_side: int = 640,
+                 backend: str = "auto",
+                 ffmpeg: str = "ffmpeg",
+                 index: Optional[FrameIndex] = None,
+                 index_dir: Optional[Union[str, Path]] = None):
+        if backend not in BACKENDS:
+            raise ValueError(f"unknown decode backend {backend!r}, expected one of {BACKENDS}")
+        cap = cv2.VideoCapture(video)
+        if not cap.isOpened():
+            raise IOError(f"Cannot open {video}")
+        w, h = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+        if backend == "auto":
+            backend = "ffmpeg" if shutil.which(ffmpeg) else "opencv"
+            if backend == "opencv" and max_side:
+                logger.warning("ffmpeg not found; decoding %s at full resolution and resizing", video)
+        self.video = video
+        self.backend = backend
+        self.ffmpeg = ffmpeg
+        self.scale = FrameScale((w, h), fit_size(w, h, max_side) if max_side else (w, h))
+        self._index = index
+        self._index_dir = index_dir
+        self._full: Optional[FrameReader] = None
+        self._full_lock = threading.Lock()
+        self._proc: Optional[subprocess.Popen] = None
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.scale.size
+
+    @property
+    def frame_bytes(self) -> int:
+        w, h = self.scale.size
+        return w * h * 3
+
+    # ---------------- decoding -----------------
+    def _ffmpeg_cmd(self) -> List[str]:
+        w, h = self.scale.size
+        return [self.ffmpeg, "-v", "error", "-nostdin", "-i", self.video, "-map", "0:v:0",
+                "-vsync", "0",  # one output frame per decoded frame, so frame ids match OpenCV's
+                "-vf", f"scale={w}:{h}:flags=area,format=bgr24",
+                "-f", "rawvideo", "-pix_fmt", "bgr24", "pipe:1"]
+
+    def _frames_ffmpeg(self) -> Iterator[np.ndarray]:
+        w, h = self.scale.size
+        n = self.frame_bytes
+        self._err = tempfile.TemporaryFile()  # not a pipe: an undrained one could stall ffmpeg
+        self._proc = proc = subprocess.Popen(self._ffmpeg_cmd(), stdout=subprocess.PIPE,
+                                             stderr=self._err, bufsize=n)
+        try:
+            while True:
+                frame = np.empty((h, w, 3), dtype=np.uint8)  # fresh buffer: frames outlive the loop
+                view, got = memoryview(frame).cast("B"), 0
+                while got < n:
+                    k = proc.stdout.readinto(view[got:])
+                    if not k:
+                        break
+                    got += k
+                if got < n:
+                    break
+                yield frame
+        finally:
+            self._stop_ffmpeg()
+
+    def _stop_ffmpeg(self):
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        if proc.poll() is None:
+            proc.kill()
+        proc.stdout.close()
+        if proc.wait() not in (0, -9):
+            self._err.seek(0)
+            logger.warning("ffmpeg failed on %s: %s", self.video,
+                           self._err.read().decode(errors="replace").strip()[-500:])
+        self._err.close()
+
+    def _frames_opencv(self) -> Iterator[np.ndarray]:
+        cap = cv2.VideoCapture(self.video)
+        try:
+            while True:
+                ret, frame = cap.read()
+                if not ret:
+                    return
+                yield self.scale.resize(frame)
+        finally:
+            cap.release()
+
+    def __iter__(self) -> Iterator[Tuple[int, np.ndarray]]:
+        """``(frame_id, frame)`` at analysis size, from the start of the file."""
+        frames = self._frames_ffmpeg() if self.backend == "ffmpeg" else self._frames_opencv()
+        return enumerate(frames)
+
+    # ---------------- full resolution -----------------
+    def full_frame(self, frame_id: int) -> Optional[np.ndarray]:
+        """Source-resolution frame *frame_id*, decoded on demand (thread-safe).
+
+        Cheapest for increasing ids (forward reads within a GOP); the
+        random-access reader is opened on the first call.
+        """
+        with self._full_lock:
+            if self._full is None:
+                index = self._index or FrameIndex.load_or_build(self.video, self._index_dir)
+                self._full = FrameReader(self.video, index)
+            if frame_id >= len(self._full.index):
+                return None
+            return self._full.get(frame_id)
+
+    def close(self):
+        self._stop_ffmpeg()
+        with self._full_lock:
+            if self._full is not None:
+                self._full.close()
+                self._full = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
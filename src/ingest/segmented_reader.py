@@ -0,0 +1,191 @@
+"""
+segmented_reader.py
+
+Parallel decoding of long video files in keyframe-aligned segments.
+
+A file is split into contiguous frame ranges, one per task, and every range
+is decoded by its own ``cv2.VideoCapture`` in a worker process.  Range
+boundaries are snapped to keyframes taken from the video's frame index
+(``ingest.frame_index``; keyframes are known when it was built with
+``ffprobe``, else the ranges are even splits and OpenCV seeks to them), so
+a worker starts decoding at an independent frame.  Each worker also decodes ``overlap``
+frames before its range and feeds them to the per-frame processor to seed
+tracker / pose state; those warm-up results are not emitted, except for the
+last one (the *handoff*), which lets the caller stitch state such as track
+ids onto the previous segment.
+
+Only per-frame results cross the process boundary, never decoded frames,
+and results come back in global ``frame_id`` order.
+
+Example
+-------
+>>> reader = SegmentedReader("data/raw/game.mp4", workers=8, overlap=30)
+>>> for frame_id, result in reader.map(make_processor):   # make_processor(segment) -> fn(frame_id, frame)
+...     ...
+
+Dependencies
+------------
+opencv-python-headless, ffprobe (optional, for keyframe positions via the frame index)
+"""
+
+from __future__ import annotations
+import logging
+import multiprocessing as mp
+import os
+import shutil
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import cv2
+import numpy as np
+
+from .frame_index import FrameIndex
+
+logger = logging.getLogger(__name__)
+
+Processor = Callable[[int, np.ndarray], Any]
+
+@dataclass(frozen=True)
+class Segment:
+    """Frames ``start:stop`` are emitted; ``warmup:start`` only seed state."""
+    index: int
+    start: int
+    stop: int
+    warmup: int
+
+@dataclass
+class SegmentResult:
+    segment: Segment
+    results: List[Tuple[int, Any]] = field(default_factory=list)
+    handoff: Any = None  # result of frame ``start - 1`` computed during warm-up
+
+# ---------------- planning ----------------
+def plan_segments(total_frames: int,
+                  num_segments: int,
+                  overlap: int = 30,
+                  keyframes: Optional[Sequence[int]] = None) -> List[Segment]:
+    """Split ``0:total_frames`` into *num_segments* contiguous ranges.
+
+    With *keyframes*, range starts and warm-up starts are snapped to the
+    nearest keyframe at or before the ideal position.
+    """
+    bounds = np.linspace(0, total_frames, max(num_segments, 1) + 1).astype(np.int64)
+    kf = np.asarray(keyframes if keyframes is not None else [], dtype=np.int64)
+
+    def snap(i: int) -> int:
+        if kf.size == 0 or i <= 0:
+            return max(i, 0)
+        return int(kf[max(np.searchsorted(kf, i, side="right") - 1, 0)])
+
+    starts = sorted(s for s in {snap(int(b)) for b in bounds[:-1]} | {0} if s < total_frames)
+    stops = starts[1:] + [total_frames]
+    return [Segment(k, s, e, snap(s - overlap) if s > 0 else 0)
+            for k, (s, e) in enumerate(zip(starts, stops))]
+
+# ---------------- worker ----------------
+def _run_segment(path: str, segment: Segment, factory: Callable[[Segment], Processor],
+                 last: bool) -> SegmentResult:
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise IOError(f"Cannot open {path}")
+    if segment.warmup:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, segment.warmup)
+    process = factory(segment)
+    out = SegmentResult(segment)
+    frame_id = segment.warmup
+    try:
+        while last or frame_id < segment.stop:  # the last segment runs to EOF (frame counts are estimates)
+            ret, frame = cap.read()
+            if not ret:
+                break
+            result = process(frame_id, frame)
+            if frame_id >= segment.start:
+                out.results.append((frame_id, result))
+            elif frame_id == segment.start - 1:
+                out.handoff = result
+            frame_id += 1
+    finally:
+        cap.release()
+        close = getattr(process, "close", None)
+        if close is not None:
+            close()
+    return out
+
+def _run_segment_star(args) -> SegmentResult:
+    return _run_segment(*args)
+
+class SegmentedReader:
+    """Decode and process *path* in parallel keyframe-aligned segments.
+
+    Parameters
+    ----------
+    workers      : worker processes (default: CPU count)
+    overlap      : warm-up frames decoded before every segment but the first
+    segments     : number of segments (default ``2 × workers``, so results
+                   stream back while later segments still decode)
+    mp_context   : multiprocessing start method; 'spawn' keeps native
+                   libraries (ONNX Runtime, MediaPipe) out of forked state
+    index        : frame index of *path* (default: the cached one; built
+                   only when ``ffprobe`` can do it without decoding)
+    """
+
+    def __init__(self,
+                 path: str,
+                 workers: Optional[int] = None,
+                 overlap: int = 30,
+                 segments: Optional[int] = None,
+                 mp_context: str = "spawn",
+                 index: Optional[FrameIndex] = None,
+                 index_dir: Optional[Union[str, Path]] = None):
+        self.path = path
+        self.index = index
+        self.index_dir = index_dir
+        self.workers = workers or os.cpu_count() or 1
+        self.overlap = overlap
+        self.num_segments = segments or 2 * self.workers
+        self.mp_context = mp_context
+        cap = cv2.VideoCapture(path)
+        if not cap.isOpened():
+            raise IOError(f"Cannot open {path}")
+        self.fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+
+    def _frame_index(self) -> Optional[FrameIndex]:
+        if self.index is None:
+            # without ffprobe, building the index means decoding the whole file first
+            self.index = (FrameIndex.load_or_build(self.path, self.index_dir) if shutil.which("ffprobe")
+                          else FrameIndex.load_cached(self.path, self.index_dir))
+        return self.index
+
+    def segments(self) -> List[Segment]:
+        index = self._frame_index()
+        total = len(index) if index is not None else self.total_frames
+        if total <= 0:  # unknown length: one segment read to EOF
+            return [Segment(0, 0, 0, 0)]
+        # keyframe ids count frames in presentation order, independent of the stream start_time
+        keyframes = index.keyframe_ids() if index is not None else None
+        if keyframes is None:
+            logger.info("No keyframe index for %s; splitting evenly", self.path)
+        return plan_segments(total, self.num_segments, self.overlap, keyframes)
+
+    def map_segments(self, factory: Callable[[Segment], Processor]) -> Iterator[SegmentResult]:
+        """Per-segment results in order; *factory* must be picklable (module-level function / partial).
+
+        ``factory(segment)`` builds the per-frame processor inside the worker;
+        if the processor has a ``close()`` method it is called at segment end.
+        """
+        segments = self.segments()
+        tasks = [(self.path, seg, factory, k == len(segments) - 1) for k, seg in enumerate(segments)]
+        logger.info("Decoding %s in %d segments on %d workers", self.path, len(segments), self.workers)
+        if self.workers <= 1:
+            yield from map(_run_segment_star, tasks)
+            return
+        with mp.get_context(self.mp_context).Pool(min(self.workers, len(tasks))) as pool:
+            yield from pool.imap(_run_segment_star, tasks)  # imap keeps segment order
+
+    def map(self, factory: Callable[[Segment], Processor]) -> Iterator[Tuple[int, Any]]:
+        """``(frame_id, result)`` for every frame of the file, in global frame order."""
+        for seg in self.map_segments(factory):
+            yield from seg.results
@@ -0,0 +1,262 @@
+"""
+shm_ring.py
+
+Preallocated ring buffer of decoded frames in ``multiprocessing.shared_memory``.
+
+One writer (the capture thread) decodes straight into fixed-shape slots;
+any number of readers, in this or other processes, attach by name and see
+each frame as a numpy view of the shared block — no copy, no pickling.
+
+Layout of the shared block
+--------------------------
+header   int64[8]  magic, slots, height, width, channels, dtype char,
+                   last published sequence number, closed flag
+meta     slots × (seq int64, frame_id int64, timestamp float64)
+frames   slots × height × width × channels, each slot 4 KiB aligned
+
+Every slot is guarded by a seqlock on the frame's sequence number: the
+writer sets the slot's ``seq`` to -1, fills the frame, then publishes the
+new sequence number.  A reader accepts slot data only if ``seq`` reads the
+expected value before and after, and a :class:`FrameView` stays valid until
+the writer laps the ring and reclaims that slot (``FrameView.valid()``).
+
+Example
+-------
+>>> ring = SharedFrameRing.create((1080, 1920, 3), slots=32)     # capture process
+>>> slot = ring.claim(); cap.read(slot); ring.publish(frame_id, time.time())
+>>> ring = SharedFrameRing.attach(name)                          # consumer process
+>>> for view in ring.reader():
+...     detect(view.frame)                                       # zero-copy view
+"""
+
+from __future__ import annotations
+import logging
+import time
+from dataclasses import dataclass
+from multiprocessing import resource_tracker, shared_memory
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = 0x42464152  # "BFAR"
+_HEADER = 8
+_SLOTS, _HEIGHT, _WIDTH, _CHANNELS, _DTYPE, _HEAD, _CLOSED = range(1, 8)
+_META = np.dtype([("seq", "<i8"), ("frame_id", "<i8"), ("timestamp", "<f8")])
+_ALIGN = 4096
+
+def _align(n: int) -> int:
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+def _attach_untracked(name: str) -> shared_memory.SharedMemory:
+    """Attach without leaving the block to this process's resource tracker.
+
+    Before Python 3.13 attaching registers the block, and a reader's own
+    tracker would unlink it when the reader exits.  Children started by
+    ``multiprocessing`` share the writer's tracker, where the extra
+    registration is harmless and must not be undone.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        shared_tracker = getattr(resource_tracker._resource_tracker, "_fd", None) is not None
+        shm = shared_memory.SharedMemory(name=name)
+        if not shared_tracker:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+@dataclass
+class FrameView:
+    """A published frame; ``frame`` is a view into the shared slot."""
+    seq: int
+    frame_id: int
+    timestamp: float
+    frame: np.ndarray
+    ring: "SharedFrameRing"
+
+    def valid(self) -> bool:
+        """False once the writer has reclaimed the slot (check after using ``frame``)."""
+        return self.ring._slot_seq(self.seq) == self.seq
+
+    def copy(self) -> Optional[np.ndarray]:
+        """Private copy of the frame, or None if the slot was overwritten meanwhile."""
+        out = self.frame.copy()
+        return out if self.valid() else None
+
+class SharedFrameRing:
+    """Fixed-shape frame slots plus sequence numbers and timestamps in shared memory.
+
+    Use :meth:`create` in the writer and :meth:`attach` in readers.  The
+    writer never waits for readers: a reader that falls more than ``slots``
+    frames behind skips ahead (counted in :attr:`RingReader.dropped`).
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self._shm = shm
+        self.owner = owner
+        self._header = np.ndarray((_HEADER,), dtype=np.int64, buffer=shm.buf)
+        if self._header[0] != _MAGIC:
+            raise ValueError(f"shared memory block {shm.name!r} is not a frame ring")
+        self.slots = int(self._header[_SLOTS])
+        self.shape: Tuple[int, int, int] = tuple(int(v) for v in self._header[_HEIGHT:_CHANNELS + 1])
+        self.dtype = np.dtype(chr(int(self._header[_DTYPE])))
+        self._meta = np.ndarray((self.slots,), dtype=_META, buffer=shm.buf, offset=_HEADER * 8)
+        stride = _align(int(np.prod(self.shape)) * self.dtype.itemsize)
+        self._frames = np.ndarray((self.slots,) + self.shape, dtype=self.dtype, buffer=shm.buf,
+                                  offset=self._frames_offset(self.slots),
+                                  strides=(stride,) + np.empty(self.shape, self.dtype).strides)
+        self._next = int(self._header[_HEAD]) + 1  # writer only
+
+    @staticmethod
+    def _frames_offset(slots: int) -> int:
+        return _align(_HEADER * 8 + slots * _META.itemsize)
+
+    @classmethod
+    def create(cls, shape: Tuple[int, ...], slots: int = 32, dtype=np.uint8,
+               name: Optional[str] = None) -> "SharedFrameRing":
+        """Allocate a ring of *slots* frames of *shape* (H, W[, C])."""
+        shape = tuple(shape) + (1,) * (3 - len(shape))
+        dtype = np.dtype(dtype)
+        size = cls._frames_offset(slots) + slots * _align(int(np.prod(shape)) * dtype.itemsize)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        header = np.ndarray((_HEADER,), dtype=np.int64, buffer=shm.buf)
+        header[:] = [_MAGIC, slots, *shape, ord(dtype.char), -1, 0]
+        np.ndarray((slots,), dtype=_META, buffer=shm.buf, offset=_HEADER * 8)["seq"] = -1
+        del header
+        logger.info("Created frame ring %s: %d × %s %s (%.1f MB)", shm.name, slots, shape, dtype, size / 2**20)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedFrameRing":
+        return cls(_attach_untracked(name), owner=False)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def head(self) -> int:
+        """Sequence number of the newest published frame (-1 before the first)."""
+        return int(self._header[_HEAD])
+
+    @property
+    def closed(self) -> bool:
+        return bool(self._header[_CLOSED])
+
+    def _slot_seq(self, seq: int) -> int:
+        return int(self._meta["seq"][seq % self.slots])
+
+    # ---------------- Writer -----------------
+    def claim(self) -> np.ndarray:
+        """View of the next slot to decode into; invalidates the frame it held."""
+        slot = self._next % self.slots
+        self._meta["seq"][slot] = -1
+        return self._frames[slot]
+
+    def publish(self, frame_id: int, timestamp: Optional[float] = None) -> int:
+        """Publish the claimed slot; returns its sequence number."""
+        seq, slot = self._next, self._next % self.slots
+        meta = self._meta[slot]
+        meta["frame_id"] = frame_id
+        meta["timestamp"] = time.time() if timestamp is None else timestamp
+        self._meta["seq"][slot] = seq
+        self._header[_HEAD] = seq
+        self._next += 1
+        return seq
+
+    def write(self, frame: np.ndarray, frame_id: int, timestamp: Optional[float] = None) -> int:
+        """Copy an already decoded *frame* into the ring (prefer claim/publish)."""
+        np.copyto(self.claim(), frame.reshape(self.shape), casting="unsafe")
+        return self.publish(frame_id, timestamp)
+
+    def close_stream(self):
+        """Tell readers no more frames will be published."""
+        self._header[_CLOSED] = 1
+
+    # ---------------- Readers -----------------
+    def get(self, seq: int) -> Optional[FrameView]:
+        """Frame *seq* if it is still in the ring, else None (not yet published or overwritten)."""
+        slot = seq % self.slots
+        if seq < 0 or self._slot_seq(seq) != seq:
+            return None
+        meta = self._meta[slot]
+        frame_id, ts = int(meta["frame_id"]), float(meta["timestamp"])
+        if self._slot_seq(seq) != seq:  # rewritten while reading the metadata
+            return None
+        return FrameView(seq, frame_id, ts, self._frames[slot], self)
+
+    def latest(self) -> Optional[FrameView]:
+        return self.get(self.head)
+
+    def reader(self, start: str = "latest") -> "RingReader":
+        """Cursor over published frames, from the newest ('latest') or the oldest still held ('oldest')."""
+        return RingReader(self, start)
+
+    def close(self):
+        """Detach; the owner also frees the block.  Outstanding frame views must be dropped first."""
+        self._header = self._meta = self._frames = None
+        try:
+            self._shm.close()
+        except BufferError:
+            logger.warning("Frame views of ring %s still alive; shared memory stays mapped", self.name)
+        if self.owner:
+            self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class RingReader:
+    """Per-consumer cursor; each reader sees every frame it keeps up with."""
+
+    def __init__(self, ring: SharedFrameRing, start: str = "latest"):
+        self.ring = ring
+        head = ring.head
+        self.next_seq = max(head, 0) if start == "latest" else max(head - ring.slots + 1, 0)
+        self.dropped = 0
+
+    @property
+    def backlog(self) -> int:
+        """Published frames not read yet (may exceed ``slots`` when lapped)."""
+        return max(self.ring.head - self.next_seq + 1, 0)
+
+    def skip_to_latest(self):
+        """Jump to the newest frame, counting the skipped ones as dropped."""
+        head = self.ring.head
+        if head > self.next_seq:
+            self.dropped += head - self.next_seq
+            self.next_seq = head
+
+    def next(self, timeout: Optional[float] = None) -> Optional[FrameView]:
+        """Next frame (waiting up to *timeout* s), skipping frames the writer already overwrote."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        delay = 1e-4
+        while True:
+            head = self.ring.head
+            if head >= self.next_seq:
+                oldest = head - self.ring.slots + 1
+                if self.next_seq < oldest:
+                    self.dropped += oldest - self.next_seq
+                    self.next_seq = oldest
+                view = self.ring.get(self.next_seq)
+                self.next_seq += 1
+                if view is not None:
+                    return view
+                self.dropped += 1  # slot reclaimed by the writer while we got to it
+                continue
+            if self.ring.closed or (deadline is not None and time.monotonic() >= deadline):
+                return None
+            time.sleep(delay)
+            delay = min(delay * 2, 5e-3)
+
+    def __iter__(self) -> Iterator[FrameView]:
+        while True:
+            view = self.next(timeout=0.5)
+            if view is None:
+                if self.ring.closed:
+                    return
+                continue
+            yield view
@@ -2,72 +2,218 @@
 aggregator.py
 
 Combine outputs from detection, pose, and OCR into a time‑series stream.
+
+Frames are kept in a columnar :class:`FrameStore` (numpy columns for
+detections, OCR and packed poses) rather than as per-frame pydantic models;
+``aggregator.frames`` still reads as a sequence of ``FrameData``, built
+lazily per frame.
+
+Retention
+---------
+With ``window`` set only the most recent frames stay in memory.  Once the
+store holds ``window + spill_every`` frames, the oldest are moved out as one
+self-contained ``FrameStore`` and handed to ``spill`` (``.npz`` segments in a
+directory, a DB flush, ...), so a live session runs with flat memory.
+``history()`` reads spilled segments back one at a time followed by the
+window.
+
+Event rules (``rules``) are settled before every spill: events whose last
+hit is more than ``rule.horizon`` frames before the cut are final; the cut
+is moved back to the start of any event that is still open, so an event
+crossing the window boundary is never split.  Settled events leave memory
+with the frames: a ``SegmentDirectory`` stores them next to the segment and
+``history_events()`` reads them back.  Other spill targets cannot take
+them, so the most recent ``MAX_SETTLED_EVENTS`` per rule are kept instead.
 """
 
 from __future__ import annotations
-from typing import List, Optional
+from collections import deque
+from typing import Callable, Deque, Iterator, List, Optional, Sequence, Union
 from datetime import datetime, timedelta
+from pathlib import Path
+import numpy as np
 from .schema import FrameData, DetectionObject, PoseFrame, OCRField, Event
+from .frame_store import FrameStore, SegmentDirectory
+from .events import ContactRule, EventEngine, Rule
+from pose.keypoints import PoseClip
 import logging
 
 logger = logging.getLogger(__name__)
 
+SpillTarget = Union[str, Path, SegmentDirectory, Callable[[FrameStore], None]]
+
+MAX_SETTLED_EVENTS = 10_000  # per rule, when settled events cannot be spilled
+
 class StreamAggregator:
-    def __init__(self):
-        self.frames: List[FrameData] = []
+    """
+    Parameters
+    ----------
+    window      : frames kept in memory; None keeps every frame
+    spill       : where frames leaving the window go — a directory (``.npz``
+                  segments, readable by ``history()``; segments left there
+                  by an earlier session are deleted), a ``SegmentDirectory``,
+                  or a callable taking the spilled ``FrameStore`` (e.g. a DB
+                  flush).  None drops them.
+    spill_every : frames moved out per spill (default ``window // 4``)
+    rules       : event rules settled across spills (default: ``ContactRule()``)
+    """
+
+    def __init__(self,
+                 window: Optional[int] = None,
+                 spill: Optional[SpillTarget] = None,
+                 spill_every: Optional[int] = None,
+                 rules: Optional[Sequence[Rule]] = None):
+        self.store = FrameStore()
+        self.rules = list(rules) if rules is not None else [ContactRule()]
+        self.window = window
+        self.spill_every = spill_every or max((window or 0) // 4, 1)
+        if window is not None and window <= max([r.horizon for r in self.rules], default=0):
+            raise ValueError(f"window of {window} frames is shorter than an event rule horizon")
+        self.spill = SegmentDirectory(spill, clear=True) if isinstance(spill, (str, Path)) else spill
+        self.spilled_frames = 0
+        self._evict_at = (window or 0) + self.spill_every
+        self._settled: List[Deque[Event]] = [deque(maxlen=MAX_SETTLED_EVENTS) for _ in self.rules]
+        self._dropping_events = False
+
+    @property
+    def frames(self) -> FrameStore:
+        """Frames in memory as a lazy ``Sequence[FrameData]`` (columns via ``.store``)."""
+        return self.store
+
+    @property
+    def poses(self) -> PoseClip:
+        return self.store.poses
+
+    @property
+    def total_frames(self) -> int:
+        return self.spilled_frames + len(self.store)
 
     def add_frame(self,
                   frame_id: int,
                   detections: Optional[List[dict]] = None,
-                  pose: Optional[List[dict]] = None,
+                  pose: Union[np.ndarray, List[dict], None] = None,
                   ocr: Optional[dict] = None,
-                  timestamp: Optional[datetime] = None):
+                  timestamp: Optional[datetime] = None,
+                  sanitize: bool = False):
         """
         Add a single frame's data from modules.
 
         Parameters
         ----------
         detections : list of dict produced by detection module
-        pose       : list of keypoint dicts
+        pose       : packed (33, 4) pose array, or list of keypoint dicts
         ocr        : dict of region_name -> text
+        sanitize   : drop degenerate / NaN boxes and clamp confidences
+                     instead of raising ``ValueError`` on them
         """
-        fd = FrameData(
-            frame_id=frame_id,
-            timestamp=timestamp or datetime.utcnow(),
-            detections=[DetectionObject(**d) for d in (detections or [])],
-            pose=PoseFrame(keypoints=[k for k in (pose or [])]) if pose else None,
-            ocr=[OCRField(region=k, text=v) for k, v in (ocr or {}).items()]
-        )
-        self.frames.append(fd)
-
-    # Example: derive simple events
-    def generate_contact_events(self, iou_thres: float = 0.2) -> List[Event]:
-        events = []
-        for f in self.frames:
-            balls = [d for d in f.detections if d.class_id == 0]
-            bats = [d for d in f.detections if d.class_id == 1]
-            for ball in balls:
-                for bat in bats:
-                    iou = self._bbox_iou(ball.bbox, bat.bbox)
-                    if iou > iou_thres:
-                        events.append(Event(
-                            type="contact",
-                            frame_start=f.frame_id,
-                            frame_end=f.frame_id,
-                            metadata={"iou": iou,
-                                      "ball_track": ball.track_id,
-                                      "bat_track": bat.track_id}
-                        ))
+        self.store.append(frame_id, timestamp or datetime.utcnow(), detections,
+                          pose if isinstance(pose, np.ndarray) or pose else None, ocr,
+                          sanitize=sanitize)
+        if self.window is not None and len(self.store) >= self._evict_at:
+            self._evict(len(self.store) - self.window)
+
+    # ---------------- Retention -----------------
+    def _settle(self, cut: int) -> int:
+        """Keep events that end well before *cut*; return the cut moved before any open event.
+
+        The cut moves back at most one window, so memory stays bounded even
+        if an event never ends; an event still open at such a forced cut is
+        kept as detected so far and its remainder reported separately.
+        """
+        ids = self.store.frame_ids
+        floor = max(cut - self.window, 0)
+        runs = []
+        for rule in self.rules:
+            events = EventEngine([rule]).run_rule(rule, self.store)
+            first = np.searchsorted(ids, [e.frame_start for e in events]).astype(np.int64)
+            last = np.searchsorted(ids, [e.frame_end for e in events]).astype(np.int64)
+            runs.append((rule, events, first, last))
+        moved = True
+        while moved:
+            moved = False
+            for rule, _, first, last in runs:
+                still_open = (first < cut) & (last + rule.horizon >= cut)
+                if still_open.any() and max(int(first[still_open].min()), floor) < cut:
+                    cut, moved = max(int(first[still_open].min()), floor), True
+        for settled, (_, events, first, last) in zip(self._settled, runs):
+            for e, f, l in zip(events, first, last):
+                if l + 1 > cut > f:
+                    logger.warning("%s event from frame %d is longer than the window; split at frame %d",
+                                   e.type, e.frame_start, ids[cut])
+                if f < cut:
+                    if len(settled) == settled.maxlen and not self._dropping_events:
+                        self._dropping_events = True
+                        logger.warning("More than %d settled %s events; dropping the oldest "
+                                       "(spill to a directory to keep them)", settled.maxlen, e.type)
+                    settled.append(e)
+        return cut
+
+    def _evict(self, cut: int):
+        cut = self._settle(cut)
+        if cut > 0:
+            head = self.store.take(0, cut)
+            self.store = self.store.take(cut, len(self.store))
+            self.spilled_frames += cut
+            if isinstance(self.spill, SegmentDirectory):
+                self.spill.write(head, [(k, e) for k, settled in enumerate(self._settled) for e in settled])
+                for settled in self._settled:
+                    settled.clear()
+            elif self.spill is not None:
+                self.spill(head)
+            logger.debug("Spilled %d frames (%d total), %d kept in memory",
+                         cut, self.spilled_frames, len(self.store))
+        self._evict_at = max(len(self.store), self.window) + self.spill_every
+
+    def history_stores(self) -> Iterator[FrameStore]:
+        """Spilled segments (oldest first), then the in-memory window."""
+        if isinstance(self.spill, SegmentDirectory):
+            yield from self.spill.stores()
+        elif self.spilled_frames:
+            logger.warning("%d spilled frames cannot be read back from %r", self.spilled_frames, self.spill)
+        yield self.store
+
+    def history(self) -> Iterator[FrameData]:
+        """Every frame of the session, one segment in memory at a time."""
+        for store in self.history_stores():
+            yield from store
+
+    def history_events(self, rule: Optional[int] = None) -> Iterator[Event]:
+        """Settled events (spilled ones first, oldest first), optionally of ``self.rules[rule]`` only."""
+        if isinstance(self.spill, SegmentDirectory):
+            for k, event in self.spill.events():
+                if rule is None or k == rule:
+                    yield event
+        for k, settled in enumerate(self._settled):
+            if rule is None or k == rule:
+                yield from settled
+
+    # ---------------- Events -----------------
+    def pose_frame(self, frame_id: int) -> Optional[PoseFrame]:
+        """Validated ``PoseFrame`` for *frame_id*, built on demand."""
+        arr = self.poses.get(frame_id)
+        return PoseFrame.from_array(arr) if arr is not None else None
+
+    def events(self) -> List[Event]:
+        """Events of ``self.rules`` over the whole session: settled ones plus the window's."""
+        events = list(self.history_events()) + EventEngine(self.rules).run(self.store)
+        events.sort(key=lambda ev: (ev.frame_start, ev.type))
         return events
 
-    @staticmethod
-    def _bbox_iou(b1, b2) -> float:
-        xx1 = max(b1.x1, b2.x1)
-        yy1 = max(b1.y1, b2.y1)
-        xx2 = min(b1.x2, b2.x2)
-        yy2 = min(b1.y2, b2.y2)
-        w = max(0.0, xx2 - xx1)
-        h = max(0.0, yy2 - yy1)
-        inter = w * h
-        union = b1.width * b1.height + b2.width * b2.height - inter + 1e-6
-        return inter / union
+    def generate_events(self, rules: Optional[Sequence[Rule]] = None) -> List[Event]:
+        """Whole-game events for *rules* (see ``integration.events``).
+
+        Rules other than ``self.rules`` only see the in-memory window once
+        frames have been spilled.
+        """
+        if rules is None or list(rules) == self.rules:
+            return self.events()
+        if self.spilled_frames:
+            logger.warning("Rules not registered with the aggregator only see the last %d frames", len(self.store))
+        return EventEngine(rules).run(self.store)
+
+    def generate_contact_events(self, iou_thres: float = 0.2, max_gap: int = 1) -> List[Event]:
+        """Ball–bat contact events; consecutive contact frames form one event."""
+        for k, rule in enumerate(self.rules):
+            if isinstance(rule, ContactRule) and (rule.iou_threshold, rule.max_gap) == (iou_thres, max_gap):
+                return list(self.history_events(k)) + EventEngine([rule]).run_rule(rule, self.store)
+        return self.generate_events([ContactRule(iou_threshold=iou_thres, max_gap=max_gap)])
@@ -0,0 +1,193 @@
+"""
+events.py
+
+Vectorized, whole-game event extraction over a :class:`FrameStore`.
+
+Every rule turns the detection columns into *hits* (frame, score, per-hit
+metadata) with batched array operations — no per-frame Python loop.
+:class:`EventEngine` then keeps the best hit per frame and merges runs of
+consecutive hit frames (gaps up to ``max_gap`` frames are bridged) into
+one :class:`Event` spanning ``frame_start``..``frame_end``.
+
+Rules
+-----
+ContactRule        ball–bat IoU above a threshold
+PlateCrossingRule  ball centre inside the plate zone
+CatchRule          ball centre inside a fielder box, after which the ball
+                   is not seen again for a few frames
+
+Example
+-------
+>>> engine = EventEngine([ContactRule(), PlateCrossingRule(zone=(900, 600, 1020, 720))])
+>>> events = engine.run(aggregator.store)
+"""
+
+from __future__ import annotations
+import abc
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from detection.pairs import BALL, BAT, PLAYER, box_centers, contact_pairs, paired_iou, same_frame_pairs
+from .frame_store import FrameStore
+from .schema import Event
+
+# ---------------- rules ----------------
+@dataclass
+class Hits:
+    """Rule output: one entry per qualifying detection (pair)."""
+    frame_index: np.ndarray
+    score: np.ndarray
+    metadata: Dict[str, np.ndarray] = field(default_factory=dict)
+
+def _track_or_none(v) -> Optional[int]:
+    return int(v) if v >= 0 else None
+
+class Rule(abc.ABC):
+    """Base class: ``hits`` finds qualifying frames, ``accept`` vets the merged runs."""
+    type = "event"
+    score_name = "score"
+    max_gap = 0       # missing frames bridged inside one event
+    min_frames = 1    # shortest run (first to last frame) reported
+
+    @property
+    def horizon(self) -> int:
+        """Frames after a run's last hit that can still extend it or change ``accept``."""
+        return self.max_gap + 1
+
+    @abc.abstractmethod
+    def hits(self, store: FrameStore) -> Hits:
+        """Qualifying detections (pairs) of *store*."""
+
+    def accept(self, store: FrameStore, first: np.ndarray, last: np.ndarray) -> np.ndarray:
+        """Boolean mask over runs given their first / last frame indices."""
+        return np.ones(first.shape, dtype=bool)
+
+class ContactRule(Rule):
+    """Ball–bat contact: IoU of same-frame ball and bat boxes above *iou_threshold*."""
+    type = "contact"
+    score_name = "iou"
+
+    def __init__(self, iou_threshold: float = 0.2, max_gap: int = 1,
+                 ball_class: int = BALL, bat_class: int = BAT):
+        self.iou_threshold = iou_threshold
+        self.max_gap = max_gap
+        self.ball_class = ball_class
+        self.bat_class = bat_class
+
+    def hits(self, store):
+        a, b, iou = contact_pairs(store.det_frame_index, store.det_class_id, store.det_bbox,
+                                  self.iou_threshold, self.ball_class, self.bat_class)
+        tracks = store.det_track_id
+        return Hits(store.det_frame_index[a], iou,
+                    {"ball_track": tracks[a], "bat_track": tracks[b]})
+
+class PlateCrossingRule(Rule):
+    """Ball centre inside the home-plate *zone* (x1, y1, x2, y2, frame pixels)."""
+    type = "plate_crossing"
+    score_name = "confidence"
+
+    def __init__(self, zone: Sequence[float], max_gap: int = 1, min_frames: int = 1,
+                 ball_class: int = BALL):
+        self.zone = np.asarray(zone, dtype=np.float32)
+        self.max_gap = max_gap
+        self.min_frames = min_frames
+        self.ball_class = ball_class
+
+    def hits(self, store):
+        balls = np.flatnonzero(store.det_class_id == self.ball_class)
+        c = box_centers(store.det_bbox[balls])
+        x1, y1, x2, y2 = self.zone
+        inside = (c[:, 0] >= x1) & (c[:, 0] <= x2) & (c[:, 1] >= y1) & (c[:, 1] <= y2)
+        rows = balls[inside]
+        return Hits(store.det_frame_index[rows], store.det_conf[rows],
+                    {"ball_track": store.det_track_id[rows]})
+
+class CatchRule(Rule):
+    """Ball centre inside a fielder box, then no ball detected for *vanish_frames* frames."""
+    type = "catch"
+    score_name = "confidence"
+
+    def __init__(self, vanish_frames: int = 5, max_gap: int = 1,
+                 ball_class: int = BALL, player_class: int = PLAYER):
+        self.vanish_frames = vanish_frames
+        self.max_gap = max_gap
+        self.ball_class = ball_class
+        self.player_class = player_class
+
+    @property
+    def horizon(self):
+        return max(self.max_gap, self.vanish_frames) + 1
+
+    def hits(self, store):
+        cls, bbox = store.det_class_id, store.det_bbox
+        a, b = same_frame_pairs(store.det_frame_index, np.flatnonzero(cls == self.ball_class),
+                                np.flatnonzero(cls == self.player_class))
+        c = box_centers(bbox[a])
+        pb = bbox[b]
+        inside = (c[:, 0] >= pb[:, 0]) & (c[:, 0] <= pb[:, 2]) & (c[:, 1] >= pb[:, 1]) & (c[:, 1] <= pb[:, 3])
+        a, b = a[inside], b[inside]
+        return Hits(store.det_frame_index[a], store.det_conf[a],
+                    {"ball_track": store.det_track_id[a], "player_track": store.det_track_id[b]})
+
+    def accept(self, store, first, last):
+        ball_frames = np.unique(store.det_frame_index[store.det_class_id == self.ball_class])
+        lo = np.searchsorted(ball_frames, last, side="right")
+        hi = np.searchsorted(ball_frames, last + self.vanish_frames, side="right")
+        return (last + self.vanish_frames < len(store)) & (hi == lo)
+
+# ---------------- engine ----------------
+def merge_runs(frames: np.ndarray, max_gap: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Sorted unique frame indices → (run starts, run ends) positions into *frames*."""
+    if frames.size == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    breaks = np.flatnonzero(np.diff(frames) > max_gap + 1)
+    starts = np.concatenate([[0], breaks + 1])
+    ends = np.concatenate([breaks, [frames.size - 1]])
+    return starts, ends
+
+class EventEngine:
+    """Run *rules* over a whole :class:`FrameStore` and merge hits into events."""
+
+    def __init__(self, rules: Sequence[Rule]):
+        self.rules = list(rules)
+
+    def run_rule(self, rule: Rule, store: FrameStore) -> List[Event]:
+        hits = rule.hits(store)
+        if hits.frame_index.size == 0:
+            return []
+        # best hit per frame: sort by (frame, -score), keep the first of every frame
+        order = np.lexsort((-hits.score, hits.frame_index))
+        fidx = hits.frame_index[order]
+        is_first = np.concatenate([[True], fidx[1:] != fidx[:-1]])
+        best = order[is_first]
+        frames = hits.frame_index[best]
+        starts, ends = merge_runs(frames, rule.max_gap)
+        # peak hit of every run via a segmented argmax on the per-frame best scores
+        scores = hits.score[best]
+        run_max = np.maximum.reduceat(scores, starts)
+        run_id = np.repeat(np.arange(starts.size), ends - starts + 1)
+        cand = np.flatnonzero(scores == run_max[run_id])
+        peak = cand[np.searchsorted(cand, starts)]  # first peak at or after each run start
+
+        first, last = frames[starts], frames[ends]
+        keep = (last - first + 1 >= rule.min_frames) & rule.accept(store, first, last)
+
+        ids = store.frame_ids
+        events = []
+        for s, e, p in zip(starts[keep], ends[keep], peak[keep]):
+            h = best[p]
+            meta = {rule.score_name: float(hits.score[h]),
+                    "peak_frame": int(ids[frames[p]]),
+                    "frames": int(e - s + 1)}
+            for k, col in hits.metadata.items():
+                meta[k] = _track_or_none(col[h]) if k.endswith("_track") else col[h].item()
+            events.append(Event(type=rule.type, frame_start=int(ids[frames[s]]),
+                                frame_end=int(ids[frames[e]]), metadata=meta))
+        return events
+
+    def run(self, store: FrameStore) -> List[Event]:
+        events = [ev for rule in self.rules for ev in self.run_rule(rule, store)]
+        events.sort(key=lambda ev: (ev.frame_start, ev.type))
+        return events
@@ -1,61 +1,423 @@
 """
 exporter.py
 
-Export integrated data to JSON / CSV / Excel and expose an optional FastAPI router.
+Export integrated data to JSON / JSON Lines / Parquet / CSV / Excel and expose an optional FastAPI router.
+
+Exporters read the columns of a :class:`FrameStore` directly (a plain list of
+``FrameData`` is converted first); keypoint dicts are only built here, at
+the output boundary.
 """
 
 from __future__ import annotations
+import gzip
+import io
 import json
-from typing import List
+import shutil
+import time
+from datetime import datetime
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Union
 from pathlib import Path
+import numpy as np
 import pandas as pd
 from fastapi import APIRouter
 from .schema import FrameData, Event
+from .frame_store import FrameStore, as_frame_store
+from pose.keypoints import PoseClip, LANDMARK_NAMES, NUM_LANDMARKS
 import logging
 
 logger = logging.getLogger(__name__)
 
-def frames_to_dataframe(frames: List[FrameData]) -> pd.DataFrame:
-    rows = []
-    for f in frames:
-        for det in f.detections:
-            rows.append({
-                "frame_id": f.frame_id,
-                "timestamp": f.timestamp.isoformat(),
-                "class_id": det.class_id,
-                "track_id": det.track_id,
-                "x1": det.bbox.x1,
-                "y1": det.bbox.y1,
-                "x2": det.bbox.x2,
-                "y2": det.bbox.y2,
-                "conf": det.confidence
-            })
-    return pd.DataFrame(rows)
-
-def export_json(data: List[FrameData], path: str):
+try:
+    import zstandard
+except ImportError:  # optional, only for .zst JSON Lines
+    zstandard = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as pads
+    import pyarrow.parquet as pq
+except ImportError:  # optional, only for Parquet export
+    pa = pads = pq = None
+
+Frames = Union[FrameStore, Iterable[FrameData]]
+
+def frames_to_dataframe(frames: Frames) -> pd.DataFrame:
+    """One row per detection."""
+    return as_frame_store(frames).detections_dataframe()
+
+def pose_to_dataframe(poses: PoseClip) -> pd.DataFrame:
+    """Long-format pose table (one row per frame × landmark), built from the packed array."""
+    arr = poses.array
+    flat = arr.reshape(-1, 4)
+    df = pd.DataFrame({
+        "frame_id": np.repeat(poses.frame_ids, NUM_LANDMARKS),
+        "landmark": np.tile(np.arange(NUM_LANDMARKS), len(arr)),
+        "x": flat[:, 0], "y": flat[:, 1], "z": flat[:, 2], "visibility": flat[:, 3],
+    })
+    df = df[~np.isnan(flat[:, 0])].reset_index(drop=True)
+    df["landmark"] = pd.Categorical.from_codes(df["landmark"], categories=list(LANDMARK_NAMES))
+    return df
+
+def _json_default(o: Any):
+    if isinstance(o, datetime):
+        return o.isoformat()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+def frame_records(frames: Frames, poses: Optional[PoseClip] = None) -> List[Dict[str, Any]]:
+    """JSON-ready dicts (``FrameData.dict()`` layout) read from the columns.
+
+    Poses come from *poses* when given, else from the store itself.
+    """
+    return list(as_frame_store(frames).records(poses))
+
+def export_json(data: Frames, path: str, poses: Optional[PoseClip] = None):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(frame_records(data, poses), f,
+                  ensure_ascii=False, indent=2, default=_json_default)
+    logger.info("Exported JSON to %s", path)
+
+def export_json_stores(stores: Iterable[FrameStore], path: str):
+    """Same file as :func:`export_json`, written one store at a time.
+
+    For spilled sessions (``StreamAggregator.history_stores()``): only one
+    segment is in memory while the array is streamed out.
+    """
     Path(path).parent.mkdir(parents=True, exist_ok=True)
+    first = True
     with open(path, "w", encoding="utf-8") as f:
-        json.dump([d.dict() for d in data], f, ensure_ascii=False, indent=2)
+        f.write("[")
+        for store in stores:
+            for rec in store.records():
+                text = json.dumps(rec, ensure_ascii=False, indent=2, default=_json_default)
+                f.write(("\n" if first else ",\n") + "  " + text.replace("\n", "\n  "))
+                first = False
+        f.write("]" if first else "\n]")
     logger.info("Exported JSON to %s", path)
 
-def export_csv(frames: List[FrameData], path: str):
+# ------------- JSON Lines (streaming) ---------------
+def _compression_for(path: Union[str, Path], compression: Optional[str]) -> Optional[str]:
+    if compression != "auto":
+        return compression
+    suffix = Path(path).suffix.lower()
+    return {".gz": "gzip", ".zst": "zstd"}.get(suffix)
+
+def _open_binary(path: Union[str, Path], mode: str, compression: Optional[str]) -> IO[bytes]:
+    if compression == "gzip":
+        return gzip.open(path, mode + "b", compresslevel=6)
+    if compression == "zstd":
+        if zstandard is None:
+            raise ImportError("zstd compression requires the 'zstandard' package")
+        raw = open(path, mode + "b")
+        if mode == "w":
+            return zstandard.ZstdCompressor(level=3).stream_writer(raw, closefd=True)
+        return zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+    if compression is None:
+        return open(path, mode + "b")
+    raise ValueError(f"unknown compression {compression!r}, expected None, 'gzip' or 'zstd'")
+
+class JSONLinesWriter:
+    """Append one compact JSON record per frame as frames arrive.
+
+    Memory stays bounded (nothing is kept after a record is written) and the
+    file is flushed every *flush_every* records or *flush_interval* seconds,
+    so partial results are readable while a game is still processing —
+    compressed streams are sync-flushed, so a reader sees every complete
+    block.
+
+    Parameters
+    ----------
+    compression : None, 'gzip', 'zstd' or 'auto' (from the suffix: .gz / .zst)
+    """
+
+    def __init__(self,
+                 path: Union[str, Path],
+                 compression: Optional[str] = "auto",
+                 flush_every: int = 300,
+                 flush_interval: float = 5.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.compression = _compression_for(path, compression)
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.records = 0
+        self._fh = _open_binary(self.path, "w", self.compression)
+        self._since_flush = 0
+        self._last_flush = time.monotonic()
+
+    def write(self, record: Union[FrameData, Dict[str, Any]]):
+        if isinstance(record, FrameData):
+            record = record.dict()
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=_json_default)
+        self._fh.write(line.encode("utf-8") + b"\n")
+        self.records += 1
+        self._since_flush += 1
+        if self._since_flush >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def write_frames(self, frames: Frames, start: int = 0) -> int:
+        """Write frames ``start:`` of a store (or list) and return the new end position."""
+        store = as_frame_store(frames)
+        for i in range(start, len(store)):
+            self.write(store.record(i))
+        return len(store)
+
+    def flush(self):
+        if self.compression == "zstd":
+            self._fh.flush(zstandard.FLUSH_BLOCK)
+        else:
+            self._fh.flush()  # GzipFile.flush() is a Z_SYNC_FLUSH
+        self._since_flush = 0
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        if self._fh is not None:
+            self.flush()
+            self._fh.close()
+            self._fh = None
+            logger.info("Exported %d JSON Lines records to %s", self.records, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def read_jsonl(path: Union[str, Path],
+               compression: Optional[str] = "auto",
+               raw: bool = False) -> Iterator[Union[FrameData, Dict[str, Any]]]:
+    """Stream ``FrameData`` (or plain dicts with *raw*) from a JSON Lines file, one line at a time.
+
+    A file still being written (compressed stream without its trailer, or a
+    last line without newline) is read up to its last complete record.
+    """
+    with _open_binary(path, "r", _compression_for(path, compression)) as fh:
+        lines = io.TextIOWrapper(fh, encoding="utf-8")
+        while True:
+            try:
+                line = lines.readline()
+            except EOFError:  # truncated compressed stream
+                return
+            if not line.endswith("\n"):
+                return
+            if line.strip():
+                rec = json.loads(line)
+                yield rec if raw else FrameData(**rec)
+
+# ------------- Parquet (columnar, partitioned) ---------------
+PARQUET_TABLES = ("detections", "pose", "ocr")
+PARQUET_MODES = ("overwrite", "append")
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("Parquet export requires the 'pyarrow' package")
+
+def _dictionary(codes: np.ndarray, values: List[str]):
+    return pa.DictionaryArray.from_arrays(pa.array(codes, type=pa.int32()), pa.array(values, type=pa.string()))
+
+def store_tables(store: FrameStore, start: int = 0, stop: Optional[int] = None) -> Dict[str, "pa.Table"]:
+    """Arrow tables of frames ``start:stop`` built straight from the store columns.
+
+    String columns (OCR region / text, pose landmark) are dictionary-encoded.
+    """
+    _require_pyarrow()
+    stop = len(store) if stop is None else stop
+    frame_ids = store.frame_ids
+
+    lo, hi = store.det_offsets[start], store.det_offsets[stop]
+    fidx = store.det_frame_index[lo:hi]
+    bbox = store.det_bbox[lo:hi]
+    track = store.det_track_id[lo:hi]
+    detections = pa.table({
+        "frame_id": pa.array(frame_ids[fidx]),
+        "timestamp": pa.array(store.timestamps[fidx]),
+        "class_id": pa.array(store.det_class_id[lo:hi]),
+        "track_id": pa.array(track, mask=track < 0),
+        "x1": bbox[:, 0], "y1": bbox[:, 1], "x2": bbox[:, 2], "y2": bbox[:, 3],
+        "conf": pa.array(store.det_conf[lo:hi]),
+    })
+
+    arr = store.poses.array[start:stop]
+    flat = arr.reshape(-1, 4)
+    valid = ~np.isnan(flat[:, 0])
+    pose = pa.table({
+        "frame_id": pa.array(np.repeat(frame_ids[start:stop], NUM_LANDMARKS)[valid]),
+        "landmark": _dictionary(np.tile(np.arange(NUM_LANDMARKS, dtype=np.int32), len(arr))[valid],
+                                list(LANDMARK_NAMES)),
+        "x": flat[valid, 0], "y": flat[valid, 1], "z": flat[valid, 2], "visibility": flat[valid, 3],
+    })
+
+    olo, ohi = store.ocr_offsets[start], store.ocr_offsets[stop]
+    ofidx = np.repeat(np.arange(start, stop), np.diff(store.ocr_offsets[start:stop + 1]))
+    ocr = pa.table({
+        "frame_id": pa.array(frame_ids[ofidx]),
+        "region": _dictionary(store.ocr_region[olo:ohi], store.strings),
+        "text": _dictionary(store.ocr_text[olo:ohi], store.strings),
+    })
+    return {"detections": detections, "pose": pose, "ocr": ocr}
+
+class ParquetExporter:
+    """Append frames of a game to Hive-partitioned Parquet tables.
+
+    Layout: ``<root>/<table>/game=<game_id>/inning=<n>/part-<k>.parquet`` for
+    the detection, pose and OCR tables.  Every :meth:`append` call writes the
+    frames added to the store since the previous call as new row groups of
+    the current inning's files; a new inning opens new files (inning 0 =
+    unknown, e.g. when no scoreboard is OCR'd).  Frame ids
+    grow monotonically, so row-group min/max statistics let readers skip
+    row groups outside a frame range.
+
+    Parameters
+    ----------
+    compression : Parquet codec ('zstd', 'snappy', 'gzip', 'lz4', 'none')
+    mode        : 'overwrite' removes the game's existing partitions (e.g.
+                  from a previous run on the same video) before the first
+                  write, so a re-export never duplicates rows; 'append'
+                  adds files next to them
+    """
+
+    def __init__(self, root: Union[str, Path], game_id: str, compression: str = "zstd",
+                 compression_level: Optional[int] = None, mode: str = "overwrite"):
+        _require_pyarrow()
+        if mode not in PARQUET_MODES:
+            raise ValueError(f"mode must be one of {PARQUET_MODES}")
+        self.root = Path(root)
+        self.game_id = game_id
+        self.mode = mode
+        self.compression = compression
+        self.compression_level = compression_level
+        self.position = 0  # frames written so far
+        self._last_id: Optional[int] = None
+        self._inning: Optional[int] = None
+        self._writers: Dict[str, "pq.ParquetWriter"] = {}
+        self._cleared = mode == "append"
+
+    def _open(self, inning: int, tables: Dict[str, "pa.Table"]):
+        self._close_writers()
+        if not self._cleared:
+            for name in tables:
+                shutil.rmtree(self.root / name / f"game={self.game_id}", ignore_errors=True)
+            self._cleared = True
+        for name, table in tables.items():
+            part = self.root / name / f"game={self.game_id}" / f"inning={inning}"
+            part.mkdir(parents=True, exist_ok=True)
+            path = part / f"part-{len(list(part.glob('part-*.parquet'))):05d}.parquet"
+            self._writers[name] = pq.ParquetWriter(path, table.schema, compression=self.compression,
+                                                   compression_level=self.compression_level,
+                                                   use_dictionary=True, write_statistics=True)
+        self._inning = inning
+
+    def _start(self, store: FrameStore) -> int:
+        # tracked by frame id, so a store whose oldest frames were spilled still lines up
+        if self._last_id is None:
+            return 0
+        return int(np.searchsorted(store.frame_ids, self._last_id, side="right"))
+
+    def pending(self, store: FrameStore) -> int:
+        """Frames of *store* not written yet."""
+        return len(store) - self._start(store)
+
+    def append(self, store: FrameStore, inning: int = 0) -> int:
+        """Write the frames added since the last call; returns the number written.
+
+        *inning* 0 means unknown.
+        """
+        start, stop = self._start(store), len(store)
+        if stop == start:
+            return 0
+        tables = store_tables(store, start, stop)
+        if inning != self._inning or not self._writers:
+            self._open(inning, tables)
+        for name, table in tables.items():
+            self._writers[name].write_table(table)
+        self._last_id = int(store.frame_ids[stop - 1])
+        self.position += stop - start
+        return stop - start
+
+    def _close_writers(self):
+        for w in self._writers.values():
+            w.close()
+        self._writers = {}
+
+    def close(self):
+        self._close_writers()
+        logger.info("Exported %d frames of game %s to Parquet under %s", self.position, self.game_id, self.root)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def export_parquet(frames: Frames, root: Union[str, Path], game_id: str,
+                   compression: str = "zstd", inning: int = 0, mode: str = "overwrite"):
+    """One-shot Parquet export of a whole store (see :class:`ParquetExporter`)."""
+    with ParquetExporter(root, game_id, compression, mode=mode) as exporter:
+        exporter.append(as_frame_store(frames), inning)
+
+def read_parquet(root: Union[str, Path],
+                 table: str = "detections",
+                 game_id: Optional[str] = None,
+                 innings: Optional[Iterable[int]] = None,
+                 class_ids: Optional[Iterable[int]] = None,
+                 frame_range: Optional[tuple] = None,
+                 columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Load a Parquet table with filters pushed down to the files.
+
+    Game / inning filters prune partitions (directories are never opened);
+    ``class_ids`` and ``frame_range`` (inclusive start, exclusive stop) are
+    evaluated against row-group statistics before any data is decoded.
+    """
+    _require_pyarrow()
+    if table not in PARQUET_TABLES:
+        raise ValueError(f"table must be one of {PARQUET_TABLES}")
+    # explicit partition types: a numeric game stem (e.g. "20240501") must stay a string
+    partitioning = pads.partitioning(pa.schema([("game", pa.string()), ("inning", pa.int32())]), flavor="hive")
+    dataset = pads.dataset(Path(root) / table, format="parquet", partitioning=partitioning)
+    expr = None
+    def _and(e):
+        nonlocal expr
+        expr = e if expr is None else expr & e
+    if game_id is not None:
+        _and(pads.field("game") == str(game_id))
+    if innings is not None:
+        _and(pads.field("inning").isin(list(innings)))
+    if class_ids is not None:
+        _and(pads.field("class_id").isin(list(class_ids)))
+    if frame_range is not None:
+        lo, hi = frame_range
+        if lo is not None:
+            _and(pads.field("frame_id") >= lo)
+        if hi is not None:
+            _and(pads.field("frame_id") < hi)
+    return dataset.to_table(columns=columns, filter=expr).to_pandas()
+
+def export_csv(frames: Frames, path: str, poses: Optional[PoseClip] = None):
     df = frames_to_dataframe(frames)
     Path(path).parent.mkdir(parents=True, exist_ok=True)
     df.to_csv(path, index=False)
+    if poses is not None:
+        pose_path = Path(path).with_name(f"{Path(path).stem}_pose.csv")
+        pose_to_dataframe(poses).to_csv(pose_path, index=False)
     logger.info("Exported CSV to %s", path)
 
-def export_excel(frames: List[FrameData], path: str):
+def export_excel(frames: Frames, path: str, poses: Optional[PoseClip] = None):
     df = frames_to_dataframe(frames)
     Path(path).parent.mkdir(parents=True, exist_ok=True)
-    df.to_excel(path, index=False)
+    if poses is None:
+        df.to_excel(path, index=False)
+    else:
+        with pd.ExcelWriter(path) as writer:
+            df.to_excel(writer, sheet_name="detections", index=False)
+            pose_to_dataframe(poses).to_excel(writer, sheet_name="pose", index=False)
     logger.info("Exported Excel to %s", path)
 
 # ------------- FastAPI Router ---------------
-def create_router(frames: List[FrameData]) -> APIRouter:
+def create_router(frames: Frames, poses: Optional[PoseClip] = None) -> APIRouter:
     router = APIRouter()
 
     @router.get("/frames")
     async def get_frames():
-        return [f.dict() for f in frames]
+        return frame_records(frames, poses)
 
     return router
@@ -0,0 +1,430 @@
+"""
+frame_store.py
+
+Columnar (struct-of-arrays) storage for aggregated frame data.
+
+A 3-hour game at 60 fps is ~650k frames; as nested pydantic models that is
+millions of validated objects.  :class:`FrameStore` keeps the same content in
+flat numpy columns instead:
+
+* per frame      : ``frame_ids``, ``timestamps``, plus offsets into the
+                   detection / OCR columns (CSR layout: the detections of
+                   frame *i* are rows ``det_offsets[i]:det_offsets[i + 1]``)
+* per detection  : ``det_bbox`` (M, 4) xyxy, ``det_conf``, ``det_class_id``,
+                   ``det_track_id`` (-1 = untracked)
+* per OCR reading: ``ocr_region`` / ``ocr_text`` codes into a shared string
+                   table (``strings``)
+* poses          : a :class:`pose.keypoints.PoseClip`
+
+:meth:`FrameStore.take` copies a frame range into a self-contained store
+(offsets rebased, string table compacted) and :meth:`FrameStore.save` /
+:meth:`FrameStore.load` persist one as a single ``.npz`` segment; the
+aggregator uses both to spill old frames out of memory.
+
+The store is a read-only ``Sequence[FrameData]``: indexing builds the
+pydantic ``FrameData`` for that frame on demand, so existing consumers keep
+working while bulk consumers (exporters, event rules) read the columns.
+"""
+
+from __future__ import annotations
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union, overload
+
+import numpy as np
+import pandas as pd
+
+from .schema import Event, FrameData, trusted_frame
+from pose.keypoints import PoseClip, pack_keypoints, unpack_keypoints
+
+class _Column:
+    """Growable numpy column; appends are amortized O(1)."""
+
+    def __init__(self, dtype, shape: tuple = (), capacity: int = 256):
+        self._data = np.empty((capacity,) + shape, dtype=dtype)
+        self._n = 0
+
+    @classmethod
+    def from_array(cls, values: np.ndarray) -> "_Column":
+        col = cls(values.dtype, values.shape[1:], capacity=max(len(values), 1))
+        col.extend(values)
+        return col
+
+    def __len__(self) -> int:
+        return self._n
+
+    def _reserve(self, n: int):
+        if self._n + n > len(self._data):
+            cap = max(2 * len(self._data), self._n + n)
+            grown = np.empty((cap,) + self._data.shape[1:], dtype=self._data.dtype)
+            grown[:self._n] = self._data[:self._n]
+            self._data = grown
+
+    def append(self, value):
+        self._reserve(1)
+        self._data[self._n] = value
+        self._n += 1
+
+    def extend(self, values):
+        values = np.asarray(values)
+        self._reserve(len(values))
+        self._data[self._n:self._n + len(values)] = values
+        self._n += len(values)
+
+    @property
+    def data(self) -> np.ndarray:
+        return self._data[:self._n]
+
+def _bbox_xyxy(bbox: Any) -> List[float]:
+    """Detector ``[x1, y1, x2, y2]`` lists, ``{"x1": ...}`` dicts or BoundingBox objects."""
+    if isinstance(bbox, (list, tuple)):
+        return bbox
+    if isinstance(bbox, Mapping):
+        return [bbox["x1"], bbox["y1"], bbox["x2"], bbox["y2"]]
+    if hasattr(bbox, "x1"):
+        return [bbox.x1, bbox.y1, bbox.x2, bbox.y2]
+    return list(bbox)
+
+def _naive_utc(ts: datetime) -> datetime:
+    return ts.astimezone(timezone.utc).replace(tzinfo=None) if ts.tzinfo is not None else ts
+
+class FrameStore(Sequence[FrameData]):
+    """Struct-of-arrays frame storage with lazy ``FrameData`` views."""
+
+    def __init__(self):
+        self._frame_id = _Column(np.int64)
+        self._ts = _Column("datetime64[us]")
+        self._det_off = _Column(np.int64)
+        self._det_off.append(0)
+        self._det_bbox = _Column(np.float32, (4,), capacity=1024)
+        self._det_conf = _Column(np.float32, capacity=1024)
+        self._det_cls = _Column(np.int32, capacity=1024)
+        self._det_track = _Column(np.int64, capacity=1024)
+        self._ocr_off = _Column(np.int64)
+        self._ocr_off.append(0)
+        self._ocr_region = _Column(np.int32)
+        self._ocr_text = _Column(np.int32)
+        self.strings: List[str] = []
+        self._codes: Dict[str, int] = {}
+        self.poses = PoseClip()
+
+    # ---------------- Private helpers -----------------
+    def _code(self, s: str) -> int:
+        code = self._codes.get(s)
+        if code is None:
+            code = self._codes[s] = len(self.strings)
+            self.strings.append(s)
+        return code
+
+    # ---------------- Writing -----------------
+    def append(self,
+               frame_id: int,
+               timestamp: Optional[datetime] = None,
+               detections: Optional[Iterable[Mapping[str, Any]]] = None,
+               pose: Union[np.ndarray, Iterable[Any], None] = None,
+               ocr: Optional[Mapping[str, str]] = None,
+               sanitize: bool = False):
+        """Append one frame.
+
+        Detections are read into one array in a single pass and checked
+        column-wise (positive box size, confidence in [0, 1], NaN failing
+        both) instead of through per-object pydantic models.  An invalid
+        detection raises ``ValueError`` unless *sanitize* is set: then
+        degenerate or non-finite boxes are **dropped** and confidences
+        clamped to [0, 1] (NaN → 0), so a store fed with raw model output
+        still exports frames that load as ``FrameData``.
+        """
+        if detections:
+            # one row per detection: x1 y1 x2 y2 conf class track (float64 holds the ids exactly)
+            rows = np.array([(*_bbox_xyxy(d["bbox"]), d["confidence"], d["class_id"],
+                              -1 if d.get("track_id") is None else d["track_id"]) for d in detections],
+                            dtype=np.float64).reshape(-1, 7)
+            conf = rows[:, 4]
+            ok = (rows[:, 2] > rows[:, 0]) & (rows[:, 3] > rows[:, 1])  # False for NaN too
+            if not (ok.all() and ((conf >= 0) & (conf <= 1)).all()):
+                if not sanitize:
+                    if not ok.all():
+                        raise ValueError(f"frame {frame_id}: bbox x2/y2 must be greater than x1/y1")
+                    raise ValueError(f"frame {frame_id}: confidence must be within [0, 1]")
+                rows = rows[ok]
+                np.clip(np.nan_to_num(rows[:, 4], copy=False), 0.0, 1.0, out=rows[:, 4])
+            self._det_bbox.extend(rows[:, :4])
+            self._det_conf.extend(rows[:, 4])
+            self._det_cls.extend(rows[:, 5])
+            self._det_track.extend(rows[:, 6])
+        self._det_off.append(len(self._det_conf))
+
+        for region, text in (ocr or {}).items():
+            self._ocr_region.append(self._code(region))
+            self._ocr_text.append(self._code(text))
+        self._ocr_off.append(len(self._ocr_region))
+
+        self._frame_id.append(frame_id)
+        self._ts.append(np.datetime64(_naive_utc(timestamp or datetime.utcnow()), "us"))
+        self.poses.append(frame_id, pose if isinstance(pose, np.ndarray) or pose is None
+                          else pack_keypoints(pose))
+
+    @classmethod
+    def from_frames(cls, frames: Iterable[FrameData]) -> "FrameStore":
+        """Columnar copy of a list of ``FrameData`` models (already validated)."""
+        store = cls()
+        for f in frames:
+            store.append(f.frame_id, f.timestamp,
+                         [d.dict() for d in f.detections],
+                         f.pose.to_array() if f.pose is not None else None,
+                         {o.region: o.text for o in f.ocr})
+        return store
+
+    # ---------------- Slicing / persistence -----------------
+    _COLUMNS = ("_frame_id", "_ts", "_det_off", "_det_bbox", "_det_conf", "_det_cls",
+                "_det_track", "_ocr_off", "_ocr_region", "_ocr_text")
+
+    @classmethod
+    def _from_columns(cls, cols: Mapping[str, np.ndarray], strings: Sequence[str],
+                      poses: np.ndarray) -> "FrameStore":
+        store = cls()
+        for name in cls._COLUMNS:
+            setattr(store, name, _Column.from_array(cols[name]))
+        store.strings = list(strings)
+        store._codes = {s: i for i, s in enumerate(store.strings)}
+        store.poses = PoseClip.from_arrays(poses, cols["_frame_id"])
+        return store
+
+    def take(self, start: int, stop: int) -> "FrameStore":
+        """Self-contained copy of frames ``start:stop``.
+
+        Offsets are rebased to zero and the string table is reduced to the
+        strings those frames use, so a long-running store does not drag its
+        whole history along.
+        """
+        start, stop, _ = slice(start, stop).indices(len(self))
+        stop = max(start, stop)
+        dlo, dhi = self.det_offsets[start], self.det_offsets[stop]
+        olo, ohi = self.ocr_offsets[start], self.ocr_offsets[stop]
+        used, codes = np.unique(np.concatenate([self.ocr_region[olo:ohi], self.ocr_text[olo:ohi]]),
+                                return_inverse=True)
+        n_ocr = ohi - olo
+        cols = {
+            "_frame_id": self.frame_ids[start:stop],
+            "_ts": self.timestamps[start:stop],
+            "_det_off": self.det_offsets[start:stop + 1] - dlo,
+            "_det_bbox": self.det_bbox[dlo:dhi],
+            "_det_conf": self.det_conf[dlo:dhi],
+            "_det_cls": self.det_class_id[dlo:dhi],
+            "_det_track": self.det_track_id[dlo:dhi],
+            "_ocr_off": self.ocr_offsets[start:stop + 1] - olo,
+            "_ocr_region": codes[:n_ocr].astype(np.int32),
+            "_ocr_text": codes[n_ocr:].astype(np.int32),
+        }
+        return self._from_columns(cols, [self.strings[c] for c in used.tolist()],
+                                  self.poses.array[start:stop])
+
+    def save(self, path: Union[str, Path], compress: bool = True) -> Path:
+        """Write the store to one ``.npz`` segment file (see :meth:`load`)."""
+        path = Path(path)
+        arrays = {name.lstrip("_"): getattr(self, name).data for name in self._COLUMNS}
+        (np.savez_compressed if compress else np.savez)(
+            path, strings=np.array(self.strings, dtype=np.str_), poses=self.poses.array, **arrays)
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "FrameStore":
+        with np.load(path, allow_pickle=False) as z:
+            cols = {name: z[name.lstrip("_")] for name in cls._COLUMNS}
+            return cls._from_columns(cols, z["strings"].tolist(), z["poses"])
+
+    # ---------------- Columns -----------------
+    @property
+    def frame_ids(self) -> np.ndarray:
+        return self._frame_id.data
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self._ts.data
+
+    @property
+    def det_offsets(self) -> np.ndarray:
+        return self._det_off.data
+
+    @property
+    def det_bbox(self) -> np.ndarray:
+        return self._det_bbox.data
+
+    @property
+    def det_conf(self) -> np.ndarray:
+        return self._det_conf.data
+
+    @property
+    def det_class_id(self) -> np.ndarray:
+        return self._det_cls.data
+
+    @property
+    def det_track_id(self) -> np.ndarray:
+        return self._det_track.data
+
+    @property
+    def det_frame_index(self) -> np.ndarray:
+        """Row → frame index (position in the store) for every detection."""
+        return np.repeat(np.arange(len(self)), np.diff(self.det_offsets))
+
+    @property
+    def det_frame_ids(self) -> np.ndarray:
+        return self.frame_ids[self.det_frame_index]
+
+    @property
+    def ocr_offsets(self) -> np.ndarray:
+        return self._ocr_off.data
+
+    @property
+    def ocr_region(self) -> np.ndarray:
+        return self._ocr_region.data
+
+    @property
+    def ocr_text(self) -> np.ndarray:
+        return self._ocr_text.data
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).data.nbytes for name in self._COLUMNS) + self.poses.nbytes
+
+    # ---------------- Sequence / lazy views -----------------
+    def __len__(self) -> int:
+        return len(self._frame_id)
+
+    @overload
+    def __getitem__(self, i: int) -> FrameData: ...
+    @overload
+    def __getitem__(self, i: slice) -> List[FrameData]: ...
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.frame(j) for j in range(*i.indices(len(self)))]
+        return self.frame(i)
+
+    def __iter__(self) -> Iterator[FrameData]:
+        for i in range(len(self)):
+            yield self.frame(i)
+
+    def index(self, frame_id: int) -> int:  # type: ignore[override]
+        """Position of *frame_id* (frame ids are appended in increasing order)."""
+        ids = self.frame_ids
+        i = int(np.searchsorted(ids, frame_id))
+        if i == len(ids) or ids[i] != frame_id:
+            raise ValueError(f"frame {frame_id} not in store")
+        return i
+
+    def frame(self, i: int) -> FrameData:
+        """Build the ``FrameData`` model of the frame at position *i* (trusted, no re-validation)."""
+        rec = self.record(i)
+        return trusted_frame(rec["frame_id"], rec["timestamp"], rec["detections"],
+                             rec["pose"]["keypoints"] if rec["pose"] is not None else None,
+                             {o["region"]: o["text"] for o in rec["ocr"]})
+
+    def record(self, i: int, poses: Optional[PoseClip] = None) -> Dict[str, Any]:
+        """Plain-dict frame (``FrameData.dict()`` layout) read straight from the columns."""
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        lo, hi = self.det_offsets[i], self.det_offsets[i + 1]
+        dets = [{"bbox": {"x1": x1, "y1": y1, "x2": x2, "y2": y2}, "confidence": conf,
+                 "class_id": cls, "track_id": None if tid < 0 else tid}
+                for (x1, y1, x2, y2), conf, cls, tid in zip(self.det_bbox[lo:hi].tolist(),
+                                                            self.det_conf[lo:hi].tolist(),
+                                                            self.det_class_id[lo:hi].tolist(),
+                                                            self.det_track_id[lo:hi].tolist())]
+        olo, ohi = self.ocr_offsets[i], self.ocr_offsets[i + 1]
+        ocr = [{"region": self.strings[r], "text": self.strings[t]}
+               for r, t in zip(self.ocr_region[olo:ohi].tolist(), self.ocr_text[olo:ohi].tolist())]
+        frame_id = int(self.frame_ids[i])
+        pose = poses.get(frame_id) if poses is not None else self._pose_at(i)
+        return {"frame_id": frame_id,
+                "timestamp": self.timestamps[i].astype(datetime),
+                "detections": dets,
+                "pose": {"keypoints": unpack_keypoints(pose)} if pose is not None else None,
+                "ocr": ocr}
+
+    def _pose_at(self, i: int) -> Optional[np.ndarray]:
+        arr = self.poses.array[i]
+        return None if np.isnan(arr[:, 0]).all() else arr
+
+    def records(self, poses: Optional[PoseClip] = None) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self)):
+            yield self.record(i, poses)
+
+    # ---------------- Tables -----------------
+    def detections_dataframe(self) -> pd.DataFrame:
+        """One row per detection, built column-wise."""
+        fidx = self.det_frame_index
+        bbox = self.det_bbox
+        track = self.det_track_id
+        return pd.DataFrame({
+            "frame_id": self.frame_ids[fidx],
+            "timestamp": np.datetime_as_string(self.timestamps[fidx], unit="us"),
+            "class_id": self.det_class_id,
+            "track_id": pd.Series(track, dtype="Int64").mask(track < 0),
+            "x1": bbox[:, 0], "y1": bbox[:, 1], "x2": bbox[:, 2], "y2": bbox[:, 3],
+            "conf": self.det_conf,
+        })
+
+    def ocr_dataframe(self) -> pd.DataFrame:
+        """One row per OCR reading; region / text are categoricals over the string table."""
+        fidx = np.repeat(np.arange(len(self)), np.diff(self.ocr_offsets))
+        return pd.DataFrame({
+            "frame_id": self.frame_ids[fidx],
+            "region": pd.Categorical.from_codes(self.ocr_region, categories=pd.Index(self.strings)),
+            "text": pd.Categorical.from_codes(self.ocr_text, categories=pd.Index(self.strings)),
+        })
+
+class SegmentDirectory:
+    """Numbered ``<prefix>-NNNNNN.npz`` segment files of spilled frames, oldest first.
+
+    Events settled with a segment go next to it as
+    ``<prefix>-NNNNNN.events.jsonl`` (one ``{"rule": k, **event}`` line
+    each).  With *clear* the segments already in *root* (e.g. from a
+    previous run into the same directory) are deleted; otherwise new
+    segments are numbered after them and :meth:`stores` reads both.
+    """
+
+    def __init__(self, root: Union[str, Path], prefix: str = "segment", compress: bool = True,
+                 clear: bool = False):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.prefix = prefix
+        self.compress = compress
+        if clear:
+            for path in self.paths() + self.event_paths():
+                path.unlink()
+        self._next = len(self.paths())
+
+    def paths(self) -> List[Path]:
+        return sorted(self.root.glob(f"{self.prefix}-*.npz"))
+
+    def event_paths(self) -> List[Path]:
+        return sorted(self.root.glob(f"{self.prefix}-*.events.jsonl"))
+
+    def write(self, store: FrameStore, events: Sequence[Tuple[int, Event]] = ()) -> Path:
+        """Save *store* as the next segment, with its settled ``(rule index, event)`` pairs."""
+        path = store.save(self.root / f"{self.prefix}-{self._next:06d}.npz", self.compress)
+        if events:
+            with open(path.with_suffix(".events.jsonl"), "w", encoding="utf-8") as f:
+                for rule, event in events:
+                    f.write(json.dumps({"rule": rule, **event.dict()}) + "\n")
+        self._next += 1
+        return path
+
+    def stores(self) -> Iterator[FrameStore]:
+        """Load segments one at a time, so reading history keeps memory flat."""
+        for path in self.paths():
+            yield FrameStore.load(path)
+
+    def events(self) -> Iterator[Tuple[int, Event]]:
+        """``(rule index, event)`` pairs settled with the segments, oldest first."""
+        for path in self.event_paths():
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    rec = json.loads(line)
+                    yield rec.pop("rule"), Event(**rec)
+
+def as_frame_store(frames: Union[FrameStore, Iterable[FrameData]]) -> FrameStore:
+    return frames if isinstance(frames, FrameStore) else FrameStore.from_frames(frames)
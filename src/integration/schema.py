@@ -2,14 +2,26 @@
 schema.py
 
 Pydantic models describing unified frame data and events.
+
+Validation runs at the boundaries (API payloads, files read back from disk)
+via the normal constructors.  Data produced by our own pipeline uses the
+trusted path instead — ``Model.trusted(...)`` and the ``trusted_*`` helpers
+— which builds the same models without running validators.
 """
 
 from __future__ import annotations
 from pydantic import BaseModel, Field, ValidationError, validator
-from typing import List, Optional
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
 from datetime import datetime
+from pose.keypoints import pack_keypoints, unpack_keypoints
+
+class SchemaModel(BaseModel):
+    @classmethod
+    def trusted(cls, **values):
+        """Construct without validation; nested values must already be models."""
+        return cls.construct(**values)
 
-class BoundingBox(BaseModel):
+class BoundingBox(SchemaModel):
     x1: float
     y1: float
     x2: float
@@ -35,35 +47,74 @@ class BoundingBox(BaseModel):
             raise ValueError("y2 must be greater than y1")
         return v
 
-class DetectionObject(BaseModel):
+class DetectionObject(SchemaModel):
     bbox: BoundingBox
     confidence: float = Field(..., ge=0, le=1)
     class_id: int
     track_id: Optional[int] = None
 
-class Keypoint(BaseModel):
+class Keypoint(SchemaModel):
     name: str
     x: float
     y: float
     z: float = 0.0
     visibility: float = Field(..., ge=0, le=1)
 
-class PoseFrame(BaseModel):
+class PoseFrame(SchemaModel):
     keypoints: List[Keypoint]
 
-class OCRField(BaseModel):
+    @classmethod
+    def from_array(cls, arr) -> "PoseFrame":
+        """Build from a packed (33, 4) pose array (see ``pose.keypoints``)."""
+        return cls(keypoints=unpack_keypoints(arr))
+
+    def to_array(self):
+        return pack_keypoints(self.keypoints)
+
+class OCRField(SchemaModel):
     region: str
     text: str
 
-class FrameData(BaseModel):
+class FrameData(SchemaModel):
     frame_id: int
     timestamp: datetime
     detections: List[DetectionObject] = []
     pose: Optional[PoseFrame] = None
     ocr: List[OCRField] = []
 
-class Event(BaseModel):
+class Event(SchemaModel):
     type: str
     frame_start: int
     frame_end: int
     metadata: dict
+
+# ---------------- Trusted construction ----------------
+def trusted_bbox(bbox: Any) -> BoundingBox:
+    """``[x1, y1, x2, y2]`` sequence or ``{"x1": ...}`` mapping → BoundingBox (degenerate boxes allowed)."""
+    if isinstance(bbox, BoundingBox):
+        return bbox
+    if isinstance(bbox, Mapping):
+        return BoundingBox.construct(x1=bbox["x1"], y1=bbox["y1"], x2=bbox["x2"], y2=bbox["y2"])
+    x1, y1, x2, y2 = bbox
+    return BoundingBox.construct(x1=x1, y1=y1, x2=x2, y2=y2)
+
+def trusted_detection(d: Mapping[str, Any]) -> DetectionObject:
+    return DetectionObject.construct(bbox=trusted_bbox(d["bbox"]), confidence=d["confidence"],
+                                     class_id=d["class_id"], track_id=d.get("track_id"))
+
+def trusted_frame(frame_id: int,
+                  timestamp: datetime,
+                  detections: Iterable[Mapping[str, Any]] = (),
+                  keypoints: Optional[Sequence[Mapping[str, Any]]] = None,
+                  ocr: Optional[Mapping[str, str]] = None) -> FrameData:
+    """FrameData from pipeline-produced dicts, skipping validation."""
+    pose = None
+    if keypoints is not None:
+        pose = PoseFrame.construct(keypoints=[Keypoint.construct(**k) for k in keypoints])
+    return FrameData.construct(
+        frame_id=frame_id,
+        timestamp=timestamp,
+        detections=[trusted_detection(d) for d in detections],
+        pose=pose,
+        ocr=[OCRField.construct(region=k, text=v) for k, v in (ocr or {}).items()],
+    )
@@ -13,6 +13,7 @@ def _list_commands():
         "run_pipeline",
         "calibrate_frames",
         "validate_dataset",
+        "benchmark",
         "api"  # starts uvicorn
     ]
 
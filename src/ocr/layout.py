@@ -0,0 +1,189 @@
+"""
+layout.py
+
+Broadcast overlay layouts: where the scoreboard / count / pitch-speed boxes are.
+
+* :class:`LayoutRegistry` — named region sets per broadcaster / graphics
+  package from ``configs/ocr_layouts.yaml`` (relative coordinates, scaled to
+  the frame size once and cached)
+* :class:`OverlayLocalizer` — for unknown layouts: finds the overlay boxes
+  from the OCR samples themselves.  Graphics stay pixel-stable while the
+  picture behind them changes (especially across camera cuts), so boxes of
+  stable, textured pixels in the outer band of the frame are overlays.  The
+  result is cached and only re-checked after a scene cut.
+
+Both are callables ``frame -> {region_name: (x1, y1, x2, y2)}`` and plug into
+:class:`ocr.worker.OCRWorker`.
+"""
+
+from __future__ import annotations
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from common.config import load_config
+from .ocr_service import find_brightest_region
+
+logger = logging.getLogger(__name__)
+
+Regions = Dict[str, Tuple[int, int, int, int]]
+
+def scale_regions(relative: Dict[str, Sequence[float]], width: int, height: int) -> Regions:
+    """[x1, y1, x2, y2] fractions → pixel boxes for a *width* × *height* frame."""
+    return {name: (int(round(x1 * width)), int(round(y1 * height)),
+                   int(round(x2 * width)), int(round(y2 * height)))
+            for name, (x1, y1, x2, y2) in relative.items()}
+
+class FixedLayout:
+    """Regions of a configured layout, scaled once per frame size."""
+
+    def __init__(self, name: str, relative: Dict[str, Sequence[float]]):
+        self.name = name
+        self.relative = relative
+        self._cache: Dict[Tuple[int, int], Regions] = {}
+
+    def __call__(self, frame: np.ndarray) -> Regions:
+        h, w = frame.shape[:2]
+        if (w, h) not in self._cache:
+            self._cache[(w, h)] = scale_regions(self.relative, w, h)
+        return self._cache[(w, h)]
+
+class OverlayLocalizer:
+    """Locate overlay boxes once per video from temporally stable texture.
+
+    Called with successive OCR samples (a few per second).  Until enough
+    samples are collected the brightest-area heuristic stands in for the
+    scoreboard.
+
+    Parameters
+    ----------
+    history : samples compared for pixel stability
+    scale : downscale factor for all localization work
+    stable_std : max per-pixel standard deviation (0–255) of an overlay pixel
+    min_area : min box area as a fraction of the frame
+    border : box centres must lie within this outer fraction of the frame
+    names : region names assigned to the found boxes by descending area
+    cut_threshold : mean thumbnail difference (0–255) treated as a scene cut
+    """
+
+    def __init__(self,
+                 history: int = 6,
+                 scale: float = 0.25,
+                 stable_std: float = 6.0,
+                 min_area: float = 0.002,
+                 border: float = 0.3,
+                 names: Sequence[str] = ("scoreboard", "pitch_speed"),
+                 cut_threshold: float = 30.0):
+        self.history = history
+        self.scale = scale
+        self.stable_std = stable_std
+        self.min_area = min_area
+        self.border = border
+        self.names = list(names)
+        self.cut_threshold = cut_threshold
+        self.localizations = 0
+
+        self._samples: deque = deque(maxlen=history)
+        self._regions: Optional[Regions] = None
+        self._recheck_in: Optional[int] = None  # samples left until the post-cut re-check
+        self._lock = threading.Lock()  # OCR worker threads share one localizer
+
+    # ---------------- Private helpers -----------------
+    def _small(self, frame: np.ndarray) -> np.ndarray:
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(gray, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+
+    def localize(self, samples: Sequence[np.ndarray], frame_size: Tuple[int, int]) -> Regions:
+        """Overlay boxes from downscaled gray *samples* (full-resolution coordinates)."""
+        stack = np.stack(samples).astype(np.float32)
+        h, w = stack.shape[1:]
+        stable = stack.std(axis=0) < self.stable_std
+        median = np.median(stack, axis=0).astype(np.uint8)
+        edges = cv2.Canny(median, 50, 150) > 0
+        mask = (stable & edges).astype(np.uint8)
+        # merge glyph edges into one blob per graphics box
+        k = max(3, int(round(w * 0.02)) | 1)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (k, k)))
+        n, _, stats, centroids = cv2.connectedComponentsWithStats(mask, connectivity=8)
+
+        boxes: List[Tuple[int, Tuple[int, int, int, int]]] = []
+        for i in range(1, n):
+            x, y, bw, bh, area = stats[i]
+            cx, cy = centroids[i] / (w, h)
+            in_border = min(cx, 1 - cx) < self.border or min(cy, 1 - cy) < self.border
+            if bw * bh < self.min_area * w * h or not in_border or bw < bh:
+                continue
+            boxes.append((bw * bh, (x, y, x + bw, y + bh)))
+        boxes.sort(key=lambda b: -b[0])
+
+        fw, fh = frame_size
+        sx, sy = fw / w, fh / h
+        pad = 2  # downscaled pixels, keeps anti-aliased glyph edges inside the ROI
+        return {name: (max(0, int((x1 - pad) * sx)), max(0, int((y1 - pad) * sy)),
+                       min(fw, int((x2 + pad) * sx)), min(fh, int((y2 + pad) * sy)))
+                for name, (_, (x1, y1, x2, y2)) in zip(self.names, boxes)}
+
+    # ---------------- Public API -----------------
+    def __call__(self, frame: np.ndarray) -> Regions:
+        small = self._small(frame)
+        with self._lock:
+            regions = self._update(small, frame.shape[1], frame.shape[0])
+        return regions if regions else ({self.names[0]: find_brightest_region(frame, scale=self.scale)} if self.names else {})
+
+    def _update(self, small: np.ndarray, width: int, height: int) -> Optional[Regions]:
+        if self._samples and np.abs(small.astype(np.int16) - self._samples[-1]).mean() > self.cut_threshold:
+            # overlays survive the cut, the picture does not: re-check once
+            # the history straddles it
+            self._recheck_in = max(1, self.history // 2)
+        self._samples.append(small)
+
+        due = self._regions is None and len(self._samples) == self.history
+        if self._recheck_in is not None:
+            self._recheck_in -= 1
+            due = due or (self._recheck_in <= 0 and len(self._samples) == self.history)
+        if due:
+            found = self.localize(self._samples, (width, height))
+            self.localizations += 1
+            self._recheck_in = None
+            if found:
+                if found != self._regions:
+                    logger.info("Overlay regions localized: %s", found)
+                self._regions = found
+        return self._regions
+
+class LayoutRegistry:
+    """Named overlay layouts from ``configs/ocr_layouts.yaml``."""
+
+    def __init__(self,
+                 layouts: Dict[str, Dict[str, Sequence[float]]],
+                 default: str = "auto",
+                 auto: Optional[Dict[str, Any]] = None):
+        self.layouts = layouts
+        self.default = default
+        self.auto = auto or {}
+
+    @classmethod
+    def from_config(cls, config: str = "ocr_layouts") -> "LayoutRegistry":
+        cfg = load_config(config)
+        return cls(cfg.get("layouts") or {}, cfg.get("default") or "auto", cfg.get("auto"))
+
+    def names(self) -> List[str]:
+        return sorted(self.layouts)
+
+    def regions(self, layout: str, width: int, height: int) -> Regions:
+        if layout not in self.layouts:
+            raise KeyError(f"unknown OCR layout {layout!r}, known: {self.names()}")
+        return scale_regions(self.layouts[layout], width, height)
+
+    def provider(self, layout: Optional[str] = None) -> Callable[[np.ndarray], Regions]:
+        """Region callable for *layout* (default from config); 'auto' localizes per video."""
+        layout = layout or self.default
+        if layout == "auto":
+            return OverlayLocalizer(**self.auto)
+        if layout not in self.layouts:
+            raise KeyError(f"unknown OCR layout {layout!r}, known: {self.names()}")
+        return FixedLayout(layout, self.layouts[layout])
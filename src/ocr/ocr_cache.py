@@ -0,0 +1,89 @@
+"""
+ocr_cache.py
+
+Change-detection cache for region OCR.
+
+Scoreboard / speed overlays change a few times per pitch while OCR runs on
+every frame.  Each preprocessed ROI is reduced to a small thumbnail; while
+the thumbnail of a region stays (nearly) identical to the one last sent to
+Tesseract, the previous text is reused.
+
+Example
+-------
+>>> cache = OCRCache()
+>>> recognize_regions(frame, regions, cache=cache)
+>>> cache.stats()
+{'hits': 1180, 'misses': 20, 'hit_rate': 0.983}
+"""
+
+from __future__ import annotations
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import cv2
+import numpy as np
+
+class OCRCache:
+    """Reuse OCR text while a region is visually unchanged.
+
+    Parameters
+    ----------
+    thumb_size : (width, height) the preprocessed ROI is area-downscaled to
+    pixel_tol : thumbnail pixels differing by more than this (0–255) count as changed
+    max_changed : fraction of changed thumbnail pixels still treated as the same image;
+                  absorbs compression noise, while a changed digit flips far more
+    """
+
+    def __init__(self,
+                 thumb_size: Tuple[int, int] = (64, 16),
+                 pixel_tol: int = 48,
+                 max_changed: float = 0.01):
+        self.thumb_size = thumb_size
+        self.pixel_tol = pixel_tol
+        self.max_changed = max_changed
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[Hashable, Tuple[np.ndarray, str]] = {}
+        self._lock = threading.Lock()  # shared by OCR worker threads
+
+    def _thumb(self, img: np.ndarray) -> np.ndarray:
+        return cv2.resize(img, self.thumb_size, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def _same(self, a: np.ndarray, b: np.ndarray) -> bool:
+        return np.count_nonzero(np.abs(a - b) > self.pixel_tol) <= self.max_changed * a.size
+
+    def lookup(self, key: Hashable, img: np.ndarray) -> Tuple[Optional[str], np.ndarray]:
+        """Cached text of region *key* if *img* is unchanged (else None), plus its thumbnail for :meth:`store`."""
+        thumb = self._thumb(img)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._same(entry[0], thumb):
+                self.hits += 1
+                return entry[1], thumb
+            self.misses += 1
+        return None, thumb
+
+    def store(self, key: Hashable, thumb: np.ndarray, text: str):
+        with self._lock:
+            self._entries[key] = (thumb, text)
+
+    def get(self, key: Hashable, img: np.ndarray, compute: Callable[[np.ndarray], str]) -> str:
+        """Text of *img* for region *key*, calling *compute* only when the region changed."""
+        text, thumb = self.lookup(key, img)
+        if text is None:
+            text = compute(img)
+            self.store(key, thumb, text)
+        return text
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drop one region (or every region, e.g. on a scene cut)."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0}
@@ -3,23 +3,43 @@ ocr_service.py
 
 Region-based Tesseract OCR wrapper.
 
+Recognition goes through an :class:`OCRBackend`:
+
+* ``TesserocrBackend`` — in-process libtesseract with one long-lived API
+  handle per thread (no process start-up per region)
+* ``PytesseractBackend`` — the ``tesseract`` CLI, one process per region
+  with the caller's ``psm``; opt-in ``batch=True`` stacks all regions of a
+  frame into one page (``--psm 6``) so a frame costs a single process, at
+  the price of slightly different segmentation
+
+:func:`get_backend` picks tesserocr when installed (override with the
+``OCR_BACKEND`` environment variable).
+
 Dependencies
 ------------
-pytesseract
+tesserocr (preferred) or pytesseract
 opencv-python-headless
 """
 
 from __future__ import annotations
+import abc
 import cv2
 import numpy as np
-import pytesseract
-from typing import List, Dict, Tuple, Any
+from typing import List, Dict, Tuple, Any, Optional, Sequence
 import logging
+import os
+import threading
 from pathlib import Path
+from .ocr_cache import OCRCache
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(levelname)s %(name)s: %(message)s")
 
+try:
+    import pytesseract
+except ImportError:
+    pytesseract = None
+
 def _prepare_image(img: np.ndarray) -> np.ndarray:
     """Basic preprocessing: grayscale, adaptive threshold."""
     gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
@@ -29,10 +49,156 @@ def _prepare_image(img: np.ndarray) -> np.ndarray:
                                 31, 2)
     return thr
 
+# ---------- OCR backends ----------
+class OCRBackend(abc.ABC):
+    """Recognizes text in preprocessed (binarized) region images."""
+    name = "base"
+
+    @abc.abstractmethod
+    def recognize_batch(self, imgs: Sequence[np.ndarray], lang: str = "eng", psm: int = 7) -> List[str]:
+        """Text of every image in *imgs*, in order."""
+
+    def recognize(self, img: np.ndarray, lang: str = "eng", psm: int = 7) -> str:
+        return self.recognize_batch([img], lang, psm)[0]
+
+    def close(self):
+        pass
+
+def stack_regions(imgs: Sequence[np.ndarray], gap: int = 16) -> Tuple[np.ndarray, List[Tuple[int, int]]]:
+    """Stack grayscale ROIs into one white page; returns the page and each ROI's (y0, y1) band."""
+    width = max(img.shape[1] for img in imgs) + 2 * gap
+    height = sum(img.shape[0] for img in imgs) + gap * (len(imgs) + 1)
+    page = np.full((height, width), 255, dtype=np.uint8)
+    bands, y = [], gap
+    for img in imgs:
+        h, w = img.shape[:2]
+        page[y:y + h, gap:gap + w] = img
+        bands.append((y, y + h))
+        y += h + gap
+    return page, bands
+
+def split_by_band(data: Dict[str, List[Any]], bands: Sequence[Tuple[int, int]]) -> List[str]:
+    """Map ``image_to_data`` words of a stacked page back to their ROI bands.
+
+    Words are assigned by vertical centre, grouped into Tesseract lines and
+    joined left to right.
+    """
+    lines: List[Dict[Tuple[int, int, int], List[Tuple[int, str]]]] = [{} for _ in bands]
+    starts = np.array([b[0] for b in bands])
+    for i, word in enumerate(data["text"]):
+        word = str(word).strip()
+        if not word:
+            continue
+        cy = data["top"][i] + data["height"][i] / 2
+        band = int(np.searchsorted(starts, cy, side="right")) - 1
+        if band < 0:
+            continue
+        key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        lines[band].setdefault(key, []).append((data["left"][i], word))
+    return ["\n".join(" ".join(w for _, w in sorted(words)) for _, words in sorted(groups.items()))
+            for groups in lines]
+
+class PytesseractBackend(OCRBackend):
+    """``tesseract`` CLI via pytesseract: one process per region.
+
+    With *batch* (opt-in) the regions of a call are stacked into a single
+    page and recognized as a uniform text block (``--psm 6``, overriding the
+    caller's ``psm``), then split back per region with :func:`split_by_band`:
+    one process per frame, but results can differ from per-region OCR.
+    """
+    name = "pytesseract"
+
+    def __init__(self, batch: bool = False, gap: int = 16):
+        if pytesseract is None:
+            raise ImportError("pytesseract is not installed")
+        self.batch = batch
+        self.gap = gap
+
+    def recognize_batch(self, imgs, lang="eng", psm=7):
+        if not self.batch or len(imgs) == 1:
+            return [pytesseract.image_to_string(img, lang=lang, config=f"--psm {psm}").strip() for img in imgs]
+        page, bands = stack_regions(imgs, self.gap)
+        data = pytesseract.image_to_data(page, lang=lang, config="--psm 6",
+                                         output_type=pytesseract.Output.DICT)
+        return split_by_band(data, bands)
+
+class TesserocrBackend(OCRBackend):
+    """In-process Tesseract via tesserocr.
+
+    ``PyTessBaseAPI`` handles are not thread-safe, so each thread lazily
+    creates its own per language and keeps it for the life of the backend.
+    """
+    name = "tesserocr"
+
+    def __init__(self):
+        import tesserocr
+        self._tesserocr = tesserocr
+        self._local = threading.local()
+        self._apis: List[Any] = []
+        self._lock = threading.Lock()
+
+    def _api(self, lang: str):
+        apis = getattr(self._local, "apis", None)
+        if apis is None:
+            apis = self._local.apis = {}
+        api = apis.get(lang)
+        if api is None:
+            api = apis[lang] = self._tesserocr.PyTessBaseAPI(lang=lang)
+            with self._lock:
+                self._apis.append(api)
+        return api
+
+    def recognize_batch(self, imgs, lang="eng", psm=7):
+        api = self._api(lang)
+        api.SetPageSegMode(psm)
+        out = []
+        for img in imgs:
+            img = np.ascontiguousarray(img, dtype=np.uint8)
+            h, w = img.shape[:2]
+            api.SetImageBytes(img.tobytes(), w, h, 1, w)
+            out.append(api.GetUTF8Text().strip())
+        return out
+
+    def close(self):
+        with self._lock:
+            for api in self._apis:
+                api.End()
+            self._apis.clear()
+        self._local = threading.local()
+
+_BACKEND_TYPES = {"tesserocr": TesserocrBackend, "pytesseract": PytesseractBackend,
+                  "pytesseract-batch": lambda: PytesseractBackend(batch=True)}
+_backends: Dict[str, OCRBackend] = {}
+_backends_lock = threading.Lock()
+
+def get_backend(name: Optional[str] = None) -> OCRBackend:
+    """Shared backend instance: 'tesserocr', 'pytesseract', 'pytesseract-batch' (stacked
+    pages, see :class:`PytesseractBackend`) or 'auto' (default, ``OCR_BACKEND`` env)."""
+    name = name or os.getenv("OCR_BACKEND", "auto")
+    with _backends_lock:
+        if name == "auto":
+            for candidate in ("tesserocr", "pytesseract"):
+                try:
+                    return _get_backend_locked(candidate)
+                except ImportError:
+                    continue
+            raise ImportError("no OCR backend available: install tesserocr or pytesseract")
+        return _get_backend_locked(name)
+
+def _get_backend_locked(name: str) -> OCRBackend:
+    if name not in _backends:
+        if name not in _BACKEND_TYPES:
+            raise ValueError(f"unknown OCR backend {name!r}, expected one of {sorted(_BACKEND_TYPES)}")
+        _backends[name] = _BACKEND_TYPES[name]()
+        logger.info("Using %s OCR backend", name)
+    return _backends[name]
+
 def recognize_regions(frame: np.ndarray,
                       regions: Dict[str, Tuple[int, int, int, int]],
                       lang: str = "eng",
-                      psm: int = 7) -> Dict[str, str]:
+                      psm: int = 7,
+                      cache: Optional[OCRCache] = None,
+                      backend: Optional[OCRBackend] = None) -> Dict[str, str]:
     """OCR on predefined regions.
 
     Parameters
@@ -41,33 +207,61 @@ def recognize_regions(frame: np.ndarray,
     regions : dict mapping region_name -> (x1,y1,x2,y2)
     lang : tesseract language
     psm : tesseract page segmentation mode
+    cache : optional :class:`OCRCache`; regions whose preprocessed image is
+            unchanged since the last OCR call reuse the previous text
+    backend : OCR engine, default :func:`get_backend`; all regions still to
+              recognize are passed to it in one ``recognize_batch`` call
 
     Returns
     -------
     dict region_name -> recognized text
     """
-    results = {}
+    results: Dict[str, str] = {}
+    pending = []  # (name, preprocessed roi, cache key, thumbnail)
     for name, (x1, y1, x2, y2) in regions.items():
         roi = frame[y1:y2, x1:x2].copy()
         if roi.size == 0:
             results[name] = ""
             continue
         roi_prep = _prepare_image(roi)
-        config = f"--psm {psm}"
-        txt = pytesseract.image_to_string(roi_prep, lang=lang, config=config)
-        results[name] = txt.strip()
-        logger.debug("OCR %s: %s", name, txt.strip())
-    return results
+        key, thumb = (name, lang, psm), None
+        if cache is not None:
+            txt, thumb = cache.lookup(key, roi_prep)
+            if txt is not None:
+                results[name] = txt
+                continue
+        pending.append((name, roi_prep, key, thumb))
+
+    if pending:
+        backend = backend or get_backend()
+        texts = backend.recognize_batch([p[1] for p in pending], lang=lang, psm=psm)
+        for (name, _, key, thumb), txt in zip(pending, texts):
+            results[name] = txt
+            if cache is not None:
+                cache.store(key, thumb, txt)
+            logger.debug("OCR %s: %s", name, txt)
+    return {name: results[name] for name in regions}
 
 # ---------- Dynamic region detection (optional) ----------
-def find_brightest_region(frame: np.ndarray, width: int = 400, height: int = 100) -> Tuple[int,int,int,int]:
-    """Locate the brightest area (e.g., scoreboard) heuristically."""
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    blur = cv2.GaussianBlur(gray, (11, 11), 0)
+def find_brightest_region(frame: np.ndarray, width: int = 400, height: int = 100,
+                          scale: float = 1.0) -> Tuple[int,int,int,int]:
+    """Locate the brightest area (e.g., scoreboard) heuristically.
+
+    With *scale* < 1 the blur / minMaxLoc run on a downscaled frame (0.25
+    touches 1/16 of the pixels) and the peak is mapped back to full
+    resolution; the default works on the full frame.
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    if 0 < scale < 1:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    else:
+        scale = 1.0
+    k = max(3, int(round(11 * scale)) | 1)
+    blur = cv2.GaussianBlur(gray, (k, k), 0)
     min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(blur)
-    x1 = max(max_loc[0] - width//2, 0)
-    y1 = max(max_loc[1] - height//2, 0)
+    cx, cy = int(max_loc[0] / scale), int(max_loc[1] / scale)
+    x1 = max(cx - width//2, 0)
+    y1 = max(cy - height//2, 0)
     x2 = min(x1 + width, frame.shape[1])
     y2 = min(y1 + height, frame.shape[0])
     return (x1, y1, x2, y2)
-
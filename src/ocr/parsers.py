@@ -39,3 +39,14 @@ def parse_team_names(text: str) -> Tuple[Optional[str], Optional[str]]:
     if len(m) >= 2:
         return m[0], m[1]
     return None, None
+
+_INNING_RE = re.compile(r"(?:\b(?:top|bot|bottom|mid|end)\s*|[▲▼↑↓]\s*)(\d{1,2})\b|\b(\d{1,2})(?:st|nd|rd|th)\b")
+
+def parse_inning(text: str) -> Optional[int]:
+    """Inning number from a scoreboard ('TOP 7', '▼3', '9th', 'Bot 10'); None if absent."""
+    m = _INNING_RE.search(text.lower())
+    if m:
+        inning = int(m.group(1) or m.group(2))
+        if 1 <= inning <= 20:
+            return inning
+    return None
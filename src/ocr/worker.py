@@ -0,0 +1,191 @@
+"""
+worker.py
+
+Rate-limited OCR service running beside the frame loop.
+
+Overlays (score, count, pitch speed) change a few times per pitch, so OCR
+only needs a handful of samples per second.  :class:`OCRWorker` receives
+every frame through the non-blocking :meth:`OCRWorker.submit`, keeps one
+sample per ``1 / rate_hz`` seconds of video time (plus an extra sample on a
+scene change) and recognizes it on its own thread(s).  The frame loop reads
+the most recent values with :meth:`OCRWorker.latest` and never waits for
+Tesseract; OCR cost is a fixed budget per second of video regardless of fps.
+
+When the frame loop works on downscaled frames, ``frame_source`` fetches
+the full-resolution frame of each sample by id on the OCR thread (e.g.
+``ingest.scaled_reader.ScaledReader.full_frame``); submitted frames are
+then only used for sampling and scene-change detection.
+
+Example
+-------
+>>> with OCRWorker(regions, rate_hz=2, fps=59.94) as ocr:
+...     for frame_id, frame in enumerate(frames):
+...         ocr.submit(frame_id, frame)
+...         aggregator.add_frame(frame_id, ..., ocr=ocr.latest())
+"""
+
+from __future__ import annotations
+import logging
+import threading
+from typing import Callable, Dict, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from .ocr_cache import OCRCache
+from .ocr_service import OCRBackend, recognize_regions
+
+logger = logging.getLogger(__name__)
+
+Regions = Dict[str, Tuple[int, int, int, int]]
+
+class OCRWorker:
+    """Sample frames at *rate_hz* (and on scene changes) and OCR them off-thread.
+
+    Parameters
+    ----------
+    regions : region_name -> (x1, y1, x2, y2), or a callable returning the
+              regions for a frame (e.g. a layout localizer)
+    rate_hz : OCR samples per second of video time
+    fps : frame rate used to turn frame ids into video time
+    scene_threshold : mean absolute difference (0–255) between 32×18 gray
+                      thumbnails of consecutive frames that counts as a cut
+    workers : OCR threads; a sample arriving while all are busy replaces the
+              waiting one, so the queue never grows
+    frame_source : frame_id -> frame to recognize instead of the submitted
+                   one (None to skip the sample); regions are in its
+                   coordinates
+    """
+
+    def __init__(self,
+                 regions: Union[Regions, Callable[[np.ndarray], Regions]],
+                 rate_hz: float = 2.0,
+                 fps: float = 30.0,
+                 scene_threshold: float = 30.0,
+                 workers: int = 1,
+                 cache: Optional[OCRCache] = None,
+                 backend: Optional[OCRBackend] = None,
+                 lang: str = "eng",
+                 psm: int = 7,
+                 frame_source: Optional[Callable[[int], Optional[np.ndarray]]] = None):
+        self.regions = regions
+        self.period = 1.0 / rate_hz if rate_hz > 0 else 0.0
+        self.fps = fps or 30.0
+        self.scene_threshold = scene_threshold
+        self.workers = max(1, workers)
+        self.cache = cache if cache is not None else OCRCache()
+        self.backend = backend
+        self.lang = lang
+        self.psm = psm
+        self.frame_source = frame_source
+
+        self.frames_seen = 0
+        self.samples = 0        # frames handed to OCR
+        self.dropped = 0        # samples replaced before a worker picked them up
+        self.scene_changes = 0
+
+        self._last_sample_t: Optional[float] = None
+        self._prev_thumb: Optional[np.ndarray] = None
+        self._pending: Optional[Tuple[int, np.ndarray]] = None
+        self._latest: Dict[str, str] = {}
+        self._latest_frame = -1
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._threads = []
+        self._error: Optional[BaseException] = None
+
+    # ---------------- Private helpers -----------------
+    def _scene_changed(self, frame: np.ndarray) -> bool:
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        thumb = cv2.resize(gray, (32, 18), interpolation=cv2.INTER_AREA).astype(np.int16)
+        prev, self._prev_thumb = self._prev_thumb, thumb
+        return prev is not None and float(np.abs(thumb - prev).mean()) > self.scene_threshold
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._stopped:
+                    self._cond.wait()
+                if self._pending is None:  # stopped and drained
+                    return
+                frame_id, frame = self._pending
+                self._pending = None
+            try:
+                if self.frame_source is not None:
+                    frame = self.frame_source(frame_id)
+                    if frame is None:
+                        continue
+                regions = self.regions(frame) if callable(self.regions) else self.regions
+                texts = recognize_regions(frame, regions, lang=self.lang, psm=self.psm,
+                                          cache=self.cache, backend=self.backend)
+            except Exception as e:
+                logger.exception("OCR failed on frame %d", frame_id)
+                with self._cond:
+                    self._error = self._error or e
+                continue
+            with self._cond:
+                # with several workers samples may finish out of order; never go back in time
+                if frame_id > self._latest_frame:
+                    self._latest, self._latest_frame = texts, frame_id
+
+    # ---------------- Public API -----------------
+    def start(self) -> "OCRWorker":
+        for i in range(self.workers):
+            t = threading.Thread(target=self._run, name=f"ocr-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def submit(self, frame_id: int, frame: np.ndarray, t: Optional[float] = None) -> bool:
+        """Offer a frame; returns True if it was taken as an OCR sample.
+
+        *t* is the frame time in seconds (default ``frame_id / fps``).  The
+        frame is referenced, not copied: callers must not modify it in place.
+        """
+        self.frames_seen += 1
+        t = frame_id / self.fps if t is None else t
+        cut = self._scene_changed(frame)
+        if not cut and self._last_sample_t is not None and t - self._last_sample_t < self.period:
+            return False
+        if cut:
+            self.scene_changes += 1
+        self._last_sample_t = t
+        with self._cond:
+            if self._pending is not None:
+                self.dropped += 1
+            self._pending = (frame_id, frame)
+            self.samples += 1
+            self._cond.notify()
+        return True
+
+    def latest(self) -> Dict[str, str]:
+        """Most recent reading per region (empty until the first sample is done)."""
+        with self._cond:
+            return dict(self._latest)
+
+    @property
+    def latest_frame_id(self) -> int:
+        return self._latest_frame
+
+    def stop(self, drain: bool = True):
+        """Stop the workers; with *drain* the waiting sample is still recognized."""
+        with self._cond:
+            if not drain:
+                self._pending = None
+            self._stopped = True
+            self._cond.notify_all()
+        for t in self._threads:
+            t.join()
+        self._threads = []
+        if self._error is not None:
+            logger.warning("OCR worker had errors; first: %s", self._error)
+
+    def stats(self) -> Dict[str, object]:
+        return {"frames": self.frames_seen, "samples": self.samples, "dropped": self.dropped,
+                "scene_changes": self.scene_changes, "cache": self.cache.stats()}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
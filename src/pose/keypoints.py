@@ -0,0 +1,116 @@
+"""
+keypoints.py
+
+Packed pose representation.
+
+One person's pose is a ``(33, 4)`` float32 array with columns
+``x, y, z, visibility`` and rows ordered as MediaPipe's ``PoseLandmark``
+enum (see :data:`LANDMARK_NAMES` / :data:`LANDMARK_INDEX`).  Missing
+landmarks or frames without a pose are NaN rows.  A clip of poses is a
+``(frames, 33, 4)`` array held by :class:`PoseClip`.
+
+Dict / pydantic keypoints are only built at the JSON boundary with
+:func:`unpack_keypoints`.
+"""
+
+from __future__ import annotations
+import numpy as np
+from typing import Any, Dict, Iterable, List, Optional
+
+LANDMARK_NAMES = (
+    "NOSE", "LEFT_EYE_INNER", "LEFT_EYE", "LEFT_EYE_OUTER",
+    "RIGHT_EYE_INNER", "RIGHT_EYE", "RIGHT_EYE_OUTER", "LEFT_EAR", "RIGHT_EAR",
+    "MOUTH_LEFT", "MOUTH_RIGHT", "LEFT_SHOULDER", "RIGHT_SHOULDER",
+    "LEFT_ELBOW", "RIGHT_ELBOW", "LEFT_WRIST", "RIGHT_WRIST",
+    "LEFT_PINKY", "RIGHT_PINKY", "LEFT_INDEX", "RIGHT_INDEX",
+    "LEFT_THUMB", "RIGHT_THUMB", "LEFT_HIP", "RIGHT_HIP",
+    "LEFT_KNEE", "RIGHT_KNEE", "LEFT_ANKLE", "RIGHT_ANKLE",
+    "LEFT_HEEL", "RIGHT_HEEL", "LEFT_FOOT_INDEX", "RIGHT_FOOT_INDEX",
+)
+LANDMARK_INDEX: Dict[str, int] = {name: i for i, name in enumerate(LANDMARK_NAMES)}
+NUM_LANDMARKS = len(LANDMARK_NAMES)
+FIELDS = ("x", "y", "z", "visibility")
+X, Y, Z, VIS = range(4)
+
+def empty_pose() -> np.ndarray:
+    return np.full((NUM_LANDMARKS, 4), np.nan, dtype=np.float32)
+
+def pack_keypoints(keypoints: Iterable[Any]) -> Optional[np.ndarray]:
+    """Pack keypoint dicts / dataclasses / pydantic models into a (33, 4) array.
+
+    Returns None for an empty input (no pose detected).
+    """
+    arr = None
+    for kp in keypoints:
+        if arr is None:
+            arr = empty_pose()
+        get = kp.get if isinstance(kp, dict) else (lambda k, kp=kp: getattr(kp, k, None))
+        i = LANDMARK_INDEX.get(get("name"))
+        if i is not None:
+            arr[i] = [get("x"), get("y"), get("z") or 0.0, get("visibility")]
+    return arr
+
+def unpack_keypoints(arr: Optional[np.ndarray]) -> List[Dict[str, Any]]:
+    """(33, 4) array → list of keypoint dicts (NaN landmarks are skipped)."""
+    if arr is None:
+        return []
+    valid = ~np.isnan(arr[:, X])
+    return [{"name": LANDMARK_NAMES[i], "x": float(x), "y": float(y), "z": float(z), "visibility": float(v)}
+            for i, (x, y, z, v) in zip(np.flatnonzero(valid), arr[valid].tolist())]
+
+class PoseClip:
+    """Growable ``(frames, 33, 4)`` float32 pose array aligned with frame ids.
+
+    Appends are amortized O(1) (capacity doubles); ``array`` and
+    ``frame_ids`` are views of the filled part.
+    """
+
+    def __init__(self, capacity: int = 256):
+        self._data = np.empty((capacity, NUM_LANDMARKS, 4), dtype=np.float32)
+        self._ids = np.empty(capacity, dtype=np.int64)
+        self._n = 0
+
+    @classmethod
+    def from_arrays(cls, array: np.ndarray, frame_ids: np.ndarray) -> "PoseClip":
+        """Clip holding copies of a ``(frames, 33, 4)`` array and its frame ids."""
+        clip = cls(capacity=max(len(frame_ids), 1))
+        clip._n = len(frame_ids)
+        clip._data[:clip._n] = array
+        clip._ids[:clip._n] = frame_ids
+        return clip
+
+    def __len__(self) -> int:
+        return self._n
+
+    def _grow(self):
+        cap = max(2 * len(self._ids), 1)
+        self._data = np.concatenate([self._data, np.empty((cap - len(self._ids), NUM_LANDMARKS, 4), np.float32)])
+        self._ids = np.concatenate([self._ids, np.empty(cap - len(self._ids), np.int64)])
+
+    def append(self, frame_id: int, pose: Optional[np.ndarray]):
+        """Append one frame; *pose* None (no person) is stored as a NaN row."""
+        if self._n == len(self._ids):
+            self._grow()
+        self._data[self._n] = np.nan if pose is None else pose
+        self._ids[self._n] = frame_id
+        self._n += 1
+
+    @property
+    def array(self) -> np.ndarray:
+        return self._data[:self._n]
+
+    @property
+    def frame_ids(self) -> np.ndarray:
+        return self._ids[:self._n]
+
+    @property
+    def nbytes(self) -> int:
+        return self.array.nbytes + self.frame_ids.nbytes
+
+    def get(self, frame_id: int) -> Optional[np.ndarray]:
+        """Pose of *frame_id* or None. Frame ids are expected to be increasing."""
+        ids = self.frame_ids
+        i = int(np.searchsorted(ids, frame_id))
+        if i == self._n or ids[i] != frame_id or np.isnan(self._data[i, :, X]).all():
+            return None
+        return self._data[i]
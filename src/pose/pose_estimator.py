@@ -3,6 +3,17 @@ pose_estimator.py
 
 Wrapper around MediaPipe Pose for extracting human skeleton keypoints.
 
+Two modes:
+1. ``infer``       — single person, whole frame
+2. ``infer_crops`` — one pose per detected/tracked player box (class 2),
+   run on padded crops (optionally in parallel) and mapped back to frame
+   coordinates with the box's ``track_id``
+
+Poses are packed ``(33, 4)`` float32 arrays (see ``pose.keypoints``);
+``infer`` still returns ``Keypoint`` objects for callers that want them.
+Each mode builds its MediaPipe graphs on first use, so an estimator used
+only for crops never loads the full-frame graph.
+
 Dependencies
 ------------
 mediapipe>=0.10
@@ -11,10 +22,13 @@ opencv-python-headless
 
 from __future__ import annotations
 import cv2
+import threading
 import numpy as np
 import mediapipe as mp
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import List, Dict, Tuple
+from typing import Any, List, Dict, Optional, Sequence, Tuple
+from .keypoints import unpack_keypoints
 
 mp_pose = mp.solutions.pose
 
@@ -26,41 +40,146 @@ class Keypoint:
     z: float
     visibility: float
 
+@dataclass
+class PersonPose:
+    """Pose of one detected player, in full-frame coordinates."""
+    track_id: Optional[int]
+    bbox: List[float]          # padded crop box [x1, y1, x2, y2] the pose was run on
+    keypoints: np.ndarray      # (33, 4) packed x, y, z, visibility
+
+PLAYER_CLASS_ID = 2
+
 class PoseEstimator:
     def __init__(self,
                  static_image_mode: bool = False,
                  model_complexity: int = 1,
                  detection_confidence: float = 0.5,
-                 tracking_confidence: float = 0.5):
-        self.pose = mp_pose.Pose(static_image_mode=static_image_mode,
+                 tracking_confidence: float = 0.5,
+                 crop_workers: int = 1):
+        self._pose: Optional[Any] = None
+        self._pose_lock = threading.Lock()
+        self._frame_kwargs = dict(static_image_mode=static_image_mode,
+                                  model_complexity=model_complexity,
+                                  min_detection_confidence=detection_confidence,
+                                  min_tracking_confidence=tracking_confidence)
+        self._crop_kwargs = dict(static_image_mode=True,  # crops change person every call
                                  model_complexity=model_complexity,
-                                 min_detection_confidence=detection_confidence,
-                                 min_tracking_confidence=tracking_confidence)
+                                 min_detection_confidence=detection_confidence)
+        self._local = threading.local()   # one MediaPipe graph per crop thread
+        self._crop_graphs: List[Any] = []
+        self._executor = ThreadPoolExecutor(crop_workers) if crop_workers > 1 else None
 
-    def infer(self, frame: np.ndarray) -> List[Keypoint]:
+    @staticmethod
+    def _to_array(landmarks, w: int, h: int, x0: float = 0.0, y0: float = 0.0) -> np.ndarray:
+        """Landmarks → (33, 4) float32 in pixel coordinates."""
+        arr = np.array([(lm.x, lm.y, lm.z, lm.visibility) for lm in landmarks], dtype=np.float32)
+        arr *= np.array([w, h, w, 1.0], dtype=np.float32)  # scale depth by width
+        arr[:, 0] += x0
+        arr[:, 1] += y0
+        return arr
+
+    @property
+    def pose(self):
+        """Full-frame MediaPipe graph, built on first use."""
+        if self._pose is None:
+            with self._pose_lock:
+                if self._pose is None:
+                    self._pose = mp_pose.Pose(**self._frame_kwargs)
+        return self._pose
+
+    def _crop_graph(self):
+        graph = getattr(self._local, "graph", None)
+        if graph is None:
+            graph = self._local.graph = mp_pose.Pose(**self._crop_kwargs)
+            self._crop_graphs.append(graph)
+        return graph
+
+    def infer_array(self, frame: np.ndarray) -> Optional[np.ndarray]:
         """
         Perform pose estimation on a single BGR frame.
 
         Returns
         -------
-        List[Keypoint]
-            All 33 body keypoints with normalized coordinates (0‑1) and visibility.
+        (33, 4) float32 array of pixel x, y, z and visibility, or None if no person
         """
         rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
         result = self.pose.process(rgb)
         if not result.pose_landmarks:
-            return []
-        keypoints = []
+            return None
         h, w = frame.shape[:2]
-        for i, lm in enumerate(result.pose_landmarks.landmark):
-            keypoints.append(Keypoint(
-                name=mp_pose.PoseLandmark(i).name,
-                x=lm.x * w,
-                y=lm.y * h,
-                z=lm.z * w,           # scale depth by width
-                visibility=lm.visibility
-            ))
-        return keypoints
+        return self._to_array(result.pose_landmarks.landmark, w, h)
+
+    def infer(self, frame: np.ndarray) -> List[Keypoint]:
+        """
+        Perform pose estimation on a single BGR frame.
+
+        Returns
+        -------
+        List[Keypoint]
+            All 33 body keypoints in pixel coordinates and visibility.
+        """
+        return [Keypoint(**kp) for kp in unpack_keypoints(self.infer_array(frame))]
+
+    def _infer_crop(self, frame: np.ndarray, det: Dict[str, Any], padding: float,
+                    min_size: int = 0) -> Optional[PersonPose]:
+        fh, fw = frame.shape[:2]
+        x1, y1, x2, y2 = det["bbox"]
+        px, py = (x2 - x1) * padding, (y2 - y1) * padding
+        cx1, cy1 = max(int(x1 - px), 0), max(int(y1 - py), 0)
+        cx2, cy2 = min(int(x2 + px), fw), min(int(y2 + py), fh)
+        # boxes propagated by the tracker can leave the frame: nothing (or too little) to crop
+        if cx2 <= cx1 or cy2 <= cy1 or cx2 - cx1 < min_size or cy2 - cy1 < min_size:
+            return None
+        rgb = cv2.cvtColor(frame[cy1:cy2, cx1:cx2], cv2.COLOR_BGR2RGB)
+        result = self._crop_graph().process(rgb)
+        if not result.pose_landmarks:
+            return None
+        kps = self._to_array(result.pose_landmarks.landmark, cx2 - cx1, cy2 - cy1, cx1, cy1)
+        return PersonPose(track_id=det.get("track_id"), bbox=[cx1, cy1, cx2, cy2], keypoints=kps)
+
+    def infer_crops(self,
+                    frame: np.ndarray,
+                    detections: Sequence[Dict[str, Any]],
+                    padding: float = 0.15,
+                    class_id: int = PLAYER_CLASS_ID,
+                    min_size: int = 32,
+                    max_persons: Optional[int] = None) -> List[PersonPose]:
+        """
+        Pose estimation on padded crops of the player boxes in *detections*.
+
+        Only crops are color-converted and processed, which is far cheaper per
+        pixel than the full broadcast frame and yields one pose per player.
+
+        Parameters
+        ----------
+        detections : detector / tracker output dicts (``bbox``, ``class_id``, optional ``track_id``)
+        padding : fraction of box width/height added on each side (limbs often leave the box)
+        min_size : boxes smaller than this (pixels, either side, after clipping
+                   to the frame) are skipped
+        max_persons : keep only the most confident players
+
+        Returns
+        -------
+        List[PersonPose] with keypoints in full-frame pixel coordinates
+        """
+        players = [d for d in detections
+                   if d.get("class_id") == class_id
+                   and d["bbox"][2] - d["bbox"][0] >= min_size
+                   and d["bbox"][3] - d["bbox"][1] >= min_size]
+        players.sort(key=lambda d: -d.get("confidence", 1.0))
+        if max_persons is not None:
+            players = players[:max_persons]
+        if self._executor is not None and len(players) > 1:
+            poses = list(self._executor.map(lambda d: self._infer_crop(frame, d, padding, min_size), players))
+        else:
+            poses = [self._infer_crop(frame, d, padding, min_size) for d in players]
+        return [p for p in poses if p is not None]
 
     def close(self):
-        self.pose.close()
+        if self._pose is not None:
+            self._pose.close()
+            self._pose = None
+        if self._executor is not None:
+            self._executor.shutdown()
+        for graph in self._crop_graphs:
+            graph.close()
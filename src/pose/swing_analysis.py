@@ -4,13 +4,18 @@ swing_analysis.py
 Detect swing start and end frames using wrist velocity
 and classify Non‑Pitch (NP) events where no swing occurs.
 
-Assumes keypoints from PoseEstimator.
+Assumes keypoints from PoseEstimator.  With multi-player poses
+(``PoseEstimator.infer_crops``) use :func:`select_batter` to pick the batter.
 """
 
 from __future__ import annotations
-from typing import List, Dict, Tuple
+from typing import Any, List, Dict, Optional, Sequence, Tuple, Union
 import numpy as np
 from dataclasses import dataclass
+from .keypoints import LANDMARK_INDEX, PoseClip, X, Y, VIS, pack_keypoints
+
+RIGHT_WRIST = LANDMARK_INDEX["RIGHT_WRIST"]
+LEFT_WRIST = LANDMARK_INDEX["LEFT_WRIST"]
 
 @dataclass
 class SwingEvent:
@@ -20,7 +25,47 @@ class SwingEvent:
     peak_velocity: float
     np_flag: bool
 
+BAT_CLASS_ID = 1
+
+def select_batter(persons: Sequence[Any],
+                  detections: Sequence[Dict[str, Any]] = (),
+                  prev_track_id: Optional[int] = None) -> Optional[Any]:
+    """Pick the batter among per-player poses (``PersonPose``).
+
+    Preference order: the player holding the bat (crop box containing / nearest
+    to the bat centre), then the previous frame's batter track, then the
+    largest player box.
+    """
+    if not persons:
+        return None
+    bats = [d for d in detections if d.get("class_id") == BAT_CLASS_ID]
+    if bats:
+        bat = max(bats, key=lambda d: d.get("confidence", 0.0))
+        bx = (bat["bbox"][0] + bat["bbox"][2]) / 2
+        by = (bat["bbox"][1] + bat["bbox"][3]) / 2
+        def dist(p):
+            x1, y1, x2, y2 = p.bbox
+            dx = max(x1 - bx, 0, bx - x2)
+            dy = max(y1 - by, 0, by - y2)
+            return np.hypot(dx, dy)
+        return min(persons, key=dist)
+    if prev_track_id is not None:
+        for p in persons:
+            if p.track_id == prev_track_id:
+                return p
+    return max(persons, key=lambda p: (p.bbox[2] - p.bbox[0]) * (p.bbox[3] - p.bbox[1]))
+
 class SwingAnalyzer:
+    """Wrist-velocity swing detector with hysteresis thresholds.
+
+    A swing starts when the wrist speed exceeds ``velocity_threshold`` and
+    ends on the first later frame slower than 30 % of it.  Frames can be fed
+    one at a time (:meth:`update`) or in chunks (:meth:`feed`); each
+    ``SwingEvent`` is returned as soon as its end frame arrives, and only a
+    handful of scalars are kept between calls.  :meth:`analyze` runs the same
+    code over a whole clip.
+    """
+
     def __init__(self,
                  fps: int = 30,
                  velocity_threshold: float = 800.0,  # px/s
@@ -30,59 +75,147 @@ class SwingAnalyzer:
         self.vel_th = velocity_threshold
         self.min_dur = min_duration_ms
         self.max_dur = max_duration_ms
+        self.reset()
+
+    def reset(self):
+        """Forget the stream state (last wrist position, open swing)."""
+        self._last_pos = np.zeros(2)   # last known wrist position
+        self._started = False          # first frame has velocity 0
+        self._frames_seen = 0
+        self._last_frame = -1
+        self._in_swing = False
+        self._swing_start = 0
+        self._swing_peak = 0.0
+
+    # ---------------- Private helpers -----------------
+    @staticmethod
+    def _as_array(frames_keypoints) -> np.ndarray:
+        """Accept a PoseClip, a (frames, 33, 4) array or per-frame keypoint dict lists."""
+        if isinstance(frames_keypoints, PoseClip):
+            return frames_keypoints.array
+        if isinstance(frames_keypoints, np.ndarray):
+            return frames_keypoints.reshape(-1, len(LANDMARK_INDEX), 4)
+        out = np.full((len(frames_keypoints), len(LANDMARK_INDEX), 4), np.nan, dtype=np.float32)
+        for i, kp_list in enumerate(frames_keypoints):
+            arr = pack_keypoints(kp_list)
+            if arr is not None:
+                out[i] = arr
+        return out
+
+    @staticmethod
+    def _wrist_positions(poses: np.ndarray, seed: Sequence[float] = (0.0, 0.0)) -> np.ndarray:
+        """(frames, 2) wrist track: right wrist when visible, else left, else last known.
+
+        Leading frames without a wrist take *seed* (the previous chunk's last position).
+        """
+        right, left = poses[:, RIGHT_WRIST], poses[:, LEFT_WRIST]
+        use_right = ~np.isnan(right[:, X]) & (right[:, VIS] >= 0.3)
+        pos = np.where(use_right[:, None], right[:, [X, Y]], left[:, [X, Y]]).astype(np.float64)
+        pos = np.concatenate([np.asarray(seed, dtype=np.float64).reshape(1, 2), pos])
+        known = ~np.isnan(pos[:, 0])
+        known[0] = True
+        # forward-fill: index of the most recent known row for every row
+        last = np.maximum.accumulate(np.where(known, np.arange(len(pos)), 0))
+        return pos[last][1:]
+
+    def _velocity(self, pos: np.ndarray) -> np.ndarray:
+        """Per-frame wrist speed in px/s, continuing from the previous chunk."""
+        prev = np.concatenate([self._last_pos[None], pos[:-1]])
+        v = np.hypot(*(pos - prev).T) * self.fps
+        if not self._started and len(v):
+            v[0] = 0.0
+        return v
+
+    def _event(self, end_frame: int, peak: float) -> SwingEvent:
+        duration = (end_frame - self._swing_start) * (1000 / self.fps)
+        return SwingEvent(start_frame=int(self._swing_start),
+                          end_frame=int(end_frame),
+                          duration_ms=duration,
+                          peak_velocity=float(peak),
+                          np_flag=not (self.min_dur <= duration <= self.max_dur))
+
+    def _scan(self, v: np.ndarray, frame_ids: np.ndarray) -> List[SwingEvent]:
+        """Hysteresis state machine over a chunk of velocities.
 
-    def _wrist_velocity(self, wrist_positions: List[Tuple[float, float]]) -> List[float]:
-        velocities = [0.0]
-        for i in range(1, len(wrist_positions)):
-            dx = wrist_positions[i][0] - wrist_positions[i-1][0]
-            dy = wrist_positions[i][1] - wrist_positions[i-1][1]
-            dist = np.hypot(dx, dy)
-            velocities.append(dist * self.fps)  # px/s
-        return velocities
+        Start/end candidates are found with array comparisons; Python only
+        steps once per swing, not once per frame.
+        """
+        above = np.flatnonzero(v > self.vel_th)
+        below = np.flatnonzero(v < self.vel_th * 0.3)
+        events: List[SwingEvent] = []
+        pos = 0
+        while pos < len(v):
+            if not self._in_swing:
+                k = np.searchsorted(above, pos)
+                if k == len(above):
+                    break
+                s = int(above[k])
+                self._in_swing, self._swing_start, self._swing_peak = True, frame_ids[s], v[s]
+                pos = s + 1
+                continue
+            k = np.searchsorted(below, pos)
+            if k == len(below):
+                self._swing_peak = max(self._swing_peak, float(v[pos:].max()))
+                break
+            e = int(below[k])
+            events.append(self._event(frame_ids[e], max(self._swing_peak, float(v[pos:e + 1].max()))))
+            self._in_swing = False
+            pos = e + 1
+        return events
+
+    # ---------------- Public API -----------------
+    def feed(self,
+             frames_keypoints: Union[PoseClip, np.ndarray, List[List[Dict]]],
+             frame_ids: Optional[Sequence[int]] = None) -> List[SwingEvent]:
+        """Process a chunk of frames and return the swings that ended in it.
+
+        Parameters
+        ----------
+        frames_keypoints : PoseClip, (frames, 33, 4) packed poses (NaN rows for
+                           frames without a pose), or keypoint dict lists
+        frame_ids : frame numbers of the chunk; defaults to the clip's ids, or
+                    to consecutive numbers continuing from the previous chunk
+        """
+        poses = self._as_array(frames_keypoints)
+        n = len(poses)
+        if n == 0:
+            return []
+        if frame_ids is None and isinstance(frames_keypoints, PoseClip):
+            frame_ids = frames_keypoints.frame_ids
+        ids = (np.arange(self._frames_seen, self._frames_seen + n) if frame_ids is None
+               else np.asarray(frame_ids, dtype=np.int64))
+        pos = self._wrist_positions(poses, self._last_pos)
+        v = self._velocity(pos)
+        events = self._scan(v, ids)
+        self._last_pos = pos[-1]
+        self._started = True
+        self._frames_seen += n
+        self._last_frame = int(ids[-1])
+        return events
 
-    def analyze(self, frames_keypoints: List[List[Dict]]) -> List[SwingEvent]:
+    def update(self, pose: Optional[np.ndarray], frame_id: Optional[int] = None) -> Optional[SwingEvent]:
+        """Process one frame's packed (33, 4) pose (None when no person was found)."""
+        chunk = pose[None] if pose is not None else np.full((1, len(LANDMARK_INDEX), 4), np.nan, np.float32)
+        events = self.feed(chunk, None if frame_id is None else [frame_id])
+        return events[0] if events else None
+
+    def flush(self) -> List[SwingEvent]:
+        """End of stream: close a swing still in progress at the last frame."""
+        events = []
+        if self._in_swing and self._last_frame != self._swing_start:
+            events.append(self._event(self._last_frame, self._swing_peak))
+        self._in_swing = False
+        return events
+
+    def analyze(self, frames_keypoints: Union[PoseClip, np.ndarray, List[List[Dict]]]) -> List[SwingEvent]:
         """
         Parameters
         ----------
-        frames_keypoints : list of keypoints per frame; a keypoint is dict with 'name','x','y'
+        frames_keypoints : PoseClip, (frames, 33, 4) packed pose array, or
+                           list of keypoints per frame (dicts with 'name','x','y','visibility')
         Returns
         -------
         list of SwingEvent
         """
-        # Extract right wrist coords (or left if unavailable)
-        wrist_positions = []
-        for kp_list in frames_keypoints:
-            wp = next((k for k in kp_list if k['name'] == 'RIGHT_WRIST'), None)
-            if wp is None or wp['visibility'] < 0.3:
-                wp = next((k for k in kp_list if k['name'] == 'LEFT_WRIST'), None)
-            if wp:
-                wrist_positions.append((wp['x'], wp['y']))
-            else:
-                wrist_positions.append(wrist_positions[-1] if wrist_positions else (0, 0))
-
-        velocities = self._wrist_velocity(wrist_positions)
-        events: List[SwingEvent] = []
-        in_swing = False
-        start_idx = 0
-        peak_v = 0.0
-
-        for i, v in enumerate(velocities):
-            if not in_swing and v > self.vel_th:
-                in_swing = True
-                start_idx = i
-                peak_v = v
-            elif in_swing:
-                peak_v = max(peak_v, v)
-                if v < self.vel_th * 0.3 or i == len(velocities) - 1:
-                    # end swing
-                    duration = (i - start_idx) * (1000 / self.fps)
-                    np_flag = not (self.min_dur <= duration <= self.max_dur)
-                    events.append(SwingEvent(
-                        start_frame=start_idx,
-                        end_frame=i,
-                        duration_ms=duration,
-                        peak_velocity=peak_v,
-                        np_flag=np_flag
-                    ))
-                    in_swing = False
-        return events
+        stream = SwingAnalyzer(self.fps, self.vel_th, self.min_dur, self.max_dur)
+        return stream.feed(frames_keypoints) + stream.flush()
@@ -0,0 +1,27 @@
+import cv2
+import numpy as np
+import pytest
+pytest.importorskip("httpx")
+pytest.importorskip("multipart")
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from api.dependencies import get_detector
+from api.routes.inference import router
+
+class _FakeDetector:
+    def __init__(self):
+        self.calls=[]
+    def predict_batch(self, imgs):
+        self.calls.append(len(imgs)); return [[] for _ in imgs]
+
+def test_batch_chunk_size_validated():
+    det=_FakeDetector()
+    app=FastAPI(); app.include_router(router)
+    app.dependency_overrides[get_detector]=lambda: det
+    png=cv2.imencode(".png",np.zeros((8,8,3),np.uint8))[1].tobytes()
+    files=[("files",(f"{i}.png",png,"image/png")) for i in range(3)]
+    client=TestClient(app)
+    for bad in (0,-2):
+        assert client.post(f"/inference/batch?chunk_size={bad}",files=files).status_code==422
+    r=client.post("/inference/batch?chunk_size=2",files=files)
+    assert r.status_code==200 and len(r.json()["detections"])==3 and det.calls==[2,1]
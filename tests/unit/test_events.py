@@ -0,0 +1,50 @@
+import numpy as np
+from integration.frame_store import FrameStore
+from integration.events import EventEngine, ContactRule, PlateCrossingRule, CatchRule, same_frame_pairs
+from detection.postprocess import tag_events
+
+def _det(box, cls, tid=None, conf=0.9):
+    return {"bbox":list(box),"confidence":conf,"class_id":cls,"track_id":tid}
+
+def test_same_frame_pairs():
+    fidx=np.array([0,0,1,2,2,2])
+    a,b=same_frame_pairs(fidx,np.array([0,3]),np.array([1,2,4,5]))
+    assert list(zip(a,b))==[(0,1),(3,4),(3,5)]
+
+def test_contact_runs_are_merged():
+    st=FrameStore()
+    for i in range(10):
+        dets=[_det((100,100,120,120),1,2)]
+        if 2<=i<=6 and i!=4:
+            dets.append(_det((102+i,100,122+i,120),0,1))
+        st.append(i,None,dets)
+    ev=EventEngine([ContactRule()]).run(st)
+    assert [(e.frame_start,e.frame_end) for e in ev]==[(2,6)]
+    assert ev[0].metadata["peak_frame"]==2 and ev[0].metadata["frames"]==4
+    assert ev[0].metadata["ball_track"]==1 and ev[0].metadata["bat_track"]==2
+    assert [(e.frame_start,e.frame_end) for e in EventEngine([ContactRule(max_gap=0)]).run(st)]==[(2,3),(5,6)]
+
+def test_plate_and_catch_rules():
+    st=FrameStore()
+    for i in range(12):
+        dets=[_det((300,0,400,200),2,9)]
+        if i<6:
+            dets.append(_det((i*60,100,i*60+10,110),0,1))
+        st.append(i,None,dets)
+    plate=EventEngine([PlateCrossingRule(zone=(100,90,200,120))]).run(st)
+    assert [(e.frame_start,e.frame_end) for e in plate]==[(2,3)]
+    catch=EventEngine([CatchRule(vanish_frames=3)]).run(st)
+    assert [(e.type,e.frame_start,e.frame_end,e.metadata["player_track"]) for e in catch]==[("catch",5,5,9)]
+
+def test_tag_events_single_frame():
+    ev=tag_events([_det((0,0,10,10),0),_det((2,0,12,10),1),_det((50,50,60,60),1)])
+    assert len(ev)==1 and ev[0]["bat"]["bbox"]==[2,0,12,10] and 0.6<ev[0]["iou"]<0.7
+
+def test_rule_is_abstract_and_tagging_uses_detection_pairs():
+    import pytest
+    from integration.events import Rule
+    from detection.postprocess import tag_events
+    with pytest.raises(TypeError):
+        Rule()
+    dets=[{"bbox":[0,0,10,10],"class_id":0},{"bbox":[2,2,12,12],"class_id":1}]
+    assert [e["type"] for e in tag_events(dets)]==["contact"]
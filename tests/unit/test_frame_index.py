@@ -0,0 +1,39 @@
+from pathlib import Path
+import cv2
+import numpy as np
+from ingest.frame_index import FrameIndex, FrameReader
+
+VIDEO=str(Path(__file__).resolve().parents[1]/"data"/"sample.mp4")
+
+def _all_frames():
+    cap=cv2.VideoCapture(VIDEO); out=[]
+    while True:
+        ok,f=cap.read()
+        if not ok: return out
+        out.append(f)
+
+def test_index_cached_and_random_access(tmp_path):
+    idx=FrameIndex.load_or_build(VIDEO,cache_dir=tmp_path,use_ffprobe=False)
+    assert len(idx)==20 and abs(idx.timestamps[3]-300)<1e-6 and idx.frame_at(350)==3
+    assert np.array_equal(FrameIndex.load_or_build(VIDEO,cache_dir=tmp_path).timestamps,idx.timestamps)
+    ref=_all_frames()
+    idx.keyframes_known=True; idx.keyframe=np.arange(20)%5==0; idx.__post_init__()
+    with FrameReader(VIDEO,idx) as r:
+        assert all(np.array_equal(r.get(i),ref[i]) for i in [7,3,19,0,13,14])
+        assert r.index.keyframe_before(13)==10
+        assert [(i,np.array_equal(f,ref[i])) for i,f in r.range(16,25)]==[(i,True) for i in range(16,20)]
+
+def test_shared_reader_follows_file_changes(tmp_path,monkeypatch):
+    import os, shutil
+    from ingest import frame_index
+    monkeypatch.setattr(frame_index,"_default_cache_dir",lambda: tmp_path/"index")
+    video=str(tmp_path/"clip.mp4"); shutil.copy(VIDEO,video)
+    ref=_all_frames()
+    assert np.array_equal(frame_index.get_frame(video,4),ref[4])
+    old,_=frame_index._reader(os.path.abspath(video))
+    st=os.stat(video); os.utime(video,ns=(st.st_atime_ns,st.st_mtime_ns+10**9))
+    assert [i for i,_ in frame_index.get_range(video,17,30)]==[17,18,19]
+    new,_=frame_index._reader(os.path.abspath(video))
+    assert new is not old and not old._cap.isOpened() and new.index.mtime_ns==st.st_mtime_ns+10**9
+    frame_index.close_readers()
+    assert not new._cap.isOpened() and not frame_index._readers
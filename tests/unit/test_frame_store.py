@@ -0,0 +1,100 @@
+from datetime import datetime
+import numpy as np
+from integration.frame_store import FrameStore
+from integration.aggregator import StreamAggregator
+from integration.exporter import frames_to_dataframe
+
+def _det(x, cls, tid=None):
+    return {"bbox":[x,0.0,x+10.0,10.0],"confidence":0.9,"class_id":cls,"track_id":tid}
+
+def test_frame_store_columns_and_lazy_views():
+    st=FrameStore()
+    t=datetime(2024,5,1,18,30)
+    st.append(0,t,[_det(0,0,7),_det(5,1)],None,{"speed":"152 km/h"})
+    st.append(1,t,[],None,{"speed":"152 km/h"})
+    assert st.det_offsets.tolist()==[0,2,2] and st.det_track_id.tolist()==[7,-1]
+    assert st.strings==["speed","152 km/h"]
+    f=st[0]
+    assert f.timestamp==t and f.detections[0].bbox.x2==10 and f.detections[1].track_id is None
+    assert f.ocr[0].text=="152 km/h" and st[-1].detections==[]
+    again=FrameStore.from_frames(list(st))
+    assert [r for r in again.records()]==[r for r in st.records()]
+    df=frames_to_dataframe(st)
+    assert df["frame_id"].tolist()==[0,0] and df["track_id"].isna().tolist()==[False,True]
+
+def test_contact_events_from_columns():
+    agg=StreamAggregator()
+    agg.add_frame(0,[_det(0,0,1),_det(2,1,2),_det(50,1,3)])
+    agg.add_frame(1,[_det(0,0,1)])
+    ev=agg.generate_contact_events()
+    assert len(ev)==1 and ev[0].frame_start==0 and ev[0].metadata["bat_track"]==2
+
+def test_sanitize_drops_invalid_instead_of_raising(tmp_path):
+    import pytest
+    from integration.exporter import JSONLinesWriter, read_jsonl
+    from integration.schema import FrameData, trusted_frame
+    t=datetime(2024,5,1,18,30)
+    flat={"bbox":[5.0,5.0,5.0,9.0],"confidence":0.5,"class_id":0}
+    agg=StreamAggregator()
+    for bad in (flat,{**_det(1,0),"bbox":[float("nan"),0,5,5]},{**_det(1,0),"confidence":float("nan")}):
+        with pytest.raises(ValueError):
+            agg.add_frame(0,[bad],timestamp=t)
+    agg.add_frame(0,[flat,{**_det(1,0),"confidence":1.02}],timestamp=t,sanitize=True)
+    assert len(agg.frames[0].detections)==1 and agg.frames[0].detections[0].confidence==1.0
+    with JSONLinesWriter(tmp_path/"f.jsonl") as w:
+        w.write(agg.store.record(0))
+    assert list(read_jsonl(tmp_path/"f.jsonl"))[0].detections[0].bbox.x1==1.0
+    valid=[_det(0,0,3)]
+    ref=FrameData(frame_id=1,timestamp=t,detections=[{**valid[0],"bbox":dict(zip(["x1","y1","x2","y2"],valid[0]["bbox"]))}],
+                  ocr=[{"region":"speed","text":"150"}])
+    assert trusted_frame(1,t,valid,None,{"speed":"150"})==ref
+
+def test_take_save_load_roundtrip(tmp_path):
+    st=FrameStore()
+    t=datetime(2024,5,1,18,30)
+    for i in range(6):
+        st.append(i,t,[_det(i,i%2,i)]*(i%3),None,{"clock":str(i)})
+    part=st.take(2,5)
+    assert part.frame_ids.tolist()==[2,3,4] and part.strings==["clock","2","3","4"]
+    assert list(part.records())==[st.record(i) for i in range(2,5)]
+    assert list(FrameStore.load(part.save(tmp_path/"seg.npz")).records())==list(part.records())
+
+def test_windowed_aggregator_spills_and_keeps_events(tmp_path):
+    from integration.events import CatchRule, ContactRule
+    rng=np.random.default_rng(0)
+    t=datetime(2024,5,1,18,30)
+    full=StreamAggregator(rules=[ContactRule(),CatchRule()])
+    win=StreamAggregator(window=40,spill=tmp_path,spill_every=10,rules=[ContactRule(),CatchRule()])
+    for i in range(500):
+        dets=[_det(float(rng.integers(0,20)),int(rng.integers(0,3))) for _ in range(rng.integers(0,3))]
+        full.add_frame(i,dets,timestamp=t); win.add_frame(i,dets,timestamp=t)
+    assert len(win.store)<60 and win.total_frames==500
+    assert [e.dict() for e in win.events()]==[e.dict() for e in full.events()]
+    assert [f.frame_id for f in win.history()]==list(range(500))
+    assert not any(win._settled) and win.spill.event_paths()  # settled events left memory with the frames
+
+def test_settled_events_capped_without_directory(monkeypatch):
+    from integration import aggregator
+    monkeypatch.setattr(aggregator,"MAX_SETTLED_EVENTS",2)
+    t=datetime(2024,5,1,18,30)
+    agg=aggregator.StreamAggregator(window=20,spill=lambda store: None,spill_every=5)
+    for i in range(200):
+        agg.add_frame(i,[_det(0,0,1),_det(2,1,2)] if i%10==0 else [],timestamp=t)
+    assert [e.frame_start for e in agg.history_events()]==[160,170]
+    assert [e.frame_start for e in agg.events()]==[160,170,180,190]
+
+def test_spill_directory_reopened_and_streamed_json(tmp_path):
+    from integration.exporter import export_json, export_json_stores
+    from integration.frame_store import SegmentDirectory
+    t=datetime(2024,5,1,18,30)
+    for run in range(2):
+        agg=StreamAggregator(window=20,spill=tmp_path/"seg",spill_every=5)
+        for i in range(60):
+            agg.add_frame(i,[_det(float(i),run)],timestamp=t)
+        assert [f.frame_id for f in agg.history()]==list(range(60))
+    assert len(SegmentDirectory(tmp_path/"seg").paths())==len(agg.spill.paths())
+    export_json(list(agg.history()),str(tmp_path/"a.json"))
+    export_json_stores(agg.history_stores(),str(tmp_path/"b.json"))
+    assert (tmp_path/"a.json").read_text()==(tmp_path/"b.json").read_text()
+    export_json_stores([],str(tmp_path/"c.json"))
+    assert (tmp_path/"c.json").read_text()=="[]"
@@ -0,0 +1,17 @@
+from datetime import datetime
+from integration.aggregator import StreamAggregator
+from integration.exporter import JSONLinesWriter, read_jsonl
+
+def test_jsonl_stream_roundtrip(tmp_path):
+    agg=StreamAggregator()
+    path=tmp_path/"game_frames.jsonl.gz"
+    with JSONLinesWriter(path,flush_every=2) as w:
+        for i in range(5):
+            agg.add_frame(i,[{"bbox":[0,0,5,5],"confidence":0.5,"class_id":0}],None,{"speed":"150"},datetime(2024,1,1))
+            w.write(agg.store.record(i))
+            if i==2:
+                assert len(list(read_jsonl(path,raw=True)))==2  # flushed records readable mid-game
+    frames=list(read_jsonl(path))
+    assert [f.frame_id for f in frames]==list(range(5))
+    assert frames[0].detections[0].bbox.x2==5 and frames[0].ocr[0].text=="150"
+    assert frames[0].timestamp==datetime(2024,1,1)
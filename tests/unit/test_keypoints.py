@@ -0,0 +1,45 @@
+import json
+import numpy as np
+from pose.keypoints import PoseClip, pack_keypoints, unpack_keypoints, LANDMARK_INDEX
+from pose.swing_analysis import SwingAnalyzer
+from integration.aggregator import StreamAggregator
+from integration.exporter import export_json
+
+def _wrist(x, y, vis=0.9):
+    return [{"name":"RIGHT_WRIST","x":x,"y":y,"z":0.0,"visibility":vis}]
+
+def test_pack_unpack_roundtrip():
+    arr=pack_keypoints(_wrist(10.0,20.0))
+    assert arr.shape==(33,4) and arr.dtype==np.float32
+    assert arr[LANDMARK_INDEX["RIGHT_WRIST"]].tolist()==[10.0,20.0,0.0,np.float32(0.9)]
+    kps=unpack_keypoints(arr)
+    assert len(kps)==1 and kps[0]["name"]=="RIGHT_WRIST"
+    assert pack_keypoints([]) is None
+
+def test_pose_clip_grows_and_gets():
+    clip=PoseClip(capacity=2)
+    for i in range(5):
+        clip.append(i, pack_keypoints(_wrist(i,i)) if i!=3 else None)
+    assert clip.array.shape==(5,33,4)
+    assert clip.get(3) is None and clip.get(7) is None
+    assert clip.get(4)[LANDMARK_INDEX["RIGHT_WRIST"],0]==4
+
+def test_swing_analyzer_accepts_packed_and_dicts():
+    frames=[_wrist(0,0)]*3+[_wrist(100*i,0) for i in range(1,5)]+[_wrist(400,0)]*3
+    clip=PoseClip()
+    for i,kp in enumerate(frames):
+        clip.append(i, pack_keypoints(kp))
+    ana=SwingAnalyzer(fps=30)
+    assert ana.analyze(frames)==ana.analyze(clip)
+    assert len(ana.analyze(clip))==1
+
+def test_export_json_includes_pose(tmp_path):
+    agg=StreamAggregator()
+    agg.add_frame(0, pose=_wrist(1.0,2.0))
+    agg.add_frame(1, pose=None)
+    out=tmp_path/"out.json"
+    export_json(agg.frames, out, poses=agg.poses)
+    data=json.load(open(out))
+    assert data[0]["pose"]["keypoints"][0]["name"]=="RIGHT_WRIST"
+    assert data[1]["pose"] is None
+    assert agg.pose_frame(0).keypoints[0].x==1.0
@@ -0,0 +1,18 @@
+import numpy as np, cv2
+from ocr.layout import LayoutRegistry, OverlayLocalizer
+
+def test_fixed_layout_scales_relative_boxes():
+    reg=LayoutRegistry({"tv":{"speed":[0.5,0.5,1.0,1.0]}},default="tv")
+    assert reg.provider()(np.zeros((100,200,3),np.uint8))=={"speed":(100,50,200,100)}
+
+def test_localizer_finds_static_overlay():
+    rng=np.random.default_rng(0)
+    loc=OverlayLocalizer(history=4)
+    for _ in range(4):
+        f=cv2.GaussianBlur((rng.random((360,640,3))*200).astype(np.uint8),(21,21),0)
+        cv2.rectangle(f,(10,10),(200,50),(30,30,30),-1)
+        cv2.putText(f,"TPE 3 JPN 1",(15,40),cv2.FONT_HERSHEY_SIMPLEX,0.8,(255,255,255),2)
+        regions=loc(f)
+    x1,y1,x2,y2=regions["scoreboard"]
+    assert x1<=15 and y1<=20 and x2>=150 and y2>=40 and x2<=240 and y2<=80
+    assert loc.localizations==1
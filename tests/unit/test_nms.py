@@ -0,0 +1,51 @@
+import numpy as np
+from detection.nms import box_iou, nms, batched_nms, soft_nms, _greedy_blocked, _greedy_loop, _greedy_matrix
+from detection.postprocess import nms_boxes
+
+def test_box_iou_matrix():
+    a=np.array([[0,0,10,10],[5,5,15,15]],dtype=np.float32)
+    iou=box_iou(a,a)
+    assert iou.shape==(2,2)
+    assert np.allclose(np.diag(iou),1.0)
+    assert np.isclose(iou[0,1],25/175,atol=1e-4)
+
+def test_matrix_and_loop_paths_agree():
+    rng=np.random.default_rng(0)
+    xy=rng.uniform(0,200,(300,2)); wh=rng.uniform(10,60,(300,2))
+    boxes=np.hstack([xy,xy+wh]).astype(np.float32)
+    assert _greedy_matrix(boxes,0.45).tolist()==_greedy_loop(boxes,0.45).tolist()
+
+def test_blocked_path_matches_loop_on_large_inputs():
+    rng=np.random.default_rng(1)
+    centers=rng.uniform(0,1920,(300,2)); owner=rng.integers(0,300,3000)
+    c=centers[owner]+rng.normal(0,8,(3000,2)); wh=rng.uniform(20,120,(3000,2))
+    boxes=np.hstack([c-wh/2,c+wh/2]).astype(np.float32)
+    scores=rng.uniform(0.25,1,3000).astype(np.float32)
+    order=np.argsort(-scores,kind="stable")
+    ref=order[_greedy_loop(boxes[order],0.45)]
+    assert nms(boxes,scores,0.45).tolist()==ref.tolist()
+    assert _greedy_blocked(boxes[order],0.45,block=7).tolist()==_greedy_loop(boxes[order],0.45).tolist()
+
+def test_class_aware_does_not_cross_suppress():
+    boxes=np.array([[0,0,10,10],[0,0,10,10]],dtype=np.float32)
+    scores=np.array([0.9,0.8],dtype=np.float32)
+    assert len(nms(boxes,scores,0.5))==1
+    keep,_=batched_nms(boxes,scores,np.array([0,1]),0.5)
+    assert sorted(keep.tolist())==[0,1]
+    keep,_=batched_nms(boxes,scores,np.array([0,1]),0.5,agnostic=True)
+    assert keep.tolist()==[0]
+
+def test_top_k_and_soft_nms():
+    boxes=np.array([[0,0,10,10],[1,1,11,11],[50,50,60,60]],dtype=np.float32)
+    scores=np.array([0.9,0.8,0.1],dtype=np.float32)
+    assert nms(boxes,scores,0.5,top_k=1).tolist()==[0]
+    keep,s=soft_nms(boxes,scores)
+    assert keep[0]==0 and len(keep)==3
+    assert s[1]<0.8
+
+def test_nms_boxes_dicts():
+    dets=[{"bbox":[0,0,10,10],"confidence":0.9,"class_id":0},
+          {"bbox":[0,0,10,10],"confidence":0.8,"class_id":1},
+          {"bbox":[1,1,10,10],"confidence":0.7,"class_id":0}]
+    out=nms_boxes(dets,0.5)
+    assert [d["confidence"] for d in out]==[0.9,0.8]
@@ -0,0 +1,56 @@
+import numpy as np
+from ocr.ocr_service import OCRBackend, recognize_regions, stack_regions, split_by_band
+from ocr.ocr_cache import OCRCache
+
+class _CountingBackend(OCRBackend):
+    def __init__(self):
+        self.batches=[]
+    def recognize_batch(self, imgs, lang="eng", psm=7):
+        self.batches.append(len(imgs)); return [f"r{i}" for i in range(len(imgs))]
+
+def test_stack_and_split_regions():
+    page,bands=stack_regions([np.zeros((10,30),np.uint8),np.zeros((20,50),np.uint8)],gap=5)
+    assert page.shape==(45,60) and bands==[(5,15),(20,40)]
+    data={"text":["152","km/h","","TOP"],"top":[6,6,0,22],"height":[8,8,0,10],"left":[30,5,0,5],
+          "block_num":[1,1,1,1],"par_num":[1,1,1,1],"line_num":[1,1,1,2]}
+    assert split_by_band(data,bands)==["km/h 152","TOP"]
+
+def test_recognize_regions_batches_misses():
+    frame=np.full((100,200,3),255,np.uint8); frame[10:20,10:40]=0
+    regions={"a":(0,0,100,50),"b":(100,0,200,50),"empty":(0,0,0,0)}
+    backend,cache=_CountingBackend(),OCRCache()
+    assert recognize_regions(frame,regions,cache=cache,backend=backend)=={"a":"r0","b":"r1","empty":""}
+    assert recognize_regions(frame,regions,cache=cache,backend=backend)=={"a":"r0","b":"r1","empty":""}
+    assert backend.batches==[2]
+
+def test_ocr_worker_rate_limits_and_publishes_latest():
+    from ocr.worker import OCRWorker
+    backend=_CountingBackend()
+    dark=np.zeros((60,80,3),np.uint8); bright=np.full((60,80,3),255,np.uint8)
+    worker=OCRWorker({"a":(0,0,40,30)},rate_hz=2,fps=30,backend=backend).start()
+    taken=[worker.submit(i,dark if i<20 else bright) for i in range(30)]
+    worker.stop()
+    assert [i for i,t in enumerate(taken) if t]==[0,15,20]
+    assert worker.scene_changes==1 and worker.latest()=={"a":"r0"}
+    assert worker.latest_frame_id in (15,20)
+
+def test_parse_inning():
+    from ocr.parsers import parse_inning
+    assert [parse_inning(t) for t in ["TOP 7","▼3 TAO 2","9th","H 2 E 0 S 3","B 2 S 1"]]==[7,3,9,None,None]
+
+def test_backend_defaults():
+    import pytest
+    from ocr.ocr_service import PytesseractBackend
+    with pytest.raises(TypeError):
+        OCRBackend()
+    try:
+        assert PytesseractBackend().batch is False
+    except ImportError:
+        pass
+
+def test_find_brightest_region_full_resolution_default():
+    from ocr.ocr_service import find_brightest_region
+    frame=np.zeros((360,640,3),np.uint8); frame[41:60,301:340]=255
+    x1,y1,x2,y2=find_brightest_region(frame)
+    assert 301<=(x1+x2)//2<340 and (x2-x1,y2-y1)==(400,100)
+    assert abs(find_brightest_region(frame,scale=0.25)[0]-x1)<=4
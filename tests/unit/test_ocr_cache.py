@@ -0,0 +1,16 @@
+import numpy as np
+from ocr.ocr_cache import OCRCache
+
+def test_ocr_cache_reuses_unchanged_region():
+    calls=[]
+    def ocr(img):
+        calls.append(1); return str(len(calls))
+    cache=OCRCache()
+    img=np.full((20,80),255,np.uint8); img[5:15,10:20]=0
+    assert cache.get("speed",img,ocr)=="1"
+    noisy=img.copy(); noisy[0,0]=0
+    assert cache.get("speed",noisy,ocr)=="1"
+    changed=img.copy(); changed[5:15,40:60]=0
+    assert cache.get("speed",changed,ocr)=="2"
+    assert cache.get("score",img,ocr)=="3"
+    assert cache.stats()=={"hits":1,"misses":3,"hit_rate":0.25}
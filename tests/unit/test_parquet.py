@@ -0,0 +1,42 @@
+import pytest
+pytest.importorskip("pyarrow")
+from integration.aggregator import StreamAggregator
+from integration.exporter import ParquetExporter, read_parquet
+
+def test_parquet_append_partitions_and_filters(tmp_path):
+    agg=StreamAggregator()
+    with ParquetExporter(tmp_path,"g1") as ex:
+        for i in range(8):
+            agg.add_frame(i,[{"bbox":[0,0,5,5],"confidence":0.5,"class_id":i%2}],
+                          [{"name":"NOSE","x":1,"y":2,"visibility":0.9}],{"speed":"150"})
+            if i==3:
+                assert ex.append(agg.store,inning=1)==4
+        assert ex.append(agg.store,inning=2)==4
+    assert sorted(p.parent.name for p in (tmp_path/"detections").rglob("*.parquet"))==["inning=1","inning=2"]
+    df=read_parquet(tmp_path,class_ids=[1],frame_range=(2,7))
+    assert df["frame_id"].tolist()==[3,5] and df["track_id"].isna().all()
+    assert read_parquet(tmp_path,"ocr",innings=[2])["text"].astype(str).tolist()==["150"]*4
+    assert read_parquet(tmp_path,"pose",game_id="g1")["landmark"].astype(str).unique().tolist()==["NOSE"]
+
+def test_parquet_numeric_game_id(tmp_path):
+    agg=StreamAggregator()
+    agg.add_frame(0,[{"bbox":[0,0,5,5],"confidence":0.5,"class_id":1}],None,{})
+    with ParquetExporter(tmp_path,"20240501") as ex:
+        ex.append(agg.store,inning=3)
+    df=read_parquet(tmp_path,game_id="20240501",innings=[3])
+    assert df["frame_id"].tolist()==[0] and df["game"].astype(str).tolist()==["20240501"]
+
+def test_parquet_reexport_overwrites_game(tmp_path):
+    agg=StreamAggregator()
+    for i in range(4):
+        agg.add_frame(i,[{"bbox":[0,0,5,5],"confidence":0.5,"class_id":1}],None,{})
+    for _ in range(2):
+        with ParquetExporter(tmp_path,"g1") as ex:
+            ex.append(agg.store,inning=1)
+    with ParquetExporter(tmp_path,"g2") as ex:
+        ex.append(agg.store)
+    assert read_parquet(tmp_path,game_id="g1")["frame_id"].tolist()==[0,1,2,3]
+    assert len(read_parquet(tmp_path,game_id="g2"))==4
+    with ParquetExporter(tmp_path,"g1",mode="append") as ex:
+        ex.append(agg.store,inning=2)
+    assert read_parquet(tmp_path,game_id="g1")["frame_id"].tolist()==[0,1,2,3]*2
@@ -0,0 +1,47 @@
+import random, time
+import pytest
+from common.pipeline import PipelineEngine, Stage
+
+def _jitter_square():
+    def fn(x):
+        time.sleep(random.random() * 0.002)
+        return x * x
+    return fn
+
+def test_pipeline_preserves_order():
+    out=[]
+    engine=PipelineEngine(range(200), [Stage("a", _jitter_square, workers=4),
+                                       Stage("b", lambda: (lambda x: x + 1), workers=2)],
+                          out.append, queue_size=4)
+    assert engine.run()==200
+    assert out==[i*i+1 for i in range(200)]
+
+def test_pipeline_propagates_errors():
+    def bad():
+        def fn(x):
+            if x==5:
+                raise ValueError("boom")
+            return x
+        return fn
+    engine=PipelineEngine(range(50), [Stage("bad", bad, workers=2)], lambda x: None)
+    with pytest.raises(ValueError):
+        engine.run()
+
+def test_pipeline_batched_stage():
+    out=[]
+    sizes=[]
+    def batched():
+        def fn(items):
+            sizes.append(len(items))
+            return [x * 2 for x in items]
+        return fn
+    engine=PipelineEngine(range(100), [Stage("b", batched, batch_size=8)], out.append)
+    assert engine.run()==100
+    assert out==[x*2 for x in range(100)]
+    assert max(sizes)<=8
+
+def test_stage_rejects_empty_workers_and_batches():
+    with pytest.raises(ValueError):
+        Stage("detect", lambda: (lambda x: x), workers=0)
+    with pytest.raises(ValueError):
+        Stage("detect", lambda: (lambda x: x), batch_size=0)
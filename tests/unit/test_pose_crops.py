@@ -0,0 +1,16 @@
+import numpy as np
+import pytest
+mp=pytest.importorskip("mediapipe")
+if not hasattr(mp,"solutions"):
+    pytest.skip("mediapipe build without the solutions API",allow_module_level=True)
+from pose.pose_estimator import PoseEstimator
+
+def test_infer_crops_skips_boxes_outside_the_frame():
+    est=PoseEstimator()
+    frame=np.zeros((240,320,3),np.uint8)
+    dets=[{"bbox":[-300.0,-200.0,-150.0,-40.0],"class_id":2},   # fully off-frame
+          {"bbox":[400.0,20.0,520.0,200.0],"class_id":2},       # right of the frame
+          {"bbox":[300.0,20.0,360.0,200.0],"class_id":2}]       # clipped to a 20 px sliver
+    assert est.infer_crops(frame,dets)==[]
+    assert est._pose is None  # crops never build the full-frame graph
+    est.close()
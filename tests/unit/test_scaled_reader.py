@@ -0,0 +1,42 @@
+from pathlib import Path
+import cv2
+import numpy as np
+from ingest.scaled_reader import FrameScale, ScaledReader, fit_size
+
+VIDEO=str(Path(__file__).resolve().parents[1]/"data"/"sample.mp4")
+
+def test_fit_size_and_mapping_to_source():
+    assert fit_size(3840,2160,640)==(640,360) and fit_size(1920,1080,640)==(640,360) and fit_size(320,240,640)==(320,240)
+    scale=FrameScale((1920,1080),(640,360))
+    dets=scale.boxes_to_source([{"bbox":[10,20,30,40],"class_id":2}])
+    assert dets[0]["bbox"]==[30,60,90,120]
+    kp=np.array([[100,50,0.1,0.9]]*33,np.float32)
+    assert np.allclose(scale.keypoints_to_source(kp)[0],[300,150,0.3,0.9]) and scale.keypoints_to_source(None) is None
+
+def test_opencv_backend_frames_and_full_frame_on_demand(tmp_path):
+    cap=cv2.VideoCapture(VIDEO); ref=[]
+    while True:
+        ok,f=cap.read()
+        if not ok: break
+        ref.append(f)
+    with ScaledReader(VIDEO,max_side=32,backend="opencv",index_dir=tmp_path) as r:
+        assert r.size==(32,32) and r.scale.sx==2.0
+        frames=list(r)
+        assert [i for i,_ in frames]==list(range(20))
+        assert all(np.array_equal(f,cv2.resize(ref[i],(32,32),interpolation=cv2.INTER_AREA)) for i,f in frames)
+        assert np.array_equal(r.full_frame(13),ref[13]) and r.full_frame(25) is None
+
+def test_ocr_worker_reads_full_frames_from_source():
+    from ocr.worker import OCRWorker
+    from ocr.ocr_service import OCRBackend
+    class Shape(OCRBackend):
+        def recognize_batch(self, imgs, lang="eng", psm=7):
+            return [f"{im.shape[1]}x{im.shape[0]}" for im in imgs]
+    full=np.zeros((120,160,3),np.uint8); requested=[]
+    def source(i):
+        requested.append(i); return full
+    worker=OCRWorker({"a":(0,0,100,50)},rate_hz=1,fps=10,backend=Shape(),frame_source=source).start()
+    for i in range(5):
+        worker.submit(i,np.zeros((30,40,3),np.uint8))
+    worker.stop()
+    assert requested==[0] and worker.latest()=={"a":"100x50"}
@@ -0,0 +1,37 @@
+from pathlib import Path
+import cv2
+import numpy as np
+from ingest.frame_index import FrameIndex
+from ingest.segmented_reader import SegmentedReader, plan_segments
+
+VIDEO=str(Path(__file__).resolve().parents[1]/"data"/"sample.mp4")
+
+class _Checksum:
+    def __init__(self, segment):
+        self.seen=[]
+    def __call__(self, frame_id, frame):
+        self.seen.append(frame_id)
+        return int(frame.astype("int64").sum()), len(self.seen)
+
+def test_plan_segments_snaps_to_keyframes():
+    segs=plan_segments(100,4,overlap=10,keyframes=[0,12,24,36,48,60,72,84,96])
+    assert [(s.start,s.stop,s.warmup) for s in segs]==[(0,24,0),(24,48,12),(48,72,36),(72,100,60)]
+
+def test_segmented_decode_matches_sequential():
+    cap=cv2.VideoCapture(VIDEO); ref=[]
+    while True:
+        ok,f=cap.read()
+        if not ok: break
+        ref.append(int(f.astype("int64").sum()))
+    reader=SegmentedReader(VIDEO,workers=2,overlap=3,segments=3,mp_context="fork")
+    segs=list(reader.map_segments(_Checksum))
+    out=[(fid,r) for s in segs for fid,r in s.results]
+    assert [fid for fid,_ in out]==list(range(len(ref))) and [r[0] for _,r in out]==ref
+    assert segs[1].handoff[0]==ref[segs[1].segment.start-1] and segs[1].results[0][1][1]==4  # 3 warm-up frames seen
+
+def test_segments_use_frame_index_keyframes(tmp_path):
+    idx=FrameIndex.build(VIDEO,use_ffprobe=False)
+    idx.keyframes_known=True; idx.keyframe=np.arange(20)%6==0; idx.__post_init__()
+    segs=SegmentedReader(VIDEO,workers=2,overlap=3,segments=3,index=idx).segments()
+    assert [(s.start,s.stop,s.warmup) for s in segs]==[(0,6,0),(6,12,0),(12,20,6)]
+    assert SegmentedReader(VIDEO,segments=3,index_dir=tmp_path).segments()[-1].stop==20
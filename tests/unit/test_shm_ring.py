@@ -0,0 +1,87 @@
+import multiprocessing as mp
+import numpy as np
+from ingest.shm_ring import SharedFrameRing
+
+def _sample_video():
+    from pathlib import Path
+    return str(Path(__file__).resolve().parents[1]/"data"/"sample.mp4")
+
+def _consume(name, n, q):
+    ring=SharedFrameRing.attach(name)
+    got=[(v.frame_id,int(v.frame[0,0,0]),int(v.frame[-1,-1,-1])) for _,v in zip(range(n),ring.reader("oldest"))]
+    q.put(got)
+    del got
+    ring.close()
+
+def test_ring_views_lapping_and_readers():
+    with SharedFrameRing.create((6,8,3),slots=4) as ring:
+        rd=ring.reader("oldest")
+        for i in range(3):
+            ring.write(np.full((6,8,3),i),frame_id=10+i)
+        v=rd.next(timeout=0)
+        assert v.frame_id==10 and v.frame.base is not None and (v.frame==0).all() and v.valid()
+        for i in range(3,8):
+            slot=ring.claim(); slot[...]=i; ring.publish(10+i)
+        assert not v.valid() and v.copy() is None
+        assert rd.next(timeout=0).frame_id==14 and rd.dropped==3
+        assert ring.latest().frame_id==17 and rd.next(timeout=0).frame_id==15
+        del v
+
+def test_ring_shared_across_processes():
+    with SharedFrameRing.create((4,4,3),slots=8) as ring:
+        q=mp.Queue()
+        p=mp.Process(target=_consume,args=(ring.name,5,q))
+        for i in range(5):
+            ring.write(np.full((4,4,3),i),frame_id=i)
+        p.start()
+        assert q.get(timeout=10)==[(i,i,i) for i in range(5)]
+        p.join(timeout=10)
+
+def test_capture_service_decodes_into_ring():
+    from ingest.capture_service import VideoCaptureService
+    cap=VideoCaptureService(_sample_video(),queue_size=32,shared_memory=True).start()
+    try:
+        frames=list(cap.frames())
+        assert len(frames)==20 and frames[0].shape==cap.ring.shape
+        assert not np.shares_memory(frames[0],frames[1]) and cap.ring.latest().frame_id==19
+    finally:
+        del frames
+        cap.stop()
+
+def test_capture_overflow_policies_and_metrics():
+    import time
+    from ingest.capture_service import VideoCaptureService
+    cap=VideoCaptureService(_sample_video(),queue_size=2).start()
+    assert cap.policy=="block" and len(list(cap.frames()))==20 and cap.stats()["dropped"]==0
+    cap.stop()
+    cap=VideoCaptureService(_sample_video(),queue_size=4,policy="latest").start()
+    time.sleep(0.5)
+    item=cap.read_item()
+    assert item.frame_id==19 and cap.read(timeout=0.1) is None
+    st=cap.stats()
+    assert st["dropped"]==19 and st["consumed"]==1 and st["latency"]>=0.4
+    cap.stop()
+
+def test_adaptive_stride_follows_latency_budget():
+    from ingest.capture_service import VideoCaptureService
+    cap=VideoCaptureService(_sample_video(),queue_size=8,policy="adaptive",latency_budget=0.2)
+    cap.metrics.latency=0.5
+    cap._adapt(); cap._next_adapt=0; cap._adapt()
+    assert cap.metrics.stride==4
+    cap.metrics.latency=0.01; cap._next_adapt=0; cap._adapt()
+    assert cap.metrics.stride==3
+
+def test_stop_keeps_ring_while_capture_thread_is_stuck():
+    import threading
+    from ingest.capture_service import VideoCaptureService
+    gate=threading.Event()
+    class Stalled(VideoCaptureService):
+        def _decode(self):
+            gate.wait()  # e.g. a stalled RTSP read
+            return super()._decode()
+    cap=Stalled(_sample_video(),queue_size=8,shared_memory=True).start()
+    cap.stop(timeout=0.2)
+    assert cap.ring is not None and cap._thread.is_alive()
+    gate.set(); cap._thread.join(timeout=5)
+    cap.stop()
+    assert cap.ring is None
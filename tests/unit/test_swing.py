@@ -0,0 +1,26 @@
+from types import SimpleNamespace
+from pose.swing_analysis import select_batter
+
+def _person(tid, bbox):
+    return SimpleNamespace(track_id=tid, bbox=bbox, keypoints=[])
+
+def test_select_batter_prefers_bat_holder():
+    persons=[_person(1,[0,0,200,400]),_person(2,[500,100,560,250])]
+    bat={"bbox":[540,120,600,140],"confidence":0.8,"class_id":1}
+    assert select_batter(persons,[bat]).track_id==2
+    assert select_batter(persons,[],prev_track_id=2).track_id==2
+    assert select_batter(persons,[]).track_id==1
+    assert select_batter([],[bat]) is None
+
+def test_swing_stream_matches_batch():
+    from pose.swing_analysis import SwingAnalyzer
+    from pose.keypoints import pack_keypoints
+    xs=[0,0,0,100,200,300,300,300,0,100,200,200]
+    frames=[[{"name":"RIGHT_WRIST","x":x,"y":0,"z":0,"visibility":0.9}] for x in xs]
+    batch=SwingAnalyzer(fps=30).analyze(frames)
+    ana=SwingAnalyzer(fps=30)
+    stream=[e for i,f in enumerate(frames) if (e:=ana.update(pack_keypoints(f),i))]+ana.flush()
+    assert [(e.start_frame,e.end_frame) for e in batch]==[(3,6),(8,11)]
+    assert stream==batch
+    chunked=SwingAnalyzer(fps=30)
+    assert chunked.feed(frames[:5])==[] and chunked.feed(frames[5:])+chunked.flush()==batch
@@ -0,0 +1,59 @@
+import numpy as np
+from detection.tracker import SORTTracker
+from detection.scheduler import DetectionScheduler
+
+def _moving_box(t):
+    x=10+5*t
+    return [{"bbox":[x,20,x+30,80],"confidence":0.9,"class_id":2}]
+
+def test_tracker_propagates_motion():
+    trk=SORTTracker()
+    for t in range(10):
+        out=trk.update(_moving_box(t))
+    assert len(out)==1
+    pred=trk.propagate()
+    assert abs(pred[0]["bbox"][0]-_moving_box(10)[0]["bbox"][0])<2.0
+    assert pred[0]["track_id"]==out[0]["track_id"]
+
+class _FakeDetector:
+    def __init__(self):
+        self.t=0
+        self.calls=0
+    def predict(self, frame):
+        self.calls+=1
+        return _moving_box(self.t)
+
+def test_scheduler_skips_detector():
+    det=_FakeDetector()
+    sched=DetectionScheduler(det, interval=4)
+    frame=np.zeros((72,128,3),dtype=np.uint8)
+    for t in range(40):
+        det.t=t
+        out=sched.step(frame)
+        assert len(out)==1
+    assert det.calls<20
+    assert abs(out[0]["bbox"][0]-_moving_box(39)[0]["bbox"][0])<3.0
+
+def test_tracker_crowd_ids_stable_and_class_gated():
+    rng=np.random.default_rng(0)
+    pos=rng.uniform(0,1000,(30,2))
+    trk=SORTTracker()
+    first=None
+    for t in range(5):
+        dets=[{"bbox":[x+2*t,y,x+2*t+40,y+90],"confidence":0.9,"class_id":2} for x,y in pos]
+        out=trk.update(dets)
+        first=first or {o["track_id"] for o in out}
+    assert {o["track_id"] for o in out}==first
+    # same box, different class: must start a new track instead of matching
+    out=trk.update([{"bbox":[pos[0][0]+10,pos[0][1],pos[0][0]+50,pos[0][1]+90],"confidence":0.9,"class_id":1}])
+    assert len([o for o in out if o["age"]==0])==1
+
+def test_track_stitcher_links_segments():
+    from detection.tracker import TrackStitcher
+    st=TrackStitcher()
+    st.start_segment()
+    seg0=st.remap([{"bbox":[0,0,10,10],"class_id":0,"track_id":7},{"bbox":[50,50,60,60],"class_id":1,"track_id":9}])
+    assert [d["track_id"] for d in seg0]==[0,1]
+    st.start_segment(seg0,[{"bbox":[1,0,11,10],"class_id":0,"track_id":3},{"bbox":[50,50,60,60],"class_id":2,"track_id":4}])
+    assert [d["track_id"] for d in st.remap([{"bbox":[2,0,12,10],"class_id":0,"track_id":3},
+                                             {"bbox":[50,50,60,60],"class_id":2,"track_id":4}])]==[0,2]